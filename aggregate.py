@@ -0,0 +1,173 @@
+"""
+Group-by and totals over a ResultStore, one column at a time.
+
+Key and measure columns are read straight out of the store's arrays, sorted
+once with NumPy and reduced per group, instead of looping over records and
+building dict-of-lists groups. Anything that holds records (a plain list,
+say) is copied into a ResultStore first.
+"""
+from collections import namedtuple
+import numpy as np
+from fixed import group_sums, length_units_array, weight_units_array, PER_KG, PER_MM
+from profiling import timed
+from records import BarResult, StirrupResult, SlabResult, ResultStore
+
+MEMBER_NAMES = {BarResult: "bar", StirrupResult: "stirrup", SlabResult: "slab"}
+
+Summary = namedtuple("Summary", "by keys rows pieces length_mm weight_kg length_units weight_units")
+
+
+def as_store(results):
+    if isinstance(results, ResultStore):
+        return results
+    store = ResultStore()
+    store.extend(results)
+    return store
+
+
+def _np(col):
+    if isinstance(col, list):
+        return np.array(col, dtype=object)
+    return np.frombuffer(col, dtype=np.float64 if col.typecode == "d" else np.int64)
+
+
+def _key_column(table, name):
+    n = len(table)
+    if name == "member":
+        return np.full(n, MEMBER_NAMES[table.cls], dtype=object)
+    if name not in table.columns:
+        return np.full(n, "", dtype=object)
+    return _np(table.column(name))
+
+
+def measures(table):
+    """(pieces, total length in mm, weight in kg) per row of one ColumnTable."""
+    return column_measures(table.cls, lambda name: _np(table.column(name)))
+
+
+def column_measures(cls, column):
+    """measures() for records of type cls whose numeric fields are given by column(name) as arrays."""
+    if cls is BarResult:
+        pieces = column("quantity")
+        return pieces, pieces * column("length"), column("weight")
+    if cls is StirrupResult:
+        pieces = column("num_stirrups")
+        return pieces, pieces * column("cutting_len"), column("total_weight")
+    pieces = column("main_bars")
+    half = pieces / 2
+    length = (half * column("cutting_len1") + (pieces - half) * column("cutting_len2")) * 1000
+    return pieces, length, column("total_weight")
+
+
+def column_units(cls, column):
+    """column_measures() with length and weight in fixed-point units (fixed.py), as int64 arrays."""
+    pieces, length, weight = column_measures(cls, column)
+    return np.asarray(pieces).astype(np.int64), length_units_array(length), weight_units_array(weight)
+
+
+def gather(results, keys, with_measures=False):
+    """
+    Concatenate key columns over every record type in `results`.
+
+    Returns a dict of arrays: one per key, "index" (position in the store) and,
+    with with_measures, "pieces", "length_units" and "weight_units" (int64, see fixed.py).
+    """
+    store = as_store(results)
+    kinds = np.frombuffer(store._kind, dtype=np.int8)
+    parts = {k: [] for k in keys}
+    parts["index"] = []
+    if with_measures:
+        parts["pieces"], parts["length_units"], parts["weight_units"] = [], [], []
+    for kind, table in enumerate(store.tables):
+        if not len(table):
+            continue
+        for k in keys:
+            parts[k].append(_key_column(table, k))
+        parts["index"].append(np.flatnonzero(kinds == kind))
+        if with_measures:
+            pieces, length, weight = column_units(table.cls, lambda name: _np(table.column(name)))
+            parts["pieces"].append(pieces)
+            parts["length_units"].append(length)
+            parts["weight_units"].append(weight)
+    out = {}
+    for k, chunks in parts.items():
+        if not chunks:
+            out[k] = np.empty(0, dtype=np.float64 if k in keys else np.int64)
+        elif len({c.dtype for c in chunks}) > 1:
+            # a field that is numeric in one record type and missing in another
+            out[k] = np.concatenate([c.astype(object) for c in chunks])
+        else:
+            out[k] = np.concatenate(chunks)
+    return out
+
+
+def _codes(col):
+    if col.dtype == object:
+        # text keys (beam numbers may be ints from the CLI and strings from the GUI)
+        col = np.array([str(v) for v in col])
+    return np.unique(col, return_inverse=True)
+
+
+def group_indices(results, key):
+    """[(key value, store indices)] sorted by key; within a group results keep the order they were added."""
+    cols = gather(results, [key])
+    if not len(cols["index"]):
+        return []
+    values, inverse = _codes(cols[key])
+    order = np.lexsort((cols["index"], inverse))
+    codes = inverse[order]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], bounds))
+    return [(values[codes[s]], g) for s, g in zip(starts, np.split(cols["index"][order], bounds))]
+
+
+@timed("group.records")
+def group_records(results, key):
+    """[(key value, [records])] sorted by key - the grouping the printed and exported tables use."""
+    store = as_store(results)
+    return [(_plain(k), [store[int(i)] for i in idx]) for k, idx in group_indices(store, key)]
+
+
+def _plain(v):
+    return v.item() if isinstance(v, np.generic) else v
+
+
+@timed("group.summarize")
+def summarize(results, by=("d",)):
+    """
+    Totals per group of `by` fields (any record field, or "member" for bar/stirrup/slab).
+
+    Returns a Summary: keys is a list of key tuples in sorted order, the other
+    fields are arrays aligned with it (result rows, pieces, length in mm, weight in kg,
+    and the exact integer sums the last two come from, see fixed.py).
+    """
+    by = tuple(by)
+    cols = gather(results, by, with_measures=True)
+    n = len(cols["index"])
+    if n == 0:
+        empty = np.empty(0)
+        none = empty.astype(np.int64)
+        return Summary(by, [], none, none, empty, empty, none, none)
+    uniques, codes = zip(*(_codes(cols[k]) for k in by))
+    combined = np.ravel_multi_index(codes, [len(u) for u in uniques]) if len(by) > 1 else codes[0]
+    groups, inverse = np.unique(combined, return_inverse=True)
+    parts = np.unravel_index(groups, [len(u) for u in uniques]) if len(by) > 1 else (groups,)
+    keys = [tuple(_plain(uniques[j][parts[j][g]]) for j in range(len(by))) for g in range(len(groups))]
+    length = group_sums(inverse, cols["length_units"], len(groups))
+    weight = group_sums(inverse, cols["weight_units"], len(groups))
+    return Summary(
+        by, keys,
+        np.bincount(inverse, minlength=len(groups)),
+        group_sums(inverse, cols["pieces"], len(groups)),
+        length / PER_MM, weight / PER_KG, length, weight,
+    )
+
+
+def summary_rows(summary):
+    """Summary as plain rows (keys..., rows, pieces, length in m, weight in kg) for tabulate/PDF/CSV."""
+    return [list(k) + [int(r), int(p), f"{l / 1000:.2f}", f"{w:.2f}"]
+            for k, r, p, l, w in zip(summary.keys, summary.rows, summary.pieces, summary.length_mm, summary.weight_kg)]
+
+
+def summary_headers(summary):
+    return [k.replace("_", " ").title() if k != "d" else "Diameter" for k in summary.by] + ["Rows", "Pieces", "Length (m)", "Weight (kg)"]
@@ -0,0 +1,285 @@
+import calc
+import cuttingLen
+from fixed import floor_kg_array, piece_grams_array
+
+# Below this many bars the plain scalar functions are faster than
+# building arrays, so beam_bar_lengths only switches over above it
+# (and numpy is not even imported until then).
+BATCH_THRESHOLD = 8
+
+
+def _col(x):
+    import numpy as np
+    return np.asarray(x, dtype=np.float64)
+
+
+def bend_length(d, sup_width, beam_depth):
+    import numpy as np
+    d = _col(d)
+    sup_width = _col(sup_width)
+    beam_depth = _col(beam_depth)
+    ld = 46 * d
+    safe_len = ld - sup_width - 20 - 2 * d
+    short = ld > (safe_len + beam_depth - 20)
+    safe_len = np.where(short, sup_width + beam_depth - 40, safe_len)
+    return np.maximum(0, safe_len)
+
+
+def flow1(d, clear_span, es_width1, es_width2, bl1, bl2):
+    return _col(clear_span) + _col(es_width1) + _col(bl1) + _col(es_width2) + _col(bl2)
+
+
+def flow2(d, clear_span, es_width, beam_depth, bl1):
+    ld_cont = 46 * _col(d)
+    return _col(clear_span) + _col(bl1) + ld_cont + _col(es_width)
+
+
+def flow3(d, clear_span):
+    return _col(clear_span) + 2 * 46 * _col(d)
+
+
+def flow4(inner_span, canti_span):
+    return _col(inner_span) / 3 + _col(canti_span)
+
+
+def beam_bar_lengths(diameters, clear_span, es_width1=0, es_width2=0, beam_depth1=0, beam_depth2=0, num_supports=2):
+    """
+    Bend lengths and cutting length for every diameter of one top/bottom bar run.
+
+    num_supports picks the flow: 2 -> flow1, 1 -> flow2, 0 -> flow3.
+    Returns three lists (bl1, bl2, length) in the order of diameters.
+    Uses the scalar cuttingLen functions for a handful of bars and the
+    array versions above BATCH_THRESHOLD; both give identical numbers.
+    """
+    diameters = list(diameters)
+    if len(diameters) <= BATCH_THRESHOLD:
+        bl1s, bl2s, lengths = [], [], []
+        for d in diameters:
+            if num_supports == 2:
+                bl1 = cuttingLen.bend_length(d, es_width1, beam_depth1)
+                bl2 = cuttingLen.bend_length(d, es_width2, beam_depth2)
+                length = cuttingLen.flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
+            elif num_supports == 1:
+                bl1 = cuttingLen.bend_length(d, es_width1, beam_depth1)
+                bl2 = 0
+                length = cuttingLen.flow2(d, clear_span, es_width1, 0, bl1)
+            else:
+                bl1 = bl2 = 0
+                length = cuttingLen.flow3(d, clear_span)
+            bl1s.append(bl1)
+            bl2s.append(bl2)
+            lengths.append(length)
+        return bl1s, bl2s, lengths
+
+    import numpy as np
+    d = _col(diameters)
+    zeros = np.zeros_like(d)
+    if num_supports == 2:
+        bl1 = bend_length(d, es_width1, beam_depth1)
+        bl2 = bend_length(d, es_width2, beam_depth2)
+        length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
+    elif num_supports == 1:
+        bl1 = bend_length(d, es_width1, beam_depth1)
+        bl2 = zeros
+        length = flow2(d, clear_span, es_width1, 0, bl1)
+    else:
+        bl1 = bl2 = zeros
+        length = flow3(d, clear_span)
+    return bl1.tolist(), bl2.tolist(), length.tolist()
+
+
+# Whole columns of calc specs at once. Each function takes {spec field: array}
+# (text fields as lists) for many members of one kind and returns
+# {record field: array or list} in record field order, with the same numbers
+# the scalar calc functions give member by member.
+
+def beam_bar_columns(c):
+    import numpy as np
+    d, clear_span = c["d"], c["clear_span"]
+    two = c["num_supports"] == 2
+    one = c["num_supports"] == 1
+    bl1 = bend_length(d, c["es_width1"], c["beam_depth1"])
+    bl2 = bend_length(d, c["es_width2"], c["beam_depth2"])
+    length = np.where(two, flow1(d, clear_span, c["es_width1"], c["es_width2"], bl1, bl2),
+                      np.where(one, flow2(d, clear_span, c["es_width1"], 0, bl1), flow3(d, clear_span)))
+    return _bar_columns(c, length, clear_span, np.where(two | one, bl1, 0.0), np.where(two, bl2, 0.0))
+
+
+def cantilever_columns(c):
+    import numpy as np
+    length = np.where(c["full_span"] != 0, c["full_span"], flow4(c["inner_span"], c["canti_span"]))
+    zeros = np.zeros(len(length))
+    return _bar_columns(c, length, zeros, zeros, zeros)
+
+
+def _bar_columns(c, length, clear_span, bl1, bl2):
+    d, qty = c["d"], c["quantity"]
+    return {"type": c["type"], "beam_num": c["beam_num"], "d": d, "quantity": qty, "length": length,
+            "clear_span": clear_span, "bl1": bl1, "bl2": bl2, "ld": 46 * d,
+            "weight": d * d / 162 * (qty * length) / 1000}
+
+
+STIRRUP_NAMES = {"1": "Two legged", "2": "4 legged"}     # anything else is six legged, as in calc
+
+
+def _stirrup_unit(c):
+    # cutting length and weight of one stirrup, as calc.stirrup_cutting_length
+    import numpy as np
+    d, width, depth = c["d"], c["beam_width"], c["beam_depth"]
+    kind = np.array(c["stirrup_type"], dtype=object)
+    unit = d * d / 162
+    two_leg = 2*width + 2*depth + 20*d - 6*d - 80
+    four_leg = np.floor(4*depth + 2*width + 2*(width/3) + 16*d - 80)
+    six_leg = np.floor(6*depth + 2*width + 4*width/5 + 24*d - 80)
+    is_two, is_four = kind == "1", kind == "2"
+    cutting_len = np.where(is_two, two_leg, np.where(is_four, four_leg, six_leg))
+    return cutting_len, piece_grams_array(unit*cutting_len)
+
+
+def stirrup_columns(c):
+    import numpy as np
+    d = c["d"]
+    cutting_len, weight_bar = _stirrup_unit(c)
+    clear_span = c["clear_span"]
+    diff = c["l4_spacing"] != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        num_l4 = np.where(diff, np.floor((clear_span/4) / c["l4_spacing"] + 1), 0)
+        num_l2 = np.where(diff, np.floor((clear_span/2) / c["l2_spacing"] + 1), 0)
+        uniform = np.where(diff, 0, np.floor(clear_span / c["spacing"]))
+    num_stirrups = np.where(diff, 2*num_l4 + num_l2, uniform)
+    total_weight = np.where(diff, floor_kg_array(weight_bar*num_l2 + weight_bar*num_l4*2),
+                            floor_kg_array(uniform*weight_bar))
+    return {"type": [STIRRUP_NAMES.get(k, "6 legged") for k in c["stirrup_type"]], "beam_num": c["beam_num"],
+            "d": d, "spacing_type": np.where(diff, "diff", "uniform").tolist(), "cutting_len": cutting_len,
+            "total_weight": total_weight, "num_stirrups": num_stirrups.astype(np.int64),
+            "num_l4": num_l4.astype(np.int64), "num_l2": num_l2.astype(np.int64)}
+
+
+def zone_layout(beam, start, end, spacing, clear_span):
+    """
+    calc.zone_layout for many beams at once. The zone table is one row per
+    zone - the beam it belongs to (an index into clear_span), start, end,
+    spacing - in any order, as the layout does not depend on it.
+
+    Returns the laid out zones as columns beam, start, end, spacing and
+    count (stirrups), sorted by beam and position.
+    """
+    import numpy as np
+    beam = np.asarray(beam, dtype=np.int64)
+    start, end, spacing = _col(start), _col(end), _col(spacing)
+    span = _col(clear_span)[beam]
+    start = np.maximum(np.where(start < 0, start + span, start), 0)
+    end = np.minimum(np.where(end <= 0, end + span, end), span)
+    keep = np.flatnonzero(end > start)
+    beam, start, end, spacing = beam[keep], start[keep], end[keep], spacing[keep]
+    n = len(beam)
+    if not n:       # no zone reaches into a clear span: no stirrups, as calc.zone_layout
+        return {"beam": beam, "start": start, "end": end, "spacing": spacing, "count": np.zeros(0, dtype=np.int64)}
+
+    # every beam's zone boundaries, sorted and distinct; segment k runs from point k to k + 1
+    pb, pp = np.concatenate([beam, beam]), np.concatenate([start, end])
+    order = np.lexsort((pp, pb))
+    new = np.ones(2 * n, dtype=bool)
+    new[1:] = (pb[order][1:] != pb[order][:-1]) | (pp[order][1:] != pp[order][:-1])
+    point = np.empty(2 * n, dtype=np.int64)
+    point[order] = np.cumsum(new) - 1
+    pp = pp[order][new]
+
+    # each zone covers the segments from its start point to its end point
+    lo, covered = point[:n], point[n:] - point[:n]
+    zone = np.repeat(np.arange(n), covered)
+    seg = lo[zone] + np.arange(len(zone)) - np.repeat(np.cumsum(covered) - covered, covered)
+    # the closest spacing governs a segment, as in calc.zone_layout
+    order = np.lexsort((zone, -end[zone], start[zone], spacing[zone], seg))
+    seg, zone = seg[order], zone[order]
+    first = np.ones(len(seg), dtype=bool)
+    first[1:] = seg[1:] != seg[:-1]
+    seg, zone = seg[first], zone[first]
+    # and consecutive segments won by the same zone are one run
+    run = np.ones(len(seg), dtype=bool)
+    run[1:] = (seg[1:] != seg[:-1] + 1) | (zone[1:] != zone[:-1])
+    starts = np.flatnonzero(run)
+    ends = np.append(starts[1:], len(seg)) - 1
+    out_start, out_end = pp[seg[starts]], pp[seg[ends] + 1]
+    out_spacing = spacing[zone[starts]]
+    return {"beam": beam[zone[starts]], "start": out_start, "end": out_end, "spacing": out_spacing,
+            "count": np.floor((out_end - out_start) / out_spacing + 1).astype(np.int64)}
+
+
+def stirrup_zone_columns(c, zones):
+    """
+    StirrupResult columns for beams spaced zone by zone: c holds the
+    StirrupZonesSpec fields but zones, one row per beam, and zones the zone
+    table of zone_layout. Gives the same counts and weights as
+    calc.zone_stirrups, and so as stirrup_columns for calc.stirrup_zones tables.
+    """
+    import numpy as np
+    d = c["d"]
+    n = len(d)
+    layout = zone_layout(zones["beam"], zones["start"], zones["end"], zones["spacing"], c["clear_span"])
+    num_stirrups = np.bincount(layout["beam"], weights=layout["count"], minlength=n).astype(np.int64)
+    cutting_len, weight_bar = _stirrup_unit(c)
+    return {"type": [STIRRUP_NAMES.get(k, "6 legged") for k in c["stirrup_type"]], "beam_num": c["beam_num"],
+            "d": d, "spacing_type": ["zones"] * n, "cutting_len": cutting_len,
+            "total_weight": floor_kg_array(num_stirrups*weight_bar), "num_stirrups": num_stirrups,
+            "num_l4": np.zeros(n, dtype=np.int64), "num_l2": np.zeros(n, dtype=np.int64)}
+
+
+def slab_columns(c):
+    import numpy as np
+    d, x, qty = c["d"], c["x"], c["quantity"]
+    main_bars = np.floor((c["y"] / c["spacing_main"]) + 1).astype(np.int64) * qty
+    dist_bars = np.floor((x / c["spacing_dist"]) + 1).astype(np.int64) * qty
+    l1 = (x + c["beam_width1"] + c["beam_width2"] + c["a"] / 4) / 1000
+    l2 = (x + c["beam_width1"] + c["beam_width2"] + c["b"] / 4) / 1000
+    unit = d * d / 162
+    weight1 = np.floor((main_bars / 2) * l1 * unit)
+    weight2 = np.floor((main_bars - main_bars / 2) * l2 * unit)
+    return {"type": ["One-way"] * len(d), "d": d, "main_bars": main_bars, "dist_bars": dist_bars,
+            "cutting_len1": l1, "cutting_len2": l2, "total_weight": weight1 + weight2, "quantity": qty}
+
+
+def strip_bars(width, spacing, spacing_edge):
+    import numpy as np
+    edge = np.where(spacing_edge != 0, spacing_edge, spacing)
+    return (np.floor(0.75 * width / spacing) + 1 + 2 * np.floor(0.125 * width / edge)).astype(np.int64)
+
+
+def two_way_slab_columns(c):
+    """
+    calc.two_way_slab for every panel at once: SlabResult columns for all the
+    bar sets, panel by panel, plus "panel", the input row each one came from.
+    """
+    import numpy as np
+    qty = c["quantity"]
+    n, l1, l2 = [], [], []
+    tops = []
+    for span, across, w1, w2, n1, n2, spacing in (
+            (c["x"], c["y"], c["beam_width1"], c["beam_width2"], c["a"], c["b"], c["spacing_short"]),
+            (c["y"], c["x"], c["beam_width3"], c["beam_width4"], c["a2"], c["b2"], c["spacing_long"])):
+        bars = strip_bars(across, spacing, c["spacing_edge"]) * qty
+        n.append(bars)
+        l1.append((span + w1 + w2 + n1 / 4) / 1000)
+        l2.append((span + w1 + w2 + n2 / 4) / 1000)
+        edges = (n1 > 0).astype(np.int64) + (n2 > 0)
+        top1 = (span / 4 + w1 + n1 / 4) / 1000
+        top2 = (span / 4 + w2 + n2 / 4) / 1000
+        tops.append((bars // 2 * edges, np.where(n1 > 0, top1, top2), np.where(n2 > 0, top2, top1)))
+    for bars, t1, t2 in tops:
+        n.append(bars)
+        l1.append(t1)
+        l2.append(t2)
+
+    # (4, panels) -> panel by panel, bar sets in TWO_WAY_TYPES order
+    n, l1, l2 = (np.stack(v, axis=1).ravel() for v in (n, l1, l2))
+    panels = len(qty)
+    kinds = np.tile(np.arange(4), panels)
+    panel = np.repeat(np.arange(panels), 4)
+    keep = n > 0
+    n, l1, l2, kinds, panel = n[keep], l1[keep], l2[keep], kinds[keep], panel[keep]
+    d = c["d"][panel]
+    unit = d * d / 162
+    weight = np.floor((n / 2) * l1 * unit) + np.floor((n - n / 2) * l2 * unit)
+    return {"type": [calc.TWO_WAY_TYPES[k] for k in kinds.tolist()], "d": d, "main_bars": n,
+            "dist_bars": np.zeros(len(n), dtype=np.int64), "cutting_len1": l1, "cutting_len2": l2,
+            "total_weight": weight, "quantity": qty[panel], "panel": panel}
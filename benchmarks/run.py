@@ -0,0 +1,240 @@
+"""
+Benchmarks for the calculation, grouping and export paths.
+
+    python benchmarks/run.py [--beams 2000] [--diameters 3] [--repeat 3]
+                             [--out FILE] [--compare OLD.json] [--only NAME ...]
+
+A synthetic project is N beams, each with top and bottom bars in M
+diameters, a stirrup row, and every few beams a slab panel. It is generated
+from a fixed seed and computed through the same functions the CLI, GUI and
+batch mode use. Every benchmark reports the best wall time of --repeat
+runs, the throughput in results/s, and the peak Python memory of one more
+run under tracemalloc. Results go to benchmarks/results/<commit>.json by
+default. --compare prints the change against an earlier file.
+
+Nothing here imports Qt, so it runs on a headless box; the GUI's export is
+the export.write_pdf/write_csv pair the export thread calls.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calc import BeamSpec, StirrupSpec, SlabSpec, compute as calculate   # noqa: E402
+from records import ResultStore                                     # noqa: E402
+import memo                                                         # noqa: E402
+
+DIAMETERS = [8, 10, 12, 16, 20, 25, 32]
+
+
+def synthetic_project(beams, diameters, slab_every=4, seed=1):
+    """Input rows for a project: ("beam", ...), ("stirrup", ...) and ("slab", ...) tuples."""
+    rng = random.Random(seed)
+    bar_ds = DIAMETERS[2:2 + diameters] or DIAMETERS[2:3]
+    rows = []
+    for b in range(beams):
+        clear_span = rng.choice(range(3000, 9001, 250))
+        width = rng.choice([230, 300])
+        depth = rng.choice([450, 500, 600])
+        supports = rng.choice([0, 1, 2, 2, 2])
+        for member in ("Top Steel", "Bottom Steel"):
+            rows.append(("beam", member, str(b), clear_span, supports, width, depth,
+                         [(d, rng.randint(2, 4)) for d in bar_ds]))
+        if rng.random() < 0.5:
+            rows.append(("stirrup", str(b), rng.choice("123"), clear_span, width, depth, 8, 150, None))
+        else:
+            rows.append(("stirrup", str(b), rng.choice("123"), clear_span, width, depth, 8, 100, 150))
+        if b % slab_every == 0:
+            rows.append(("slab", rng.choice([3000, 3500, 4000]), rng.choice([4000, 5000]), 3000, 3000, width, width,
+                         rng.choice([8, 10]), 150, 200))
+    return rows
+
+
+def compute(rows, results):
+    """Run every input row through the calculation functions into `results`."""
+    for row in rows:
+        kind = row[0]
+        if kind == "beam":
+            _, member, beam_num, clear_span, supports, width, depth, diam_qty = row
+            for d, qty in diam_qty:
+                results.append(calculate(BeamSpec(member, beam_num, d, qty, clear_span, supports, width, width, depth, depth)))
+        elif kind == "stirrup":
+            _, beam_num, type_stirrup, clear_span, width, depth, d, spacing, l2_spacing = row
+            if l2_spacing is None:
+                spec = StirrupSpec(beam_num, d, type_stirrup, clear_span, width, depth, spacing=spacing)
+            else:
+                spec = StirrupSpec(beam_num, d, type_stirrup, clear_span, width, depth, l4_spacing=spacing, l2_spacing=l2_spacing)
+            results.append(calculate(spec))
+        else:
+            _, x, y, a, b, w1, w2, d, main_sp, dist_sp = row
+            results.append(calculate(SlabSpec(d, x, y, a, b, w1, w2, main_sp, dist_sp)))
+    return results
+
+
+def build(rows):
+    return compute(rows, ResultStore())
+
+
+def bench_calc(rows, _results, _tmp):
+    memo.clear_caches()
+    build(rows)
+
+
+def bench_calc_nocache(rows, _results, _tmp):
+    memo.set_enabled(False)
+    try:
+        build(rows)
+    finally:
+        memo.set_enabled(True)
+
+
+def bench_group_by_field(_rows, results, _tmp):
+    from result import group_by_field
+    with contextlib.redirect_stdout(io.StringIO()):
+        group_by_field(results, "d", ["type", "beam_num", "bl1", "bl2", "quantity", "length"])
+
+
+def bench_summarize(_rows, results, _tmp):
+    from aggregate import summarize
+    summarize(results, ("type", "d"))
+
+
+def bench_cutting_plan(_rows, results, _tmp):
+    from cutting_plan import plan_results
+    plan_results(results)
+
+
+def bench_export_csv(_rows, results, tmp):
+    from export import export_rows, write_csv
+    write_csv(export_rows(results, results.totals), os.path.join(tmp, "out.csv"))
+
+
+def bench_export_pdf(_rows, results, tmp):
+    from export import export_rows, write_pdf
+    write_pdf(export_rows(results, results.totals), os.path.join(tmp, "out.pdf"))
+
+
+def bench_cli_pdf(_rows, results, tmp):
+    from main2 import write_pdf
+    write_pdf(results, os.path.join(tmp, "cli.pdf"), ["type", "beam_num", "bl1", "bl2", "quantity", "length"],
+              None, group_key="d")
+
+
+def bench_project_save(_rows, results, tmp):
+    from project_store import save_project
+    save_project(results, os.path.join(tmp, "bench.civilcal")).close()
+    results.journal = None
+
+
+def bench_project_open(_rows, _results, tmp):
+    from project_store import open_project
+    project, _ = open_project(os.path.join(tmp, "bench.civilcal"))
+    project.close()
+
+
+BENCHMARKS = {
+    "calc": bench_calc,
+    "calc_nocache": bench_calc_nocache,
+    "group_by_field": bench_group_by_field,
+    "summarize": bench_summarize,
+    "cutting_plan": bench_cutting_plan,
+    "export_csv": bench_export_csv,
+    "export_pdf": bench_export_pdf,
+    "cli_pdf": bench_cli_pdf,
+    "project_save": bench_project_save,
+    "project_open": bench_project_open,     # opens what project_save wrote
+}
+
+
+def commit_id():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(names, rows, repeat):
+    results = build(rows)
+    n = len(results)
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            fn = BENCHMARKS[name]
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn(rows, results, tmp)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            tracemalloc.start()
+            fn(rows, results, tmp)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            out[name] = {"seconds": round(best, 6), "results_per_s": round(n / best) if best else None,
+                         "peak_kb": peak // 1024}
+            print(f"{name:<16} {best * 1000:9.1f} ms  {out[name]['results_per_s'] or 0:>10} results/s  "
+                  f"{out[name]['peak_kb']:>8} KiB peak", flush=True)
+    return n, out
+
+
+def compare(old_path, new):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    print(f"\nvs {old_path} ({old.get('commit')})")
+    for name, res in new["benchmarks"].items():
+        before = old.get("benchmarks", {}).get(name)
+        if not before:
+            continue
+        ratio = res["seconds"] / before["seconds"] if before["seconds"] else float("nan")
+        print(f"{name:<16} {before['seconds'] * 1000:9.1f} -> {res['seconds'] * 1000:9.1f} ms  ({ratio:.2f}x time)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the calculation and export paths")
+    parser.add_argument("--beams", type=int, default=2000)
+    parser.add_argument("--diameters", type=int, default=3, help="bar diameters per beam (1-5)")
+    parser.add_argument("--slab-every", type=int, default=4, help="one slab panel per this many beams")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run just these benchmarks")
+    parser.add_argument("--out", help="JSON file to write (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier JSON file to compare against")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(BENCHMARKS)
+    if "project_open" in names and "project_save" not in names:
+        names.insert(names.index("project_open"), "project_save")
+    rows = synthetic_project(args.beams, args.diameters, args.slab_every, args.seed)
+    n, benchmarks = run(names, rows, args.repeat)
+
+    report = {
+        "commit": commit_id(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": {"beams": args.beams, "diameters": args.diameters, "slab_every": args.slab_every,
+                   "seed": args.seed, "repeat": args.repeat, "results": n},
+        "benchmarks": benchmarks,
+    }
+    out = args.out or os.path.join(ROOT, "benchmarks", "results", f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n{n} results; written to {out}")
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
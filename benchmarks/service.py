@@ -0,0 +1,151 @@
+"""
+Load test for the HTTP calculation service (service.py).
+
+    python benchmarks/service.py [--clients 16] [--requests 50] [--members 200]
+                                 [--endpoint /beams] [--columns] [--port 8766] [--window-ms 1]
+
+Starts `civilcal serve` in a subprocess (or uses --url), opens --clients
+keep-alive connections and has each send --requests POSTs of --members
+members one after another (as {"columns": ...} with --columns). Prints the
+client-side latency percentiles, the members computed per millisecond of
+wall time, and the server's /stats.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def beam_member(rng):
+    return {"member": rng.choice(["top", "bottom"]), "beam_num": str(rng.randint(1, 500)),
+            "d": rng.choice([12, 16, 20, 25]), "quantity": rng.randint(2, 4),
+            "clear_span": rng.randrange(3000, 9000, 250), "num_supports": rng.choice([0, 1, 2]),
+            "es_width1": 300, "es_width2": 300, "beam_depth1": 450, "beam_depth2": 450}
+
+
+def stirrup_member(rng):
+    return {"beam_num": str(rng.randint(1, 500)), "d": 8, "stirrup_type": rng.choice("123"),
+            "clear_span": rng.randrange(3000, 9000, 250), "beam_width": 230, "beam_depth": 450,
+            "spacing": 150}
+
+
+def slab_member(rng):
+    return {"d": rng.choice([8, 10]), "x": 3000, "y": rng.choice([4000, 5000]), "a": 3000, "b": 3000,
+            "beam_width1": 230, "beam_width2": 230, "spacing_main": 150, "spacing_dist": 200}
+
+
+def cantilever_member(rng):
+    return {"beam_num": str(rng.randint(1, 500)), "d": rng.choice([12, 16]), "quantity": 2,
+            "inner_span": rng.randrange(2000, 5000), "canti_span": rng.randrange(1000, 2500)}
+
+
+MEMBERS = {"/beams": beam_member, "/stirrups": stirrup_member, "/slabs": slab_member,
+           "/cantilevers": cantilever_member}
+
+
+async def client(host, port, path, bodies, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            if b" 200 " not in status:
+                raise RuntimeError(f"{path}: {status.decode().strip()}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+def request_body(members, columns):
+    if columns:
+        return {"columns": {key: [m[key] for m in members] for key in members[0]}}
+    return {"members": members}
+
+
+async def load(host, port, path, clients, requests, members, seed, columns=False):
+    rng = random.Random(seed)
+    make = MEMBERS[path]
+    bodies = [[json.dumps(request_body([make(rng) for _ in range(members)], columns)).encode("utf-8")
+               for _ in range(requests)] for _ in range(clients)]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, path, b, latencies) for b in bodies))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+def wait_ready(url, timeout=10):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url + "/health"):
+                return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the calculation service")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50, help="per client")
+    parser.add_argument("--members", type=int, default=200, help="per request")
+    parser.add_argument("--endpoint", choices=list(MEMBERS), default="/beams")
+    parser.add_argument("--columns", action="store_true", help="send members column-wise")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--window-ms", type=float, default=1.0)
+    parser.add_argument("--url", help="use a running service instead of starting one")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    if not args.url:
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "civilcal.py"), "serve", "--port", str(args.port),
+                                   "--window-ms", str(args.window_ms)], stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(url)
+        host, port = url.split("//", 1)[1].rsplit(":", 1)
+        wall, latencies = asyncio.run(load(host, int(port), args.endpoint, args.clients, args.requests,
+                                           args.members, args.seed, args.columns))
+        with urllib.request.urlopen(url + "/stats") as r:
+            stats = json.load(r)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    total = args.clients * args.requests * args.members
+    ms = [s * 1000 for s in latencies]
+    print(f"{args.endpoint}: {len(ms)} requests, {total} members in {wall:.2f} s "
+          f"-> {total / (wall * 1000):.0f} members/ms, {len(ms) / wall:.0f} requests/s")
+    print(f"client latency ms: p50 {percentile(ms, 50):.2f}  p90 {percentile(ms, 90):.2f}  "
+          f"p99 {percentile(ms, 99):.2f}  max {ms[-1]:.2f}")
+    print(f"server: {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cold-start budget for the entry points.
+
+    python benchmarks/startup.py [--runs 5] [--scale 1.0]
+
+Each entry module is imported in a fresh interpreter with -X importtime.
+The best of --runs cumulative import times is compared with its budget in
+ms; --scale multiplies every budget, for a slower machine. A run also fails
+if a module that should load on first use (numpy, tabulate, the export and
+project backends) shows up in the startup imports. Exits with status 1 on
+any failure.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_MS = {
+    "main": 120,
+    "main2": 120,
+    "civilcal": 150,
+    "main_gui": 450,
+}
+
+LAZY = ["numpy", "tabulate", "aggregate", "export", "pdf_stream", "project_store", "sqlite3", "service", "asyncio", "floor_grid",
+        "reportlab", "fpdf"]
+NOT_AT_STARTUP = {
+    "main": LAZY + ["PySide6"],
+    "main2": LAZY + ["PySide6"],
+    "civilcal": LAZY + ["PySide6"],
+    "main_gui": LAZY,
+}
+
+
+def import_profile(module):
+    """(cumulative import time of `module` in ms, names of every module imported) in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "QT_QPA_PLATFORM": "offscreen"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    total = None
+    names = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue        # header line
+        names.add(name)
+        if name == module:
+            total = int(cumulative) / 1000
+    return total, names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check entry point import times against their budgets")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget by this")
+    parser.add_argument("modules", nargs="*", default=list(BUDGET_MS))
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        best = None
+        loaded = set()
+        for _ in range(args.runs):
+            ms, names = import_profile(module)
+            best = ms if best is None else min(best, ms)
+            loaded |= names
+        budget = BUDGET_MS[module] * args.scale
+        eager = [name for name in NOT_AT_STARTUP.get(module, []) if name in loaded]
+        ok = best <= budget and not eager
+        failed |= not ok
+        print(f"{module:<10} {best:7.1f} ms  (budget {budget:.0f} ms)  {'ok' if ok else 'FAIL'}")
+        if eager:
+            print(f"           loaded at startup: {', '.join(eager)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Many members entered at once, as a table of text cells.
+
+The GUI's entry grid keeps what is typed or pasted (from a spreadsheet: tab
+separated rows) as one list of cell strings per column. The columns are
+those of a batch schedule row (see civilcal.py), one member and diameter per
+row, for one kind of member:
+
+    cells = {"beam_num": ["B1", "B2"], "d": ["16", "12"], "quantity": ["3", ""], ...}
+    results, errors = compute_entries("Top Steel", cells)
+
+Every column is checked at once (validation.py). A row that fails is
+reported in errors ({row: [(column, message)]}) and left out. The others
+are computed together by the column functions of batch.py and come back
+as (record, spec) pairs in row order, the same records compute(spec)
+gives. Blank cells count as 0, but a blank quantity is 1 and a blank
+stirrup type is "1" (two legged). A cantilever's full_span, as in a
+schedule, is the bar length itself.
+"""
+import csv
+from dataclasses import fields
+
+import batch
+from calc import BeamSpec, CantileverSpec, StirrupSpec, StirrupZonesSpec, SlabSpec, TwoWaySlabSpec
+from records import BarResult, StirrupResult, SlabResult, FIELD_NAMES
+from validation import QUANTITY, SCHEMAS, Schema, validate
+
+# grid kind -> member type of a schedule; the grid's columns are the member's schema fields
+MEMBERS = {"Top Steel": "top", "Bottom Steel": "bottom", "Cantilever": "cantilever", "Stirrups": "stirrup",
+           "Slab": "slab", "Two-way Slab": "twoway"}
+KINDS = {kind: SCHEMAS[member].names() for kind, member in MEMBERS.items()}
+DIAMETER_COLUMNS = ["d", "quantity"]
+
+
+def parse_table(text):
+    """Rows of cells of pasted spreadsheet text (tab separated, quoted cells allowed), blank rows dropped."""
+    rows = csv.reader(text.splitlines(), dialect="excel-tab")
+    return [[cell.strip() for cell in row] for row in rows if any(cell.strip() for cell in row)]
+
+
+def header_columns(row, columns):
+    """The columns a header row names, if every cell of it is one of columns (any case), else None."""
+    names = [cell.strip().lower() for cell in row]
+    return names if names and all(name in columns for name in names) else None
+
+
+def entry_specs(kind, cols, rows):
+    """The calc spec of each of the given rows of validated columns."""
+    import numpy as np
+    cols = {name: values.tolist() if isinstance(values, np.ndarray) else values for name, values in cols.items()}
+    take = lambda name: [cols[name][i] for i in rows]
+    if kind in ("Top Steel", "Bottom Steel"):
+        spec_cls, extra = BeamSpec, {"type": [kind] * len(rows)}
+    elif kind == "Cantilever":
+        spec_cls, extra = CantileverSpec, {"type": ["Cantilever"] * len(rows)}
+    elif kind == "Stirrups":
+        return [StirrupZonesSpec(*[cols[f.name][i] for f in fields(StirrupZonesSpec)]) if cols["zones"][i] else
+                StirrupSpec(*[cols[f.name][i] for f in fields(StirrupSpec)]) for i in rows]
+    else:
+        spec_cls, extra = (SlabSpec if kind == "Slab" else TwoWaySlabSpec), {}
+    columns = [extra[f.name] if f.name in extra else take(f.name) for f in fields(spec_cls)]
+    return [spec_cls(*values) for values in zip(*columns)]
+
+
+def _records(rec_cls, out):
+    import numpy as np
+    names = FIELD_NAMES[rec_cls]
+    return [rec_cls(*values) for values in zip(*(out[n].tolist() if isinstance(out[n], np.ndarray) else out[n]
+                                                 for n in names))]
+
+
+def _result_columns(kind, c, zones=None):
+    if kind in ("Top Steel", "Bottom Steel"):
+        return BarResult, batch.beam_bar_columns(c)
+    if kind == "Cantilever":
+        return BarResult, batch.cantilever_columns(c)
+    if kind == "Stirrups":
+        return StirrupResult, batch.stirrup_zone_columns(c, zones) if zones else batch.stirrup_columns(c)
+    if kind == "Slab":
+        return SlabResult, batch.slab_columns(c)
+    return SlabResult, batch.two_way_slab_columns(c)
+
+
+def compute_entries(kind, cells):
+    """
+    ([(record, spec)] in row order, errors) for the grid's cells of one kind:
+    every row that passes validation.validate() is computed, in one call of
+    the batch column functions per spacing kind; errors is the report's
+    {row: [(column, message)]}.
+    """
+    import numpy as np
+    report = validate(MEMBERS[kind], cells)
+    cols, errors = report.columns, report.by_row()
+    good = np.flatnonzero(report.ok)
+    if not len(good):
+        return [], errors
+    if kind in ("Top Steel", "Bottom Steel", "Cantilever"):
+        cols["type"] = [kind] * len(cols["d"])
+    groups = [(good, False)]
+    if kind == "Stirrups":
+        zoned = np.array([bool(cols["zones"][i]) for i in good.tolist()])
+        groups = [(good[~zoned], False), (good[zoned], True)]
+    per_row = {}
+    for rows, zoned in groups:
+        if not len(rows):
+            continue
+        rows_list = rows.tolist()
+        c = {name: [values[i] for i in rows_list] if isinstance(values, list) else values[rows]
+             for name, values in cols.items()}
+        rec_cls, out = _result_columns(kind, c, _zone_table(c["zones"]) if zoned else None)
+        specs = entry_specs(kind, cols, rows_list)
+        panel = out["panel"].tolist() if "panel" in out else range(len(rows_list))
+        for j, rec in zip(panel, _records(rec_cls, out)):
+            per_row.setdefault(rows_list[j], []).append((rec, specs[j]))
+    return [pair for row in sorted(per_row) for pair in per_row[row]], errors
+
+
+def _zone_table(zones):
+    """batch.zone_layout's zone table for one tuple of zones per beam."""
+    import numpy as np
+    beam = np.repeat(np.arange(len(zones)), [len(z) for z in zones])
+    table = np.array([zone for z in zones for zone in z], dtype=np.float64).reshape(-1, 3)
+    return {"beam": beam, "start": table[:, 0], "end": table[:, 1], "spacing": table[:, 2]}
+
+
+def form_members(member, values, diameters):
+    """
+    Check a single-member form: values ({field: text}) are the form's fields,
+    diameters the cells of its diameter table, and each diameter row is one
+    member. Returns (the form's values parsed, [(d, quantity)]); raises
+    ValueError saying everything that is wrong, fields named as on the form.
+    """
+    rows = [i for i, d in enumerate(diameters["d"]) if d.strip()]
+    if not rows:
+        raise ValueError("Enter at least one bar diameter")
+    cells = {name: [text] * len(rows) for name, text in values.items()}
+    for name in DIAMETER_COLUMNS:
+        cells[name] = [diameters[name][i] for i in rows]
+    schema = SCHEMAS[member]
+    if QUANTITY not in schema.fields:
+        # stirrups: a schedule row has no quantity, the form's table does
+        schema = Schema(schema.fields + (QUANTITY,), schema.rules)
+    report = validate(schema, cells)
+    if report.failed():
+        messages = []
+        for row, name, message in report.errors():
+            label = report.schema.field(name).label
+            text = f"{label} in bar row {rows[row] + 1} {message}" if name in DIAMETER_COLUMNS else f"{label} {message}"
+            if text not in messages:
+                messages.append(text)
+        raise ValueError("; ".join(messages))
+    cols = report.columns
+    parsed = {name: cols[name][0] if isinstance(cols[name], list) else cols[name][0].item() for name in values}
+    return parsed, list(zip(cols["d"].tolist(), cols["quantity"].tolist()))
@@ -0,0 +1,391 @@
+"""
+The calculations, with no input or output.
+
+One function per member type takes a spec (the values the flows ask for,
+in mm) and returns the result record for it:
+
+    beam_bars(BeamSpec)         -> BarResult     top/bottom steel
+    cantilever_bars(CantileverSpec) -> BarResult
+    stirrups(StirrupSpec)       -> StirrupResult
+    zone_stirrups(StirrupZonesSpec) -> StirrupResult  spacing set zone by zone
+    one_way_slab(SlabSpec)      -> SlabResult
+    two_way_slab(TwoWaySlabSpec) -> [SlabResult]  one per bar set
+
+compute(spec) picks the function from the spec's type. The interactive
+flows, the GUI and the batch command all build specs and call these, so a
+script can do the same:
+
+    from calc import BeamSpec, beam_bars
+    bars = beam_bars(BeamSpec("Top beam", "B1", d=16, quantity=3, clear_span=4500))
+"""
+import math
+from dataclasses import dataclass
+
+from cuttingLen import bend_length, flow1, flow2, flow3, flow4, unit_weight
+from fixed import floor_kg, piece_grams
+from memo import memoize
+from profiling import timed
+from records import BarResult, StirrupResult, SlabResult
+
+
+@dataclass(slots=True)
+class BeamSpec:
+    """One diameter of top or bottom steel; num_supports picks the flow (2 -> flow1, 1 -> flow2, 0 -> flow3)."""
+    type: str
+    beam_num: str
+    d: float
+    quantity: int
+    clear_span: float
+    num_supports: int = 0
+    es_width1: float = 0.0
+    es_width2: float = 0.0
+    beam_depth1: float = 0.0
+    beam_depth2: float = 0.0
+
+
+@dataclass(slots=True)
+class CantileverSpec:
+    """One diameter of cantilever bars; a non-zero full_span is a bar running the whole span."""
+    beam_num: str
+    d: float
+    quantity: int
+    inner_span: float = 0.0
+    canti_span: float = 0.0
+    full_span: float = 0.0
+    type: str = "Cantilever"
+
+
+@dataclass(slots=True)
+class StirrupSpec:
+    """Stirrups of one beam; l4_spacing (with l2_spacing) means different spacing over L/4 and L/2."""
+    beam_num: str
+    d: float
+    stirrup_type: str       # "1", "2" or "3": two, four or six legged
+    clear_span: float
+    beam_width: float
+    beam_depth: float
+    spacing: float = 0.0
+    l4_spacing: float = 0.0
+    l2_spacing: float = 0.0
+
+
+@dataclass(slots=True)
+class StirrupZonesSpec:
+    """
+    Stirrups of one beam spaced zone by zone: zones are (start, end, spacing)
+    in mm from the left face. A negative start, or an end of 0 or less, is
+    measured back from the right face, so (0, 0, 150) is the whole span and
+    (-600, 0, 100) the last 600 mm.
+    """
+    beam_num: str
+    d: float
+    stirrup_type: str
+    clear_span: float
+    beam_width: float
+    beam_depth: float
+    zones: tuple = ()
+
+    def __post_init__(self):
+        # tuples, so the spec hashes (dedupe) whether the zones came from code or JSON
+        self.zones = tuple(tuple(float(v) for v in z) for z in self.zones)
+
+
+@dataclass(slots=True)
+class SlabSpec:
+    """One-way slab panel; quantity is the number of identical panels."""
+    d: float
+    x: float                # shorter span
+    y: float                # longer span
+    a: float                # adjacent spans
+    b: float
+    beam_width1: float
+    beam_width2: float
+    spacing_main: float
+    spacing_dist: float
+    quantity: int = 1
+
+
+def bar_result(type, beam_num, d, quantity, length, clear_span=0.0, bl1=0, bl2=0):
+    """BarResult for `quantity` bars of one cutting length."""
+    return BarResult(
+        type=type,
+        beam_num=beam_num,
+        d=d,
+        quantity=quantity,
+        length=length,
+        clear_span=clear_span,
+        bl1=bl1,
+        bl2=bl2,
+        ld=46 * d,
+        weight=unit_weight(d) * (quantity * length) / 1000,
+    )
+
+
+def beam_bars(spec):
+    d = spec.d
+    bl1 = bl2 = 0
+    if spec.num_supports == 2:
+        bl1 = bend_length(d, spec.es_width1, spec.beam_depth1)
+        bl2 = bend_length(d, spec.es_width2, spec.beam_depth2)
+        length = flow1(d, spec.clear_span, spec.es_width1, spec.es_width2, bl1, bl2)
+    elif spec.num_supports == 1:
+        bl1 = bend_length(d, spec.es_width1, spec.beam_depth1)
+        length = flow2(d, spec.clear_span, spec.es_width1, 0, bl1)
+    else:
+        length = flow3(d, spec.clear_span)
+    return bar_result(spec.type, spec.beam_num, d, spec.quantity, length, spec.clear_span, bl1, bl2)
+
+
+def cantilever_bars(spec):
+    length = spec.full_span if spec.full_span else flow4(spec.inner_span, spec.canti_span)
+    return bar_result(spec.type, spec.beam_num, spec.d, spec.quantity, length)
+
+
+def stirrup_type_name(type_stirrup):
+    return "Two legged" if type_stirrup == "1" else "4 legged" if type_stirrup == "2"  else "6 legged"
+
+
+@memoize()
+def stirrup_cutting_length(type_stirrup, beam_width, beam_depth, d):
+    """Cutting length of one stirrup and its weight (in whole g) for a 1/2/3 (two/four/six legged) stirrup."""
+    if type_stirrup == "1":
+        a = beam_width
+        b = beam_depth
+        cutting_len = 2*a + 2*b + 20*d - 6*d - 80
+    elif type_stirrup == "2":
+        a = beam_depth
+        b = beam_width
+        cutting_len = math.floor(4*a + 2*b +2*(b/3) +16*d - 80)
+    else:
+        a = beam_depth
+        b = beam_width
+        cutting_len = math.floor(6*a + 2*b + 4*b/5 + 24*d - 80)
+    return cutting_len, piece_grams(unit_weight(d)*cutting_len)
+
+
+def stirrups(spec):
+    cutting_len, weight_bar = stirrup_cutting_length(spec.stirrup_type, spec.beam_width, spec.beam_depth, spec.d)
+    if spec.l4_spacing:
+        num_l4 = math.floor((spec.clear_span/4) / spec.l4_spacing + 1)      # at each end
+        num_l2 = math.floor((spec.clear_span/2) / spec.l2_spacing + 1)
+        return StirrupResult(
+            type=stirrup_type_name(spec.stirrup_type),
+            beam_num=spec.beam_num,
+            d=spec.d,
+            spacing_type="diff",
+            cutting_len=cutting_len,
+            total_weight=floor_kg(weight_bar*num_l2 + weight_bar*num_l4*2),
+            num_stirrups=2*num_l4 + num_l2,
+            num_l4=num_l4,
+            num_l2=num_l2,
+        )
+    num_stirrups = math.floor(spec.clear_span/spec.spacing)
+    return StirrupResult(
+        type=stirrup_type_name(spec.stirrup_type),
+        beam_num=spec.beam_num,
+        d=spec.d,
+        spacing_type="uniform",
+        cutting_len=cutting_len,
+        total_weight=floor_kg(num_stirrups*weight_bar),
+        num_stirrups=num_stirrups,
+    )
+
+
+def zone_layout(zones, clear_span):
+    """
+    The zones a beam's stirrups are laid out in, left to right and not
+    overlapping: [(start, end, spacing)]. Where zones overlap the closer
+    spacing governs (on a tie the zone starting first, then the longer one),
+    and a zone cut by a closer one carries on past it. Parts outside the
+    clear span are dropped.
+    """
+    spans = []
+    for start, end, spacing in zones:
+        start = start + clear_span if start < 0 else start
+        end = end + clear_span if end <= 0 else end
+        start, end = max(start, 0), min(end, clear_span)
+        if end > start:
+            spans.append((start, end, spacing))
+    points = sorted({p for start, end, _ in spans for p in (start, end)})
+    runs = []
+    for a, b in zip(points, points[1:]):
+        covering = [(spacing, start, -end, k) for k, (start, end, spacing) in enumerate(spans)
+                    if start <= a and b <= end]
+        if not covering:
+            continue        # a gap between zones has no stirrups
+        spacing, _, _, k = min(covering)
+        if runs and runs[-1][1] == a and runs[-1][3] == k:
+            runs[-1][1] = b
+        else:
+            runs.append([a, b, spacing, k])
+    return [(a, b, spacing) for a, b, spacing, _ in runs]
+
+
+def zone_count(start, end, spacing):
+    """Stirrups in one zone, one at each end: floor(length/spacing + 1), as over L/4 and L/2."""
+    return math.floor((end - start) / spacing + 1)
+
+
+def stirrup_zones(spec):
+    """
+    The zone table of a StirrupSpec, for which zone_stirrups gives its count
+    and weight: L/4, L/2, L/4 for different spacing, and for uniform spacing
+    one zone starting a spacing in from the face (floor(L/spacing) stirrups).
+    """
+    L = spec.clear_span
+    if spec.l4_spacing:
+        return ((0, L/4, spec.l4_spacing), (L/4, 3*L/4, spec.l2_spacing), (3*L/4, L, spec.l4_spacing))
+    return ((spec.spacing, L, spec.spacing),)
+
+
+def zone_stirrups(spec):
+    cutting_len, weight_bar = stirrup_cutting_length(spec.stirrup_type, spec.beam_width, spec.beam_depth, spec.d)
+    num_stirrups = sum(zone_count(*z) for z in zone_layout(spec.zones, spec.clear_span))
+    return StirrupResult(
+        type=stirrup_type_name(spec.stirrup_type),
+        beam_num=spec.beam_num,
+        d=spec.d,
+        spacing_type="zones",
+        cutting_len=cutting_len,
+        total_weight=floor_kg(num_stirrups*weight_bar),
+        num_stirrups=num_stirrups,
+    )
+
+
+def parse_zones(text):
+    """Zones written as start:end@spacing, separated by spaces or semicolons: "0:600@100 600:-600@150"."""
+    zones = []
+    for part in text.replace(";", " ").split():
+        span, sep, spacing = part.partition("@")
+        start, colon, end = span.partition(":")
+        if not sep or not colon:
+            raise ValueError(f"bad zone {part!r}: expected start:end@spacing")
+        zones.append((float(start), float(end), float(spacing)))
+    return tuple(zones)
+
+
+def zones_text(zones):
+    """Zones written the way parse_zones reads them."""
+    return " ".join(f"{start:g}:{end:g}@{spacing:g}" for start, end, spacing in zones)
+
+
+def one_way_slab(spec):
+    num_main_bars = math.floor((spec.y / spec.spacing_main) + 1) * spec.quantity
+    num_dist_bars = math.floor((spec.x / spec.spacing_dist) + 1) * spec.quantity
+
+    # cutting lengths (m)
+    l1 = ((spec.x + spec.beam_width1 + spec.beam_width2 + spec.a / 4)/1000)
+    l2 = ((spec.x + spec.beam_width1 + spec.beam_width2 + spec.b / 4)/1000)
+
+    weight1 = math.floor((num_main_bars / 2) * l1 * unit_weight(spec.d))
+    weight2 = math.floor((num_main_bars - num_main_bars / 2) * l2 * unit_weight(spec.d))
+    return SlabResult(
+        type="One-way",
+        d=spec.d,
+        main_bars=num_main_bars,
+        dist_bars=num_dist_bars,
+        cutting_len1=l1,
+        cutting_len2=l2,
+        total_weight=weight1 + weight2,
+        quantity=spec.quantity,
+    )
+
+
+@dataclass(slots=True)
+class TwoWaySlabSpec:
+    """
+    Two-way slab panel spanning x (short) by y (long).
+
+    a/b are the neighbouring spans past the supports (beam widths 1/2) at the
+    ends of the short-span bars, a2/b2 those at the ends of the long-span bars
+    (beam widths 3/4); 0 means a discontinuous edge. spacing_edge is for the
+    edge strips, 0 meaning the same as the middle strip.
+    """
+    d: float
+    x: float
+    y: float
+    a: float
+    b: float
+    a2: float
+    b2: float
+    beam_width1: float
+    beam_width2: float
+    beam_width3: float
+    beam_width4: float
+    spacing_short: float
+    spacing_long: float
+    spacing_edge: float = 0.0
+    quantity: int = 1
+
+
+TWO_WAY_TYPES = ("Two-way short", "Two-way long", "Two-way short top", "Two-way long top")
+
+
+def strip_bars(width, spacing, spacing_edge):
+    """Bars across a strip `width` wide: the middle 3/4 at spacing, the two edge 1/8s at spacing_edge."""
+    return math.floor(0.75 * width / spacing) + 1 + 2 * math.floor(0.125 * width / (spacing_edge or spacing))
+
+
+def _slab_weight(n, l1, l2, d):
+    # half the bars at each cutting length, as in a one-way slab
+    return math.floor((n / 2) * l1 * unit_weight(d)) + math.floor((n - n / 2) * l2 * unit_weight(d))
+
+
+def two_way_slab(spec):
+    """
+    Reinforcement of a two-way slab panel: one SlabResult per bar set.
+
+    Bottom bars run each way, with alternate bars cranked into the neighbouring
+    span by a quarter of it, like one-way main bars. Over every continuous edge
+    extra top bars - half as many as the bottom bars that way - reach a quarter
+    span into the panel and into the neighbour. Bar sets with no bars (the top
+    bars of a panel with no continuous edge that way) are left out.
+    """
+    rows = []
+    for kind, span, across, w1, w2, n1, n2, spacing in (
+            (0, spec.x, spec.y, spec.beam_width1, spec.beam_width2, spec.a, spec.b, spec.spacing_short),
+            (1, spec.y, spec.x, spec.beam_width3, spec.beam_width4, spec.a2, spec.b2, spec.spacing_long)):
+        n = strip_bars(across, spacing, spec.spacing_edge) * spec.quantity
+        l1 = (span + w1 + w2 + n1 / 4) / 1000
+        l2 = (span + w1 + w2 + n2 / 4) / 1000
+        rows.append((kind, n, l1, l2))
+
+        edges = (n1 > 0) + (n2 > 0)
+        top1 = (span / 4 + w1 + n1 / 4) / 1000
+        top2 = (span / 4 + w2 + n2 / 4) / 1000
+        rows.append((kind + 2, n // 2 * edges, top1 if n1 > 0 else top2, top2 if n2 > 0 else top1))
+    rows.sort(key=lambda r: r[0])
+    return [SlabResult(type=TWO_WAY_TYPES[kind], d=spec.d, main_bars=n, dist_bars=0, cutting_len1=l1,
+                       cutting_len2=l2, total_weight=_slab_weight(n, l1, l2, spec.d), quantity=spec.quantity)
+            for kind, n, l1, l2 in rows if n > 0]
+
+
+def two_way_slabs(specs):
+    """two_way_slab for a whole floor of panels in one vectorized pass (see batch.two_way_slab_columns)."""
+    import numpy as np
+    from batch import two_way_slab_columns
+    from dataclasses import fields
+    specs = list(specs)
+    if not specs:
+        return []
+    cols = {f.name: np.array([getattr(s, f.name) for s in specs], dtype=np.int64 if f.type is int else np.float64)
+            for f in fields(TwoWaySlabSpec)}
+    out = two_way_slab_columns(cols)
+    names = [f.name for f in fields(SlabResult)]
+    return [SlabResult(*row) for row in zip(*[out[n] if isinstance(out[n], list) else out[n].tolist() for n in names])]
+
+
+CALCULATIONS = {
+    BeamSpec: beam_bars,
+    CantileverSpec: cantilever_bars,
+    StirrupSpec: stirrups,
+    StirrupZonesSpec: zone_stirrups,
+    SlabSpec: one_way_slab,
+    TwoWaySlabSpec: two_way_slab,
+}
+
+
+@timed("calc")
+def compute(spec):
+    """The result record for any of the spec types above (a list of them for a two-way slab)."""
+    return CALCULATIONS[type(spec)](spec)
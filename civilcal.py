@@ -0,0 +1,518 @@
+"""
+Command line entry point for non-interactive runs.
+
+    python -m civilcal batch schedule.csv -o out/ [--plan ffd|bfd|exact]
+    python -m civilcal validate schedule.csv [-o errors.csv]
+    python -m civilcal floor grid.json -o out/
+    python -m civilcal serve [--port 8765]
+
+The schedule is a CSV file with one member per row. The `member` column picks
+the calculation (top, bottom, cantilever, stirrup, slab, twoway); the other columns
+are the same values the interactive flows ask for, in mm. Blank cells count
+as 0. Rows are read and checked a few thousand at a time, then computed and
+written one at a time, so only the per-diameter totals are kept in memory
+however long the schedule is.
+
+Columns used per member:
+    top/bottom:  beam_num, d, quantity, clear_span, num_supports (0/1/2),
+                 es_width1, es_width2, beam_depth1, beam_depth2
+    cantilever:  beam_num, d, quantity, inner_span, canti_span
+                 (or full_span for bars running to the dead end)
+    stirrup:     beam_num, d, stirrup_type (1/2/3), clear_span, beam_width,
+                 beam_depth, spacing or l4_spacing + l2_spacing, or zones as
+                 start:end@spacing ... ("0:600@100 0:0@150 -600:0@100")
+    slab:        d, quantity, x, y, a, b, beam_width1, beam_width2, spacing_main,
+                 spacing_dist
+    twoway:      d, quantity, x, y, a, b, a2, b2, beam_width1..beam_width4,
+                 spacing_short, spacing_long, spacing_edge (a two-way slab: a row
+                 per bar set)
+
+With --plan the pieces of each diameter are also packed into stock bars
+(--stock-length, 12000 mm by default) and the plan is written to
+cutting_plan.csv and cutting_patterns.csv. Only a count per distinct piece
+length is kept for this. With --dedupe, rows that differ only in beam number
+are computed once and written as one row with the quantities multiplied and
+the beam numbers listed.
+
+Every row is checked first (validation.py: numbers where numbers go, spans
+and spacings > 0, support widths for the supports given, ...) and a row at
+fault is skipped with what is wrong with it, field by field; --no-validate
+leaves only the formulas' own errors. `validate` runs the checks alone and
+lists every problem, with -o as a CSV file (line, member, field, message).
+
+--profile PATH on any command times its stages and writes a report (see
+profiling.py).
+
+Totals are summed exactly, in tenths of a mm and grams (see fixed.py); each
+result keeps the float its formula gives. Stirrup weights are floored to
+whole grams per stirrup for every leg count. Two-legged stirrups used not to
+be floored, so their total_weight can now come out 1 kg lower than in
+earlier versions (about 1 row in 70).
+
+`floor` expands a grid of column lines into every beam bar, stirrup and slab
+panel of the floor (see floor_grid.py for the file) and writes the same
+bars/stirrups/slabs CSV files and diameter totals.
+"""
+import argparse
+import contextlib
+import csv
+import itertools
+import os
+import sys
+from collections import Counter
+from dataclasses import fields
+
+from calc import (BeamSpec, CantileverSpec, StirrupSpec, StirrupZonesSpec, SlabSpec, TwoWaySlabSpec, compute,
+                  parse_zones)
+from dedupe import MemberSchedule
+import fixed
+import memo
+import profiling
+import validation
+from records import (RECORD_TYPES, BarResult, StirrupResult, SlabResult, DiameterTotals, TOTALS_HEADERS,
+                     record_row, record_units)
+from cutting_plan import STOCK_LENGTH, METHODS, PLAN_HEADERS, add_pieces, plan_diameter, plan_rows
+
+MEMBER_TYPES = {"top": "Top beam", "bottom": "Bottom beam", "cantilever": "Cantilever"}
+SUMMARY_FIELDS = ["member", "d", "rows", "bars", "total_length_m", "weight_kg"]
+VALIDATE_ROWS = 10_000      # schedule rows read and checked together in a batch run
+CHECK_ROWS = 100_000        # ... and by the validate command, which keeps only the errors
+
+
+def num(row, key, type_func=float):
+    """The number in a cell, 0 if blank; an int cell may be written as a float, as validate() allows ("2.0")."""
+    value = (row.get(key) or "").strip()
+    if not value:
+        return type_func(0)
+    if type_func is int:
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f"{key} must be a whole number")
+        return int(number)
+    return type_func(value)
+
+
+def bar_spec(row):
+    member = row["member"]
+    d = num(row, "d")
+    qty = num(row, "quantity", int) or 1
+    beam_num = row.get("beam_num", "")
+    if member == "cantilever":
+        return CantileverSpec(beam_num, d, qty, num(row, "inner_span"), num(row, "canti_span"),
+                              num(row, "full_span"), type=MEMBER_TYPES[member])
+    return BeamSpec(MEMBER_TYPES[member], beam_num, d, qty, num(row, "clear_span"),
+                    num(row, "num_supports", int), num(row, "es_width1"), num(row, "es_width2"),
+                    num(row, "beam_depth1"), num(row, "beam_depth2"))
+
+
+def stirrup_spec(row):
+    zones = (row.get("zones") or "").strip()
+    if zones:
+        return StirrupZonesSpec(row.get("beam_num", ""), num(row, "d"), (row.get("stirrup_type") or "1").strip(),
+                                num(row, "clear_span"), num(row, "beam_width"), num(row, "beam_depth"),
+                                parse_zones(zones))
+    return StirrupSpec(row.get("beam_num", ""), num(row, "d"), (row.get("stirrup_type") or "1").strip(),
+                       num(row, "clear_span"), num(row, "beam_width"), num(row, "beam_depth"),
+                       num(row, "spacing"), num(row, "l4_spacing"), num(row, "l2_spacing"))
+
+
+def slab_spec(row):
+    return SlabSpec(num(row, "d"), num(row, "x"), num(row, "y"), num(row, "a"), num(row, "b"),
+                    num(row, "beam_width1"), num(row, "beam_width2"),
+                    num(row, "spacing_main"), num(row, "spacing_dist"), num(row, "quantity", int) or 1)
+
+
+def two_way_spec(row):
+    return TwoWaySlabSpec(num(row, "d"), num(row, "x"), num(row, "y"), num(row, "a"), num(row, "b"),
+                          num(row, "a2"), num(row, "b2"), num(row, "beam_width1"), num(row, "beam_width2"),
+                          num(row, "beam_width3"), num(row, "beam_width4"), num(row, "spacing_short"),
+                          num(row, "spacing_long"), num(row, "spacing_edge"), num(row, "quantity", int) or 1)
+
+
+def row_spec(member, row):
+    """The calc spec for one schedule row."""
+    if member in MEMBER_TYPES:
+        return bar_spec(row)
+    if member == "stirrup":
+        return stirrup_spec(row)
+    if member == "slab":
+        return slab_spec(row)
+    if member == "twoway":
+        return two_way_spec(row)
+    raise ValueError(f"unknown member {member!r}")
+
+
+OUTPUTS = [("bars.csv", BarResult), ("stirrups.csv", StirrupResult), ("slabs.csv", SlabResult)]
+
+
+class BatchTotals:
+    """Totals of a batch run: per (member, diameter), per diameter, and the piece counts for --plan."""
+    def __init__(self, plan=False):
+        self.by_member = {}                 # (member, d) -> [rows, bars, length units, weight units]
+        self.by_diameter = DiameterTotals()
+        self.pieces = {} if plan else None  # d -> Counter(length mm -> count)
+
+    def members(self):
+        """{(member, d): (rows, bars, length_m, weight_kg)}, sorted."""
+        return {key: (rows, bars, fixed.mm(length) / 1000, fixed.kg(weight))
+                for key, (rows, bars, length, weight) in sorted(self.by_member.items())}
+
+    def add(self, member, res, rows=1):
+        """rows is 0 for the second and later results of one schedule row (a two-way slab's bar sets)."""
+        bars, length, weight = record_units(res)
+        t = self.by_member.setdefault((member, res.d), [0, 0, 0, 0])
+        t[0] += rows
+        t[1] += bars
+        t[2] += length
+        t[3] += weight
+        self.by_diameter.add(res)
+        if self.pieces is not None:
+            add_pieces(self.pieces, res)
+
+    def merge(self, other):
+        """Add another run's totals (e.g. one chunk of a parallel run) to these."""
+        for key, (rows, bars, length, weight) in other.by_member.items():
+            t = self.by_member.setdefault(key, [0, 0, 0, 0])
+            t[0] += rows
+            t[1] += bars
+            t[2] += length
+            t[3] += weight
+        self.by_diameter.merge(other.by_diameter)
+        if self.pieces is not None:
+            for d, counts in other.pieces.items():
+                self.pieces.setdefault(d, Counter()).update(counts)
+
+
+def _write(writers, totals, member, res, rows=1):
+    # a two-way slab gives a list of bar sets; its rows count once
+    for i, r in enumerate(res if isinstance(res, list) else [res]):
+        writers[RECORD_TYPES.index(type(r))].writerow(record_row(r))
+        totals.add(member, r, rows=rows if i == 0 else 0)
+
+
+def _member(row):
+    member = (row.get("member") or "").strip().lower()
+    row["member"] = member
+    return member
+
+
+def check_rows(members, cells_of):
+    """
+    validation.validate() over rows of mixed member types: members is each
+    row's member, cells_of(name, rows) the text of column `name` in those
+    rows. Returns [(row, field, message)] by row.
+    """
+    groups = {}
+    for i, member in enumerate(members):
+        groups.setdefault(member, []).append(i)
+    errors = []
+    for member, rows in groups.items():
+        if member not in validation.SCHEMAS:
+            errors.extend((i, "member", f"must be one of {', '.join(validation.SCHEMAS)}") for i in rows)
+            continue
+        report = validation.validate(member, {name: cells_of(name, rows) for name in validation.SCHEMAS[member].names()})
+        errors.extend((rows[r], field, message) for r, field, message in report.errors())
+    errors.sort(key=lambda e: e[0])
+    return errors
+
+
+def checked_rows(reader, report, line_base=0):
+    """
+    (line number, member, row) for the rows of a csv.DictReader that pass
+    validation, checked VALIDATE_ROWS at a time; what is wrong with the
+    others goes to report(line number, message).
+    """
+    while True:
+        chunk = [(line_base + reader.line_num, _member(row), row) for row in itertools.islice(reader, VALIDATE_ROWS)]
+        if not chunk:
+            return
+        problems = {}
+        for i, field, message in check_rows([member for _, member, _ in chunk],
+                                            lambda name, rows: [chunk[i][2].get(name) or "" for i in rows]):
+            problems.setdefault(i, []).append(f"{field} {message}")
+        for i, (line_no, member, row) in enumerate(chunk):
+            if i in problems:
+                report(line_no, "; ".join(problems[i]))
+            else:
+                yield line_no, member, row
+
+
+def _rows(reader, report, line_base, validate):
+    if validate:
+        return checked_rows(reader, report, line_base)
+    return ((line_base + reader.line_num, _member(row), row) for row in reader)
+
+
+def compute_rows(reader, writers, totals, report, line_base=0, validate=True):
+    """
+    Compute every row of a csv.DictReader, writing results to writers
+    (bars, stirrups, slabs) and adding them to totals. Rows that fail
+    validation (unless validate is False) or the formulas are passed to
+    report(line number, error). Returns how many were skipped.
+    """
+    skipped = 0
+
+    def skip(line_no, error):
+        nonlocal skipped
+        skipped += 1
+        report(line_no, error)
+
+    for line_no, member, row in _rows(reader, skip, line_base, validate):
+        try:
+            res = compute(row_spec(member, row))
+        except (ValueError, ZeroDivisionError) as e:
+            skip(line_no, e)
+            continue
+        _write(writers, totals, member, res)
+    profiling.count("batch.skipped", skipped)
+    return skipped
+
+
+def compute_rows_grouped(reader, writers, totals, report, line_base=0, validate=True):
+    """
+    compute_rows for schedules with many identical members: rows that differ
+    only in beam number are computed once and written as one row at the end,
+    quantities multiplied and every beam number listed (see dedupe.py).
+    """
+    schedule = MemberSchedule()
+    members = {}
+    skipped = 0
+
+    def skip(line_no, error):
+        nonlocal skipped
+        skipped += 1
+        report(line_no, error)
+
+    for line_no, member, row in _rows(reader, skip, line_base, validate):
+        try:
+            group = schedule.add(row_spec(member, row))
+        except (ValueError, ZeroDivisionError) as e:
+            skip(line_no, e)
+            continue
+        members.setdefault(id(group), member)
+    for group in schedule.groups:
+        _write(writers, totals, members[id(group)], group.records(), rows=group.count)
+    profiling.count("batch.skipped", skipped)
+    profiling.count("batch.distinct_members", len(schedule))
+    return skipped
+
+
+def run_batch(schedule, out_dir, plan=None, stock_length=STOCK_LENGTH, jobs=1, dedupe=False, validate=True):
+    """
+    Stream `schedule` row by row into CSV files under `out_dir`.
+
+    Returns the per (member, diameter) totals, the project totals per diameter
+    (a DiameterTotals) and the number of rows skipped. With `plan` set to a
+    cutting_plan method the cutting plan files are written too. jobs > 1 (or
+    0 for every core) computes the schedule in chunks on a process pool; see
+    parallel.py. dedupe writes identical members as one row (compute_rows_grouped)
+    and always runs in this process. Rows that fail validation.py's checks
+    are skipped before they are computed, unless validate is False.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with profiling.span("batch.schedule"):
+        if jobs != 1 and not dedupe:
+            from parallel import run_batch_parallel
+            totals, skipped = run_batch_parallel(schedule, out_dir, plan, jobs, validate)
+        else:
+            totals = BatchTotals(plan=bool(plan))
+            with open(schedule, newline="", encoding="utf-8-sig") as src, contextlib.ExitStack() as stack:
+                writers = []
+                for name, cls in OUTPUTS:
+                    writer = csv.writer(stack.enter_context(open(os.path.join(out_dir, name), "w", newline="", encoding="utf-8")))
+                    writer.writerow([f.name for f in fields(cls)])
+                    writers.append(writer)
+                rows = compute_rows_grouped if dedupe else compute_rows
+                skipped = rows(csv.DictReader(src), writers, totals,
+                               lambda line_no, e: print(f"{schedule}:{line_no}: skipped ({e})", file=sys.stderr),
+                               validate=validate)
+
+    profiling.count("batch.rows", sum(t[0] for t in totals.by_member.values()))
+    with profiling.span("batch.totals"):
+        with open(os.path.join(out_dir, "summary.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(SUMMARY_FIELDS)
+            for (member, d), (rows, bars, length_m, weight) in totals.members().items():
+                writer.writerow([member, d, rows, bars, f"{length_m:.3f}", f"{weight:.3f}"])
+
+        with open(os.path.join(out_dir, "diameter_totals.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(TOTALS_HEADERS)
+            writer.writerows(totals.by_diameter.table())
+
+    if plan:
+        with profiling.span("batch.plan"):
+            write_cutting_plan(totals.pieces, out_dir, plan, stock_length)
+
+    return totals.members(), totals.by_diameter, skipped
+
+
+def validate_schedule(schedule, out=None):
+    """
+    Check every row of `schedule` without computing it, CHECK_ROWS rows at a
+    time. With `out` every cell at fault is written to it as a CSV row (line,
+    member, field, message). Returns (rows checked, rows at fault,
+    {(member, field, message): rows}).
+    """
+    counts = {}
+    checked = failed = 0
+    with open(schedule, newline="", encoding="utf-8-sig") as src, contextlib.ExitStack() as stack:
+        errors_w = None
+        if out:
+            errors_w = csv.writer(stack.enter_context(open(out, "w", newline="", encoding="utf-8")))
+            errors_w.writerow(["line", "member", "field", "message"])
+        reader = csv.reader(src)
+        index = {name.strip(): i for i, name in enumerate(next(reader, []))}
+        while True:
+            lines, rows = [], []
+            for row in itertools.islice(reader, CHECK_ROWS):
+                lines.append(reader.line_num)
+                rows.append(row)
+            if not rows:
+                break
+            columns = {}
+
+            def column(name):
+                if name not in columns:
+                    col = index.get(name, len(index))
+                    columns[name] = [row[col] if col < len(row) else "" for row in rows]
+                return columns[name]
+
+            def cells_of(name, which):
+                values = column(name)
+                return values if len(which) == len(values) else [values[i] for i in which]
+
+            members = [member.strip().lower() for member in column("member")]
+
+            errors = check_rows(members, cells_of)
+            checked += len(rows)
+            failed += len({i for i, _, _ in errors})
+            for i, field, message in errors:
+                key = (members[i], field, message)
+                counts[key] = counts.get(key, 0) + 1
+            if errors_w:
+                errors_w.writerows((lines[i], members[i], field, message) for i, field, message in errors)
+    return checked, failed, counts
+
+
+def run_floor(grid_file, out_dir, dedupe=False):
+    """Compute the floors in a grid file into out_dir; returns the ResultStore."""
+    from floor_grid import compute_floors, load_floors
+    with profiling.span("floor.compute"):
+        store = compute_floors(load_floors(grid_file), dedupe=dedupe)
+    os.makedirs(out_dir, exist_ok=True)
+    with profiling.span("floor.write"):
+        for name, cls in OUTPUTS:
+            table = store.table(cls)
+            with open(os.path.join(out_dir, name), "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(table.names)
+                writer.writerows(zip(*(table.column(n) for n in table.names)))
+        with open(os.path.join(out_dir, "diameter_totals.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(TOTALS_HEADERS)
+            writer.writerows(store.totals.table())
+    profiling.count("floor.results", len(store))
+    return store
+
+
+def write_cutting_plan(pieces, out_dir, method, stock_length):
+    with open(os.path.join(out_dir, "cutting_plan.csv"), "w", newline="", encoding="utf-8") as plan_f, \
+            open(os.path.join(out_dir, "cutting_patterns.csv"), "w", newline="", encoding="utf-8") as patterns_f:
+        plan_w = csv.writer(plan_f)
+        patterns_w = csv.writer(patterns_f)
+        plan_w.writerow(PLAN_HEADERS)
+        patterns_w.writerow(["d", "stock_bars", "pieces_mm", "offcut_mm"])
+        for d in sorted(pieces):
+            p = plan_diameter(d, pieces[d], stock_length, method)
+            plan_w.writerows(plan_rows([p]))
+            if p.full_bars:
+                patterns_w.writerow([d, p.full_bars, stock_length, 0])
+            for pattern, count in p.patterns():
+                patterns_w.writerow([d, count, "+".join(map(str, pattern)), stock_length - sum(pattern)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="civilcal", description="Cutting Length Calculator")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--profile", metavar="PATH[,cprofile][,tracemalloc]",
+                        help="time the stages of the run and write a report to PATH (see profiling.py)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    batch_p = sub.add_parser("batch", parents=[common], help="compute a whole bar schedule from a CSV file")
+    batch_p.add_argument("schedule", help="CSV file with one member per row")
+    batch_p.add_argument("-o", "--out", default="out", help="output directory (default: out)")
+    batch_p.add_argument("--plan", choices=METHODS, help="also plan cutting from stock bars with this method")
+    batch_p.add_argument("-j", "--jobs", type=int, default=1, help="worker processes (0: one per core; default: 1)")
+    batch_p.add_argument("--no-cache", action="store_true", help="recompute every formula instead of caching repeated inputs")
+    batch_p.add_argument("--cache-stats", action="store_true", help="print formula cache hits and misses")
+    batch_p.add_argument("--dedupe", action="store_true",
+                         help="compute members that differ only in beam number once, as one row listing the beams")
+    batch_p.add_argument("--stock-length", type=int, default=STOCK_LENGTH, help=f"stock bar length in mm (default: {STOCK_LENGTH})")
+    batch_p.add_argument("--no-validate", action="store_true",
+                         help="compute rows without checking them first (only rows the formulas fail on are skipped)")
+    validate_p = sub.add_parser("validate", parents=[common], help="check every row of a schedule without computing it")
+    validate_p.add_argument("schedule", help="CSV file with one member per row")
+    validate_p.add_argument("-o", "--out", help="write every problem (line, member, field, message) to this CSV file")
+    floor_p = sub.add_parser("floor", parents=[common], help="generate and compute whole floors from a column grid (see floor_grid.py)")
+    floor_p.add_argument("grid", help="JSON file with the grid")
+    floor_p.add_argument("-o", "--out", default="out", help="output directory (default: out)")
+    floor_p.add_argument("--dedupe", action="store_true", help="one row per kind of beam bay and slab panel")
+    serve_p = sub.add_parser("serve", parents=[common], help="answer calculations over HTTP/JSON (see service.py)")
+    serve_p.add_argument("--host", default="127.0.0.1")
+    serve_p.add_argument("--port", type=int, default=8765)
+    serve_p.add_argument("--window-ms", type=float, default=1.0, help="how long a batch waits for more requests (default: 1)")
+    serve_p.add_argument("--max-batch", type=int, default=100_000, help="members that close a batch early (default: 100000)")
+    args = parser.parse_args(argv)
+    if args.profile:
+        try:
+            profiling.enable(args.profile)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.command == "serve":
+        from service import run
+        run(args.host, args.port, args.window_ms / 1000, args.max_batch)
+        return 0
+
+    if args.command == "floor":
+        try:
+            store = run_floor(args.grid, args.out, args.dedupe)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"{args.grid}: {e}", file=sys.stderr)
+            return 2
+        print(f"{len(store)} results computed. Results written to {args.out}")
+        for d, (_, pieces, length_mm, weight) in store.totals.items():
+            print(f"  dia {d:>5g}: {pieces} bars, {length_mm / 1000:.2f} m, {weight:.2f} kg")
+        _, _, length_mm, weight = store.totals.grand_total()
+        print(f"  all {len(store.totals)} diameters: {length_mm / 1000:.2f} m, {weight:.2f} kg ({weight / 1000:.3f} t)")
+        return 0
+
+    if args.command == "validate":
+        try:
+            checked, failed, counts = validate_schedule(args.schedule, args.out)
+        except OSError as e:
+            print(f"{args.schedule}: {e}", file=sys.stderr)
+            return 2
+        print(f"{checked} rows checked, {failed} with problems." + (f" Problems written to {args.out}" if args.out else ""))
+        for (member, field, message), rows in sorted(counts.items()):
+            print(f"  {member or '(blank)':<10} {field} {message}: {rows} rows")
+        return 1 if failed else 0
+
+    if args.command == "batch":
+        if args.no_cache:
+            memo.set_enabled(False)
+        totals, by_diameter, skipped = run_batch(args.schedule, args.out, args.plan, args.stock_length, args.jobs,
+                                              args.dedupe, not args.no_validate)
+        rows = sum(t[0] for t in totals.values())
+        print(f"{rows} rows computed, {skipped} skipped. Results written to {args.out}")
+        for (member, d), (_, bars, length_m, weight) in sorted(totals.items()):
+            print(f"  {member:<10} dia {d:>5g}: {bars} bars, {length_m:.2f} m, {weight:.2f} kg")
+        _, _, length_mm, weight = by_diameter.grand_total()
+        print(f"  {'all':<10} {len(by_diameter)} diameters: {length_mm / 1000:.2f} m, {weight:.2f} kg ({weight / 1000:.3f} t)")
+        if args.cache_stats:
+            print(f"Formula cache: {memo.format_stats()}")
+        return 1 if skipped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,3 +25,7 @@ def flow3(d, clear_span):
 
 def flow4(inner_span, canti_span):
     return inner_span / 3 + canti_span
+
+def unit_weight(d):
+    """Weight of a d mm bar in kg per metre (= g per mm)."""
+    return d * d / 162
@@ -0,0 +1,233 @@
+"""
+Cutting plans: how to cut the bars of one diameter from stock lengths.
+
+Pieces are whole millimetres. Three ways to pack them:
+
+    ffd    first-fit decreasing; a max segment tree over the stock bars finds
+           the first bar with room in O(log n) per piece
+    bfd    best-fit decreasing; the remaining lengths of the open bars are a
+           sorted multiset, so the tightest bar is one bisect away
+    exact  branch and bound for groups of up to EXACT_MAX_PIECES pieces,
+           best-fit for anything bigger
+
+A piece longer than the stock takes whole stock bars for all but its last
+part, which is packed like any other piece (laps are not added).
+"""
+import math
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass, field
+from records import BarResult, StirrupResult
+
+STOCK_LENGTH = 12000        # mm
+EXACT_MAX_PIECES = 24
+EXACT_MAX_NODES = 200000
+METHODS = ("ffd", "bfd", "exact")
+
+
+@dataclass(slots=True)
+class CuttingPlan:
+    d: float
+    stock_length: int
+    method: str
+    bars: list = field(default_factory=list)    # piece lengths (mm) cut from each stock bar
+    full_bars: int = 0                          # stock bars used whole by over-length pieces
+    pieces: int = 0
+
+    @property
+    def stock_bars(self):
+        return len(self.bars) + self.full_bars
+
+    def offcuts(self):
+        return [self.stock_length - sum(bar) for bar in self.bars]
+
+    @property
+    def waste_mm(self):
+        return sum(self.offcuts())
+
+    @property
+    def waste_pct(self):
+        total = self.stock_bars * self.stock_length
+        return 100 * self.waste_mm / total if total else 0.0
+
+    def patterns(self):
+        """[(pieces of one bar, how many bars are cut that way)], most common first."""
+        return Counter(tuple(bar) for bar in self.bars).most_common()
+
+
+def record_pieces(rec):
+    """Lengths (mm) of the bars one result asks for, as [(length, count)]."""
+    if isinstance(rec, BarResult):
+        return [(rec.length, rec.quantity)]
+    if isinstance(rec, StirrupResult):
+        return [(rec.cutting_len, rec.num_stirrups)]
+    half = rec.main_bars // 2
+    return [(rec.cutting_len1 * 1000, half), (rec.cutting_len2 * 1000, rec.main_bars - half)]
+
+
+def add_pieces(pieces, rec):
+    """Count the bars of one result into pieces, {d: Counter(length mm -> count)}."""
+    counts = pieces.get(rec.d)
+    if counts is None:
+        counts = pieces[rec.d] = Counter()
+    for length, count in record_pieces(rec):
+        if count > 0 and length > 0:
+            counts[math.ceil(round(length, 6))] += count
+
+
+def pieces_by_diameter(results):
+    """{d: Counter(length mm -> count)} over all results."""
+    out = {}
+    for rec in results:
+        add_pieces(out, rec)
+    return out
+
+
+def _split(counts, stock):
+    """Sorted (longest first) piece list that fits in one stock bar, plus the whole stock bars split off."""
+    pieces = []
+    full = 0
+    for length, count in counts.items():
+        whole, rest = divmod(length, stock)
+        full += whole * count
+        if rest:
+            pieces.extend([rest] * count)
+    pieces.sort(reverse=True)
+    return pieces, full
+
+
+def first_fit(pieces, stock):
+    """First-fit over `pieces` in the given order; returns the contents of each stock bar."""
+    if not pieces:
+        return []
+    size = 1
+    while size < len(pieces):
+        size *= 2
+    tree = [stock] * (2 * size)     # max room left under each node; leaves are bars
+    bars = []
+    for p in pieces:
+        i = 1
+        while i < size:
+            i = 2 * i if tree[2 * i] >= p else 2 * i + 1
+        b = i - size
+        if b == len(bars):
+            bars.append([])
+        bars[b].append(p)
+        tree[i] -= p
+        i //= 2
+        while i:
+            left, right = tree[2 * i], tree[2 * i + 1]
+            tree[i] = left if left > right else right
+            i //= 2
+    return bars
+
+
+def best_fit(pieces, stock):
+    """Best-fit over `pieces` in the given order; returns the contents of each stock bar."""
+    smallest = min(pieces, default=0)
+    caps = []           # distinct room left in open bars, sorted
+    open_bars = {}      # room -> bars with exactly that much left
+    bars = []
+    for p in pieces:
+        j = bisect_left(caps, p)
+        if j == len(caps):
+            b = len(bars)
+            bars.append([])
+            room = stock - p
+        else:
+            cap = caps[j]
+            same = open_bars[cap]
+            b = same.pop()
+            if not same:
+                del open_bars[cap]
+                caps.pop(j)
+            room = cap - p
+        bars[b].append(p)
+        if room >= smallest:
+            same = open_bars.get(room)
+            if same is None:
+                same = open_bars[room] = []
+                insort(caps, room)
+            same.append(b)
+    return bars
+
+
+def exact(pieces, stock):
+    """Fewest stock bars for a small group by branch and bound, starting from the best-fit plan."""
+    best = best_fit(pieces, stock)
+    lower = math.ceil(sum(pieces) / stock)
+    if len(best) <= lower:
+        return best
+    n = len(pieces)
+    left_after = [0] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        left_after[k] = left_after[k + 1] + pieces[k]
+    rooms = []
+    assign = [0] * n
+    best_assign = None
+    best_count = len(best)
+    nodes = 0
+
+    def search(k):
+        nonlocal best_assign, best_count, nodes
+        nodes += 1
+        if nodes > EXACT_MAX_NODES:
+            return
+        if k == n:
+            best_count = len(rooms)
+            best_assign = assign[:]
+            return
+        spare = sum(rooms)
+        if len(rooms) + math.ceil(max(0, left_after[k] - spare) / stock) >= best_count:
+            return
+        p = pieces[k]
+        tried = set()
+        for b, room in enumerate(rooms):
+            if room >= p and room not in tried:
+                tried.add(room)
+                rooms[b] -= p
+                assign[k] = b
+                search(k + 1)
+                rooms[b] += p
+                if best_count == lower:
+                    return
+        if len(rooms) + 1 < best_count:
+            rooms.append(stock - p)
+            assign[k] = len(rooms) - 1
+            search(k + 1)
+            rooms.pop()
+
+    search(0)
+    if best_assign is None:
+        return best
+    bars = [[] for _ in range(best_count)]
+    for p, b in zip(pieces, best_assign):
+        bars[b].append(p)
+    return bars
+
+
+def plan_diameter(d, counts, stock=STOCK_LENGTH, method="ffd"):
+    """Cutting plan for one diameter; counts maps piece length (mm) to how many are needed."""
+    if method not in METHODS:
+        raise ValueError(f"unknown cutting method {method!r}")
+    pieces, full = _split(counts, stock)
+    if method == "ffd":
+        bars = first_fit(pieces, stock)
+    elif method == "exact" and len(pieces) <= EXACT_MAX_PIECES:
+        bars = exact(pieces, stock)
+    else:
+        bars = best_fit(pieces, stock)
+    return CuttingPlan(d, stock, method, bars, full, sum(counts.values()))
+
+
+def plan_results(results, stock=STOCK_LENGTH, method="ffd"):
+    """A CuttingPlan per diameter in `results`, in diameter order."""
+    groups = pieces_by_diameter(results)
+    return [plan_diameter(d, groups[d], stock, method) for d in sorted(groups)]
+
+
+PLAN_HEADERS = ["Diameter", "Pieces", "Stock bars", "Offcut (m)", "Waste %"]
+
+
+def plan_rows(plans):
+    return [[f"{p.d:g} mm", p.pieces, p.stock_bars, f"{p.waste_mm / 1000:.2f}", f"{p.waste_pct:.1f}"] for p in plans]
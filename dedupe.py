@@ -0,0 +1,119 @@
+"""
+Identical members computed once.
+
+On a typical floor the same beam - same span, supports, sizes and bars - is
+entered over and over under different beam numbers. A MemberSchedule interns
+specs by everything but the beam number: the first spec of each kind is
+computed, and later ones only add to its count and beam number list. Each
+group then gives one result row with the quantities multiplied by the count
+and every beam number listed:
+
+    schedule = MemberSchedule()
+    for spec in specs:
+        schedule.add(spec)
+    rows = list(schedule.records())
+
+unique_rows() does the same grouping for columns of numbers (floor_grid.py).
+"""
+from dataclasses import dataclass, field, fields, replace
+from operator import attrgetter
+
+from calc import compute
+from records import BarResult, StirrupResult
+
+
+_KEY_GETTERS = {}
+
+
+def spec_key(spec):
+    """Everything that decides a spec's result: its type and field values, the beam number left out."""
+    cls = type(spec)
+    get = _KEY_GETTERS.get(cls)
+    if get is None:
+        get = _KEY_GETTERS[cls] = attrgetter(*[f.name for f in fields(cls) if f.name != "beam_num"])
+    return cls, get(spec)
+
+
+def scaled(rec, count, beam_num=None):
+    """rec for `count` identical members, optionally under a new beam number (list)."""
+    if count == 1 and beam_num is None:
+        return rec
+    changes = {} if beam_num is None or not hasattr(rec, "beam_num") else {"beam_num": beam_num}
+    if isinstance(rec, BarResult):
+        changes.update(quantity=rec.quantity * count, weight=rec.weight * count)
+    elif isinstance(rec, StirrupResult):
+        changes.update(total_weight=rec.total_weight * count, num_stirrups=rec.num_stirrups * count,
+                       num_l4=rec.num_l4 * count, num_l2=rec.num_l2 * count)
+    else:
+        changes.update(main_bars=rec.main_bars * count, dist_bars=rec.dist_bars * count,
+                       total_weight=rec.total_weight * count, quantity=rec.quantity * count)
+    return replace(rec, **changes)
+
+
+@dataclass(slots=True)
+class MemberGroup:
+    spec: object                # the first member's spec
+    result: object              # its result (a list of them for a two-way slab)
+    count: int = 0
+    beam_nums: list = field(default_factory=list)
+
+    def records(self):
+        """The group's result rows: quantities times count, beam numbers joined."""
+        results = self.result if isinstance(self.result, list) else [self.result]
+        beam_num = ", ".join(self.beam_nums) if self.beam_nums else None
+        return [scaled(r, self.count, beam_num) for r in results]
+
+
+class MemberSchedule:
+    """Member specs interned by spec_key(), in order of first appearance."""
+    def __init__(self):
+        self.groups = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.groups)
+
+    def members(self):
+        return sum(g.count for g in self.groups)
+
+    def add(self, spec, count=1):
+        """Count `count` members of `spec`, computing it only if it is new; returns its MemberGroup."""
+        key = spec_key(spec)
+        group = self._index.get(key)
+        if group is None:
+            group = MemberGroup(spec, compute(spec))    # a failing spec raises here and is not kept
+            self._index[key] = group
+            self.groups.append(group)
+        group.count += count
+        beam_num = getattr(spec, "beam_num", "")
+        if beam_num:
+            group.beam_nums.append(beam_num)
+        return group
+
+    def records(self):
+        for group in self.groups:
+            yield from group.records()
+
+
+def unique_rows(*columns):
+    """
+    Group equal rows across numeric columns. Returns (first, inverse, counts):
+    the row each group first appears at, the group of every row, and the rows
+    per group - groups numbered in order of first appearance.
+    """
+    import numpy as np
+    keys = np.column_stack([np.asarray(c, dtype=np.float64) for c in columns])
+    _, first, inverse, counts = np.unique(keys, axis=0, return_index=True, return_inverse=True, return_counts=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return first[order], rank[inverse.ravel()], counts[order]
+
+
+def joined(names, inverse, groups):
+    """The names of each group's rows, comma separated, for unique_rows() groups."""
+    import numpy as np
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse, minlength=groups))[:-1]
+    names = [names[i] for i in order.tolist()]
+    return [", ".join(names[a:b]) for a, b in zip([0] + bounds.tolist(), bounds.tolist() + [len(names)])]
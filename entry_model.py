@@ -0,0 +1,146 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor
+
+from bulk_entry import header_columns
+
+ERROR_COLOR = QColor(255, 205, 205)
+
+
+class EntryModel(QAbstractTableModel):
+    """
+    An editable grid of text cells, kept as one list of strings per column.
+
+    There is always one blank row at the bottom to type into; typing in it
+    adds it to the grid. A pasted block (paste()) goes in with one insert and
+    one change signal however many rows it has, so a whole spreadsheet can be
+    pasted at once. Rows set by set_errors() are shaded where a cell is at
+    fault, with the message as its tooltip.
+    """
+    def __init__(self, columns, headers=None, parent=None):
+        super().__init__(parent)
+        self._columns = list(columns)
+        self._headers = list(headers or columns)
+        self._cells = {name: [] for name in self._columns}
+        self._rows = 0
+        self._errors = {}       # row -> {column: message}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows + 1
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section]
+        return str(section + 1) if section < self._rows else "*"
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        row, name = index.row(), self._columns[index.column()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._cells[name][row] if row < self._rows else ""
+        message = self._errors.get(row, {}).get(name)
+        if message is None:
+            return None
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return ERROR_COLOR
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{name} {message}"
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        value = str(value).strip()
+        if role != Qt.ItemDataRole.EditRole or not index.isValid() or (index.row() == self._rows and not value):
+            return False
+        self._write(index.row(), [self._columns[index.column()]], [[value]])
+        return True
+
+    def columns(self):
+        return list(self._columns)
+
+    def cells(self):
+        """{column: [cell text]} for every row but the blank one at the bottom."""
+        return {name: list(values) for name, values in self._cells.items()}
+
+    def entry_rows(self):
+        return self._rows
+
+    def set_columns(self, columns, headers=None):
+        """Show other columns; the cells of columns kept by name stay."""
+        self.beginResetModel()
+        self._cells = {name: self._cells.get(name, [""] * self._rows) for name in columns}
+        self._columns = list(columns)
+        self._headers = list(headers or columns)
+        self._errors = {}
+        self.endResetModel()
+
+    def paste(self, row, column, table):
+        """
+        Put table (rows of cell strings) into the grid with its top left cell at
+        (row, column), adding rows as needed. If the first row names columns of
+        the grid (a header row) the rest goes under those columns instead.
+        Cells beyond the last column are dropped. Returns the rows written.
+        """
+        if not table:
+            return 0
+        names = header_columns(table[0], self._columns)
+        if names is not None:
+            table = table[1:]
+        else:
+            names = self._columns[column:column + max(map(len, table))]
+        if not table or not names:
+            return 0
+        self._write(row, names, table)
+        return len(table)
+
+    def _write(self, row, names, table):
+        end = row + len(table)
+        if end > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows + 1, end)
+            for values in self._cells.values():
+                values.extend([""] * (end - self._rows))
+            self.endInsertRows()
+            self.headerDataChanged.emit(Qt.Orientation.Vertical, self._rows, end)
+            self._rows = end
+        for j, name in enumerate(names):
+            values = self._cells[name]
+            for i, cells in enumerate(table, row):
+                if j < len(cells):
+                    values[i] = cells[j]
+        for i in range(row, end):
+            self._errors.pop(i, None)
+        cols = [self._columns.index(name) for name in names]
+        self.dataChanged.emit(self.index(row, min(cols)), self.index(end - 1, max(cols)))
+
+    def clear_cells(self, indexes):
+        """Blank the given cells (the rows stay)."""
+        indexes = [i for i in indexes if i.row() < self._rows]
+        for index in indexes:
+            self._cells[self._columns[index.column()]][index.row()] = ""
+        if indexes:
+            rows = [i.row() for i in indexes]
+            self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), len(self._columns) - 1))
+
+    def keep_rows(self, rows):
+        """Drop every row but the given ones (e.g. those that failed to compute), in a single reset."""
+        rows = sorted(r for r in rows if r < self._rows)
+        self.beginResetModel()
+        self._cells = {name: [values[r] for r in rows] for name, values in self._cells.items()}
+        self._errors = {new: self._errors[old] for new, old in enumerate(rows) if old in self._errors}
+        self._rows = len(rows)
+        self.endResetModel()
+
+    def set_errors(self, errors):
+        """errors: {row: [(column, message)]}, as validation.Report.by_row() gives them."""
+        self._errors = {row: dict(problems) for row, problems in errors.items()}
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._rows - 1, len(self._columns) - 1),
+                                  [Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ToolTipRole])
+
+    def clear(self):
+        self.keep_rows([])
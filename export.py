@@ -0,0 +1,108 @@
+import csv
+from pdf_stream import StreamingPdfWriter
+from profiling import timed
+from records import BarResult, StirrupResult, DiameterTotals
+
+HEADERS = ["Beam Type", "Beam No.", "Bend len 1", "Bend len 2", "Quantity", "Cutting-length (per bar)", "Weight(kg/m)"]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+@timed("export.rows")
+def export_rows(results, totals=None):
+    """
+    Table shared by the PDF and CSV exports: header row, results grouped by
+    diameter, then the per-diameter totals (`totals`, a DiameterTotals; worked
+    out from `results` when not given).
+    """
+    from aggregate import group_records
+    data = [HEADERS]
+    for key, group in group_records(results, "d"):
+        # Add a header row for each group
+        data.append([f"Bar Diameter: {key} mm", '', '', '', '', '', ''])
+        for res in group:
+            # For Cantilever
+            if isinstance(res, BarResult) and res.type == "Cantilever":
+                row = [res.type, str(res.beam_num), "-", "-", str(res.quantity), str(res.length), str(res.weight)]
+            # For Top Steel and Bottom Steel
+            elif isinstance(res, BarResult):
+                row = [res.type, str(res.beam_num), str(res.bl1), str(res.bl2), str(res.quantity), str(res.length), str(res.weight)]
+            # For stirrups
+            elif isinstance(res, StirrupResult):
+                row = [res.type, str(res.beam_num), "-", "-", "", str(res.num_stirrups), str(res.total_weight)]
+            # For Slab
+            else:
+                row = [res.type, str(res.d), "-", "-", str(res.quantity), str(res.main_bars), str(res.total_weight)]
+            data.append(row)
+    if totals is None:
+        totals = DiameterTotals()
+        for res in results:
+            totals.add(res)
+    if len(totals):
+        data.append(["Totals per diameter", '', '', '', '', '', ''])
+        for d, (_, pieces, length, weight) in totals.items():
+            data.append([f"Dia {d:g} mm", "-", "-", "-", str(pieces), f"{length / 1000:.2f} m", f"{weight:.2f}"])
+        _, pieces, length, weight = totals.grand_total()
+        data.append(["Total", "-", "-", "-", str(pieces), f"{length / 1000:.2f} m", f"{weight:.2f} ({weight / 1000:.3f} t)"])
+    return data
+
+
+def _check(cancelled):
+    if cancelled is not None and cancelled():
+        raise ExportCancelled()
+
+
+@timed("export.pdf")
+def write_pdf(data, pdf_path, progress=None, cancelled=None):
+    """
+    Write the export table to a PDF, one page at a time.
+
+    progress(percent) is called as rows are written and cancelled() is
+    polled every 500 rows; returning True stops with ExportCancelled.
+    """
+    total = max(1, len(data))
+    done = 0
+
+    def rows(group):
+        nonlocal done
+        for row in group:
+            yield row
+            done += 1
+            if done % 500 == 0:
+                _check(cancelled)
+                if progress is not None:
+                    progress(min(99, 100 * done // total))
+
+    with StreamingPdfWriter(pdf_path, data[0], title="Cutting Length Results") as pdf:
+        # data[1:] is a "Bar Diameter: ..." row followed by that diameter's rows, repeated
+        start = 1
+        while start < len(data):
+            end = start + 1
+            while end < len(data) and not is_group_row(data[end]):
+                end += 1
+            pdf.add_group(data[start][0], rows(data[start + 1:end]))
+            start = end
+    if progress is not None:
+        progress(100)
+
+
+def is_group_row(row):
+    return not any(row[1:])
+
+
+@timed("export.csv")
+def write_csv(data, csv_path, progress=None, cancelled=None):
+    """Write the export table to a CSV file, reporting progress every 1000 rows."""
+    step = 1000
+    total = max(1, len(data))
+    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        for start in range(0, len(data), step):
+            _check(cancelled)
+            writer.writerows(data[start:start + step])
+            if progress is not None:
+                progress(min(100, 100 * (start + step) // total))
+    if progress is not None:
+        progress(100)
@@ -0,0 +1,82 @@
+"""
+Fixed-point lengths and weights for totals.
+
+Every total - per diameter, per member, per service request, over a whole
+project - is kept as integers: running length in tenths of a millimetre and
+weight in grams. A result's measures are rounded once, where they enter a
+total (to the nearest unit, halves to even, which round() and numpy.rint
+agree on); after that every sum is an integer sum. So totals are exact and
+reproducible: the same in whatever order results are added, however a run
+is split across processes, and back where they started when a result is
+taken out again after an edit. The result records keep the values their
+formulas give.
+
+The formulas round in one place too. A stirrup's weight is floored to
+whole grams (piece_grams), whatever its legs, and the weight of all of a
+beam's stirrups to whole kg (floor_kg). calc and batch both round through
+these, one value at a time or a column at a time. Two-legged stirrups were
+not floored before, so some of their weights are 1 kg lower than they were.
+
+That is as far as fixed point goes: lengths and weights are still computed
+as floats and the records hold floats. Slab weights are still floored per
+half of the bars.
+"""
+import math
+
+PER_MM = 10         # length units per mm
+PER_KG = 1000       # weight units (g) per kg
+
+
+def length_units(length_mm):
+    return round(length_mm * PER_MM)
+
+
+def weight_units(weight_kg):
+    return round(weight_kg * PER_KG)
+
+
+def mm(units):
+    return units / PER_MM
+
+
+def kg(units):
+    return units / PER_KG
+
+
+def piece_grams(weight_g):
+    """The weight of one piece (a stirrup), floored to whole grams."""
+    return math.floor(weight_g)
+
+
+def floor_kg(weight_g):
+    """A member's weight in whole kg (floored) from its weight in grams."""
+    return math.floor(weight_g / PER_KG)
+
+
+def piece_grams_array(weight_g):
+    import numpy as np
+    return np.floor(weight_g)
+
+
+def floor_kg_array(weight_g):
+    import numpy as np
+    return np.floor(weight_g / PER_KG)
+
+
+def length_units_array(length_mm):
+    """length_units() over an array, as int64."""
+    import numpy as np
+    return np.rint(np.asarray(length_mm, dtype=np.float64) * PER_MM).astype(np.int64)
+
+
+def weight_units_array(weight_kg):
+    import numpy as np
+    return np.rint(np.asarray(weight_kg, dtype=np.float64) * PER_KG).astype(np.int64)
+
+
+def group_sums(inverse, values, groups):
+    """Exact int64 sums of values per group (np.bincount would add them as floats)."""
+    import numpy as np
+    out = np.zeros(groups, dtype=np.int64)
+    np.add.at(out, inverse, np.asarray(values, dtype=np.int64))
+    return out
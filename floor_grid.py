@@ -0,0 +1,287 @@
+"""
+Whole floors generated from a grid of column lines.
+
+A floor is its bay spans between column lines each way, the column and beam
+sizes, the bars every beam gets and the slab spacings, all in mm. As JSON
+(for `civilcal floor`):
+
+    {"x_spans": [5000, 4500, 5000], "y_spans": [4000, 4000],
+     "column_size": 300, "beam_width": 230, "beam_depth": 450,
+     "beam_sizes": {"X0": [300, 600]},
+     "top_bars": [[16, 2]], "bottom_bars": [[16, 3], [12, 1]],
+     "stirrups": {"d": 8, "type": "1", "spacing": 150},
+     "slab": {"d": 10, "spacing_short": 150, "spacing_long": 200},
+     "voids": [[1, 0]], "storeys": 4}
+
+There is a beam on every grid line, one member per bay: line Xj runs along x
+on the j-th y line, Yi along y on the i-th x line, and BXj-k is the k-th bay
+of Xj. beam_sizes overrides [width, depth] per line. The end bays of a line
+get end supports on the columns (flow2, flow1 for a single bay); inner bays
+are continuous (flow3). Each bay between beams is a slab panel - two-way up
+to a 2:1 aspect, one-way past it - unless listed in voids as [x bay, y bay].
+A panel's neighbours are read off the panel array by index; a void or the
+edge of the floor is a discontinuous edge.
+
+Stirrups can be spaced by zones instead, as calc.StirrupZonesSpec measures
+them from the faces of each beam: "zones": [[0, 900, 100], [0, 0, 150],
+[-900, 0, 100]] is 100 mm over 900 mm at each end and 150 mm between.
+
+storeys multiplies every quantity, so a typical floor repeated up a building
+is computed once. A file can also hold {"floors": [...]}, and floors with
+the same layout are merged before computing. With dedupe, identical beam bays
+and slab panels are computed once too (see dedupe.py): one row per kind,
+listing its beam numbers.
+"""
+import json
+from dataclasses import dataclass, field, fields, replace
+
+import numpy as np
+
+import batch
+from aggregate import summarize
+from dedupe import joined, unique_rows
+from records import RECORD_TYPES, BarResult, StirrupResult, SlabResult, ResultStore
+
+
+@dataclass(slots=True)
+class FloorGrid:
+    x_spans: list               # bay spans along x, column line to column line
+    y_spans: list
+    column_size: float = 300.0
+    beam_width: float = 230.0
+    beam_depth: float = 450.0
+    beam_sizes: dict = field(default_factory=dict)      # line ("X0", "Y2") -> [width, depth]
+    top_bars: list = field(default_factory=list)        # [[d, quantity]] in every beam
+    bottom_bars: list = field(default_factory=list)
+    stirrups: dict = field(default_factory=dict)        # d, type and spacing, l4_spacing + l2_spacing or zones
+    slab: dict = field(default_factory=dict)            # d, spacing_short, spacing_long, spacing_edge
+    voids: list = field(default_factory=list)           # [[x bay, y bay]] with no slab
+    storeys: int = 1
+    name: str = ""
+
+
+def floor_from_dict(data):
+    known = {f.name for f in fields(FloorGrid)}
+    unknown = set(data) - known
+    if unknown:
+        raise ValueError(f"unknown floor keys: {', '.join(sorted(unknown))}")
+    grid = FloorGrid(**data)
+    if not grid.x_spans or not grid.y_spans:
+        raise ValueError("x_spans and y_spans need at least one bay each")
+    if min(grid.x_spans + grid.y_spans) <= grid.column_size:
+        raise ValueError("every span must be longer than the column size")
+    if grid.storeys < 1:
+        raise ValueError("storeys must be at least 1")
+    for zone in grid.stirrups.get("zones", []):
+        if len(zone) != 3 or zone[2] <= 0:
+            raise ValueError(f"stirrup zone {zone} is not [start, end, spacing > 0]")
+    for i, j in grid.voids:
+        if not (0 <= i < len(grid.x_spans) and 0 <= j < len(grid.y_spans)):
+            raise ValueError(f"void [{i}, {j}] is not a panel of the grid")
+    return grid
+
+
+def load_floors(path):
+    """The floors in a JSON file, identical layouts merged (see merge_floors)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    floors = data["floors"] if "floors" in data else [data]
+    return merge_floors([floor_from_dict(d) for d in floors])
+
+
+def merge_floors(floors):
+    """One FloorGrid per distinct layout, its storeys summed and names joined."""
+    merged = {}
+    for grid in floors:
+        key = repr(replace(grid, storeys=1, name=""))
+        if key in merged:
+            first = merged[key]
+            merged[key] = replace(first, storeys=first.storeys + grid.storeys,
+                                  name="+".join(n for n in (first.name, grid.name) if n))
+        else:
+            merged[key] = grid
+    return list(merged.values())
+
+
+def _line_sizes(grid, axis, lines):
+    sizes = [grid.beam_sizes.get(f"{axis}{i}", (grid.beam_width, grid.beam_depth)) for i in range(lines)]
+    return np.array(sizes, dtype=np.float64).reshape(lines, 2).T
+
+
+def beams(grid):
+    """(beam numbers, clear span, num_supports, width, depth) of every beam bay, X lines then Y lines."""
+    prefix = f"{grid.name}/" if grid.name else ""
+    nums, cols = [], []
+    for axis, bays, lines in (("X", grid.x_spans, len(grid.y_spans) + 1),
+                              ("Y", grid.y_spans, len(grid.x_spans) + 1)):
+        n = len(bays)
+        k = np.arange(n)
+        supports = (k == 0).astype(np.int64) + (k == n - 1)      # a single bay has both ends on columns
+        width, depth = _line_sizes(grid, axis, lines)
+        cols.append((np.tile(np.asarray(bays, dtype=np.float64) - grid.column_size, lines),
+                     np.tile(supports, lines), np.repeat(width, n), np.repeat(depth, n)))
+        nums += [f"{prefix}B{axis}{line}-{bay}" for line in range(lines) for bay in range(1, n + 1)]
+    clear_span, supports, width, depth = (np.concatenate(c) for c in zip(*cols))
+    return nums, clear_span, supports, width, depth
+
+
+def bar_specs(grid, nums, clear_span, supports, depth, multiple):
+    """BeamSpec columns for the top then bottom bars of every beam, beam by beam, `multiple` times over."""
+    sets = [("Top Steel", d, q) for d, q in grid.top_bars] + [("Bottom Steel", d, q) for d, q in grid.bottom_bars]
+    if not sets:
+        return None
+    m = len(sets)
+    beam = np.repeat(np.arange(len(nums)), m)
+    types, ds, qtys = zip(*sets)
+    es_width = np.full(len(beam), float(grid.column_size))
+    return {"type": list(types) * len(nums), "beam_num": np.array(nums, dtype=object)[beam].tolist(),
+            "d": np.tile(np.array(ds, dtype=np.float64), len(nums)),
+            "quantity": np.tile(np.array(qtys, dtype=np.int64), len(nums)) * np.broadcast_to(multiple, len(nums))[beam],
+            "clear_span": clear_span[beam], "num_supports": supports[beam],
+            "es_width1": es_width, "es_width2": es_width,
+            "beam_depth1": depth[beam], "beam_depth2": depth[beam]}
+
+
+def stirrup_specs(grid, nums, clear_span, width, depth):
+    s = grid.stirrups
+    if not s:
+        return None
+    n = len(nums)
+    full = lambda key: np.full(n, float(s.get(key, 0)))
+    return {"beam_num": nums, "d": full("d"), "stirrup_type": [str(s.get("type", "1"))] * n,
+            "clear_span": clear_span, "beam_width": width, "beam_depth": depth,
+            "spacing": full("spacing"), "l4_spacing": full("l4_spacing"), "l2_spacing": full("l2_spacing")}
+
+
+def zone_table(zones, n):
+    """The zone table (batch.zone_layout) giving each of n beams the same [[start, end, spacing]] zones."""
+    start, end, spacing = np.asarray(zones, dtype=np.float64).reshape(-1, 3).T
+    return {"beam": np.repeat(np.arange(n), len(start)), "start": np.tile(start, n),
+            "end": np.tile(end, n), "spacing": np.tile(spacing, n)}
+
+
+def panels(grid):
+    """
+    (one-way SlabSpec columns, two-way TwoWaySlabSpec columns) for every slab
+    panel, row by row of y bays. Spans are clear of the beams, and x/a/b are
+    always the short way.
+    """
+    s = grid.slab
+    if not s:
+        return None, None
+    nx, ny = len(grid.x_spans), len(grid.y_spans)
+    w_x = _line_sizes(grid, "X", ny + 1)[0][:, None]       # beams along x, at the y edges of the panels
+    w_y = _line_sizes(grid, "Y", nx + 1)[0][None, :]
+    cx = np.broadcast_to(np.asarray(grid.x_spans, dtype=np.float64)[None, :] - w_y[:, :-1] / 2 - w_y[:, 1:] / 2, (ny, nx))
+    cy = np.broadcast_to(np.asarray(grid.y_spans, dtype=np.float64)[:, None] - w_x[:-1] / 2 - w_x[1:] / 2, (ny, nx))
+    present = np.ones((ny, nx), dtype=bool)
+    for i, j in grid.voids:
+        present[j, i] = False
+
+    # neighbouring spans by shifting a zero-padded panel array one bay each way
+    px = np.pad(np.where(present, cx, 0.0), 1)
+    py = np.pad(np.where(present, cy, 0.0), 1)
+    left, right = px[1:-1, :-2], px[1:-1, 2:]
+    below, above = py[:-2, 1:-1], py[2:, 1:-1]
+    w_left, w_right = np.broadcast_to(w_y[:, :-1], (ny, nx)), np.broadcast_to(w_y[:, 1:], (ny, nx))
+    w_below, w_above = np.broadcast_to(w_x[:-1], (ny, nx)), np.broadcast_to(w_x[1:], (ny, nx))
+
+    x_short = cx <= cy
+    pick = lambda along_x, along_y: np.where(x_short, along_x, along_y)
+    short, long = pick(cx, cy), pick(cy, cx)
+    two_way = present & (long <= 2 * short)
+    one_way = present & ~two_way
+    common = {"x": short, "y": long, "a": pick(left, below), "b": pick(right, above),
+              "beam_width1": pick(w_left, w_below), "beam_width2": pick(w_right, w_above)}
+
+    def columns(mask, extra):
+        n = int(mask.sum())
+        if not n:
+            return None
+        cols = {"d": np.full(n, float(s["d"]))}
+        cols.update({k: v[mask] for k, v in {**common, **extra}.items()})
+        cols["quantity"] = np.full(n, grid.storeys, dtype=np.int64)
+        return cols
+
+    one = columns(one_way, {})
+    if one:
+        one["spacing_main"] = np.full(len(one["d"]), float(s["spacing_short"]))
+        one["spacing_dist"] = np.full(len(one["d"]), float(s["spacing_long"]))
+    two = columns(two_way, {"a2": pick(below, left), "b2": pick(above, right),
+                            "beam_width3": pick(w_below, w_left), "beam_width4": pick(w_above, w_right)})
+    if two:
+        for key in ("spacing_short", "spacing_long", "spacing_edge"):
+            two[key] = np.full(len(two["d"]), float(s.get(key, 0)))
+    return one, two
+
+
+def _scaled(cols, counts):
+    # results of one panel per distinct spec, times the panels like it (as dedupe.scaled);
+    # scaling the result rather than the quantity keeps each panel's weight rounding
+    out = dict(cols)
+    for key in ("main_bars", "dist_bars", "total_weight", "quantity"):
+        out[key] = cols[key] * counts
+    return out
+
+
+def floor_columns(grid, dedupe=False):
+    """[(record type, {field: column})] for the whole floor: beam bars, stirrups, one-way and two-way slabs."""
+    nums, clear_span, supports, width, depth = beams(grid)
+    multiple = np.int64(grid.storeys)
+    if dedupe:
+        first, inverse, counts = unique_rows(clear_span, supports, width, depth)
+        nums = joined(nums, inverse, len(first))
+        clear_span, supports, width, depth = clear_span[first], supports[first], width[first], depth[first]
+        multiple = counts * grid.storeys
+    out = []
+    bars = bar_specs(grid, nums, clear_span, supports, depth, multiple)
+    if bars:
+        out.append((BarResult, batch.beam_bar_columns(bars)))
+    specs = stirrup_specs(grid, nums, clear_span, width, depth)
+    if specs:
+        zones = grid.stirrups.get("zones")
+        if zones:
+            cols = batch.stirrup_zone_columns(specs, zone_table(zones, len(nums)))
+        else:
+            cols = batch.stirrup_columns(specs)
+        # a beam's stirrups once per storey (and per identical beam): counts and weight scale,
+        # the cutting length does not
+        for key in ("num_stirrups", "num_l4", "num_l2", "total_weight"):
+            cols[key] = cols[key] * multiple
+        out.append((StirrupResult, cols))
+    for cols, slab_columns in zip(panels(grid), (batch.slab_columns, batch.two_way_slab_columns)):
+        if not cols:
+            continue
+        if dedupe:
+            first, _, counts = unique_rows(*cols.values())
+            res = slab_columns({k: v[first] for k, v in cols.items()})
+            res = _scaled(res, counts[res["panel"]] if "panel" in res else counts)
+        else:
+            res = slab_columns(cols)
+        out.append((SlabResult, res))
+    return out
+
+
+def compute_floors(floors, store=None, dedupe=False):
+    """Every floor's results appended to `store` (a new ResultStore by default), totals included."""
+    store = ResultStore() if store is None else store
+    if len(store) or store.journal is not None:
+        # go through append() so the running totals and the journal see every result
+        store.extend(compute_floors(floors, dedupe=dedupe))
+        return store
+    parts = []
+    start = 0
+    for grid in floors:
+        for cls, cols in floor_columns(grid, dedupe):
+            names = [f.name for f in fields(cls)]
+            columns = [cols[n].tolist() if isinstance(cols[n], np.ndarray) else cols[n] for n in names]
+            n = len(columns[0])
+            parts.append((RECORD_TYPES.index(cls), range(start, start + n), columns))
+            start += n
+    store.load_columns(parts)
+    if len(store):
+        summary = summarize(store, ("d",))
+        for (d,), rows, pieces, length, weight in zip(summary.keys, summary.rows, summary.pieces,
+                                                      summary.length_units, summary.weight_units):
+            store.totals.add_group(d, int(rows), int(pieces), int(length), int(weight))
+    return store
@@ -1,12 +1,29 @@
+import math
+
+
 def get_input(prompt= "", type_func=float, allow_back=False):
     while True:
         value = input(prompt).strip().lower()
         if allow_back and value == "back":
             return "BACK"
+        kind = "number" if type_func == float else "whole number"
         try:
-            value = type_func(value)
-            if value <= 0:
-                raise ValueError
-            return value
-        except:
-            print("Please enter a valid positive number." if type_func == float else "Please enter a valid positive integer.")
+            number = type_func(value)
+        except ValueError:
+            number = None
+        if number is None or not math.isfinite(number):
+            print(f"{value!r} is not a {kind}. Please enter a valid positive {kind}.")
+        elif number <= 0:
+            print(f"{value} is not greater than 0. Please enter a valid positive {kind}.")
+        else:
+            return number
+
+
+def get_diameters(count, prompt="Enter diameter of bar {} (in mm): "):
+    diameters = []
+    for i in range(int(count)):
+        d = get_input(prompt.format(i + 1), allow_back=True)
+        if d == "BACK":
+            break
+        diameters.append(d)
+    return diameters
@@ -1,8 +1,14 @@
-from cuttingLen import flow1, flow2, flow3, flow4, bend_length
-from result import theLoop, group_by_field
-from inputs import get_input
+from cuttingLen import flow4
+from batch import beam_bar_lengths
+from result import theLoop, group_by_field, print_summary, print_totals, print_cutting_plans
+from inputs import get_input, get_diameters
 from stirrups import stirrup_flow
 from slab import slab_flow
+from records import ResultStore
+import os
+import sys
+
+PROJECT_PATH = os.path.join("pdfs", "cutting_lengths.civilcal")
 
 def menu():
     print("\nCutting Length Calculator for Continuous Bars")
@@ -14,9 +20,20 @@ def menu():
     print("5. Slab")
     print("6. Exit") 
 
-def main():
-    results = []
+def open_results():
+    """(results, project): every result is saved to PROJECT_PATH as it is added, as in main2."""
+    from project_store import open_project, save_project
+    os.makedirs("pdfs", exist_ok=True)
+    if os.path.exists(PROJECT_PATH) and input(f"Resume saved project '{PROJECT_PATH}'? (y/n): ").strip().lower() == "y":
+        project, results = open_project(PROJECT_PATH)
+        print(f"Loaded {len(results)} saved results.")
+    else:
+        results = ResultStore()
+        project = save_project(results, PROJECT_PATH)
+    return results, project
+
 
+def menu_loop(results, project):
     while True:
         menu()
         choice = input("Press 1/2/3 as per requirement: ").strip()
@@ -57,13 +74,9 @@ def main():
                                 if types_bars == "BACK":
                                     break
 
-                                for i in range(types_bars):
-                                    d = get_input(f"Enter diameter of bar {i+1} (in mm): ", allow_back=True)
-                                    if d == "BACK":
-                                        break
-                                    bl1 = bend_length(d, es_width)
-                                    bl2 = 0
-                                    length = flow2(d, clear_span, es_width, beam_depth, bl1)
+                                diameters = get_diameters(types_bars)
+                                bl1s, bl2s, lengths = beam_bar_lengths(diameters, clear_span, es_width, 0, beam_depth, 0, num_supports=1)
+                                for d, bl1, bl2, length in zip(diameters, bl1s, bl2s, lengths):
                                     if theLoop(length, results, choice, clear_span, bl1, bl2, d, beam_num) == "BACK":
                                         break
                                 break
@@ -81,13 +94,9 @@ def main():
                                 types_bars = get_input("Enter number of bar diameters you want to input: ", int, allow_back=True)
                                 if types_bars == "BACK":
                                     break
-                                for i in range(types_bars):
-                                    d = get_input(f"Enter diameter of bar {i+1} (in mm): ", allow_back=True)
-                                    if d == "BACK":
-                                        break
-                                    bl1 = bend_length(d, es_width1)
-                                    bl2 = bend_length(d, es_width2)
-                                    length = flow1(d, clear_span, es_width1, es_width2, beam_depth, bl1, bl2)
+                                diameters = get_diameters(types_bars)
+                                bl1s, bl2s, lengths = beam_bar_lengths(diameters, clear_span, es_width1, es_width2, beam_depth, beam_depth, num_supports=2)
+                                for d, bl1, bl2, length in zip(diameters, bl1s, bl2s, lengths):
                                     if theLoop(length, results, choice, clear_span, bl1, bl2, d, beam_num) == "BACK":
                                         break
                                 break
@@ -99,12 +108,9 @@ def main():
                         types_bars = get_input("Enter number of bar diameters you want to input: ", int, allow_back=True)
                         if types_bars == "BACK":
                             break
-                        for i in range(types_bars):
-                            d = get_input(f"Enter diameter of bar {i+1} (in mm): ", allow_back=True)
-                            if d == "BACK":
-                                break
-                            bl1 = bl2 = 0
-                            length = flow3(d, clear_span)
+                        diameters = get_diameters(types_bars)
+                        bl1s, bl2s, lengths = beam_bar_lengths(diameters, clear_span, num_supports=0)
+                        for d, bl1, bl2, length in zip(diameters, bl1s, bl2s, lengths):
                             if theLoop(length, results, choice, clear_span, bl1, bl2, d, beam_num) == "BACK":
                                 break
                         break
@@ -134,16 +140,31 @@ def main():
                 break
         
         elif choice == "4":
-            stirrup_flow()
+            stirrup_flow(results)
 
         elif choice == "5":
-            slab_flow()
-            
+            slab_flow(results)
+
+        project.flush()
+
+
+def main():
+    results, project = open_results()
+    try:
+        menu_loop(results, project)
+    finally:
+        project.close()
+
     # Summary
     print("\nSummary of cutting lengths:\n")
-    field_order = ["type", "beam no.", "clear span", "bend length1", "bend length2", "quantity"]
+    field_order = ["type", "beam_num", "clear_span", "bl1", "bl2", "quantity"]
     field_names = ["Beam Type", "Beam No.", "Clear Span", "Bend len 1", "Bend len 2", "quantity"]
     group_by_field(results, group_key="d", field_order=field_order, field_names=field_names, title_prefix="(Diff spacing) Bar dia")
+    print_summary(results, by=("type", "d"), title="Totals by type and diameter")
+    print_totals(results.totals)
+    print_cutting_plans(results)
 
 if __name__ == "__main__":
+    from profiling import enable_from_argv
+    enable_from_argv(sys.argv[1:])
     main()
@@ -1,10 +1,13 @@
-from cuttingLen import flow1, flow2, flow3, flow4, bend_length
-from result import theLoop, group_by_field
-from inputs import get_input
+from cuttingLen import flow4
+from batch import beam_bar_lengths
+from result import theLoop, group_by_field, print_summary, print_totals, print_cutting_plans
+from inputs import get_input, get_diameters
 from stirrups import stirrup_flow
 from slab import slab_flow
-from fpdf import FPDF
+from records import ResultStore, TOTALS_HEADERS
 import os
+import sys
+from profiling import timed
 
 def menu():
     print("\nCutting Length Calculator for Continuous Bars")
@@ -16,40 +19,41 @@ def menu():
     print("5. Slab")
     print("6. Exit") 
 
-def write_pdf(results, pdf_path, field_order, field_names, group_key, title_prefix=None):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, 'Cutting Length Calculator Results', ln=True, align='C')
-    pdf.ln(5)
-    from collections import defaultdict
-    grouped = defaultdict(list)
-    for entry in results:
-        grouped[entry[group_key]].append(entry)
-    pdf.set_font('Arial', '', 12)
-    for key_val, entries in grouped.items():
-        title = f"{title_prefix or group_key.title()}: {key_val}"
-        pdf.cell(0, 10, title, ln=True)
-        headers = field_names if field_names else [k.replace('_', ' ').title() for k in field_order]
-        col_widths = [30] * len(headers)
-        pdf.set_font('Arial', 'B', 12)
-        for i, h in enumerate(headers):
-            pdf.cell(col_widths[i], 8, str(h), border=1)
-        pdf.ln()
-        pdf.set_font('Arial', '', 12)
+@timed("export.pdf")
+def write_pdf(results, pdf_path, field_order, field_names, group_key, title_prefix=None, append=False):
+    """Write results grouped by `group_key`; with append=True the groups go after the pages already in pdf_path."""
+    from aggregate import group_records
+    from pdf_stream import StreamingPdfWriter
+    headers = field_names if field_names else [k.replace('_', ' ').title() for k in field_order]
+
+    def rows(entries):
         for e in entries:
-            for i, key in enumerate(field_order):
-                val = e.get(key, "")
+            row = []
+            for key in field_order:
+                val = getattr(e, key, "")
                 if isinstance(val, float):
                     val = f"{val:.2f}"
-                pdf.cell(col_widths[i], 8, str(val), border=1)
-            pdf.ln()
-        pdf.ln(2)
-    pdf.output(pdf_path)
+                row.append(val)
+            yield row
+
+    with StreamingPdfWriter(pdf_path, headers, append=append) as pdf:
+        for key_val, entries in group_records(results, group_key):
+            pdf.add_group(f"{title_prefix or group_key.title()}: {key_val}", rows(entries))
+
+@timed("export.totals_pdf")
+def write_totals_pdf(totals, pdf_path):
+    """Write the per-diameter steel totals at the end of pdf_path, in place of any written by an earlier session."""
+    if not len(totals):
+        return
+    from pdf_stream import StreamingPdfWriter
+    with StreamingPdfWriter(pdf_path, TOTALS_HEADERS, append=True, tail=True) as pdf:
+        pdf.add_group("Steel totals by diameter", totals.table())
 
 def main():
-    results = []
+    results = ResultStore()
+    written = 0  # results[:written] are already in the PDF
     pdf_path = None
+    project = None
     try:
         while True:
             if pdf_path is None:
@@ -59,8 +63,18 @@ def main():
                 # Ensure the pdfs directory exists
                 os.makedirs("pdfs", exist_ok=True)
                 pdf_path = os.path.join("pdfs", pdf_name + ".pdf")
-                if os.path.exists(pdf_path):
-                    os.remove(pdf_path)
+                # every result is also saved to a project file next to the PDF
+                from project_store import open_project, save_project
+                project_path = os.path.join("pdfs", pdf_name + ".civilcal")
+                resume = os.path.exists(project_path) and input(f"Resume saved project '{pdf_name}'? (y/n): ").strip().lower() == "y"
+                if resume:
+                    project, results = open_project(project_path)
+                    written = len(results) if os.path.exists(pdf_path) else 0
+                    print(f"Loaded {len(results)} saved results.")
+                else:
+                    if os.path.exists(pdf_path):
+                        os.remove(pdf_path)
+                    project = save_project(results, project_path)
             menu()
             choice = input("Press 1/2/3 as per requirement: ").strip()
             if choice not in ("1", "2", "3", "4", "5"):
@@ -80,37 +94,31 @@ def main():
                         #beam_depth1 = get_input("Enter beam depth of first supp(mm): ", int)
                         #beam_depth2 = get_input("Enter beam depth of second supp(mm): ", int)
                         types_bars = get_input("Enter number of bar diameters you want to input: ", int, allow_back=True)
-                        for i in range(types_bars):
-                            d = get_input(f"Enter the diameter of bar {i+1} (mm) : ")
-                            bl1 = bend_length(d, es_width1)
-                            bl2 = bend_length(d, es_width2)
-                            length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
+                        diameters = get_diameters(types_bars, "Enter the diameter of bar {} (mm) : ")
+                        bl1s, bl2s, lengths = beam_bar_lengths(diameters, clear_span, es_width1, es_width2, beam_depth, beam_depth, num_supports=2)
+                        for d, bl1, bl2, length in zip(diameters, bl1s, bl2s, lengths):
                             theLoop(length, results, choice, clear_span, bl1, bl2, d, beam_num)
                         break
                     else:
                         end_supp = input("Is the end support present?(y/n): ").strip().lower()
                         if end_supp == "y":
-                            quant_end_supp = input("Enter how many end support are present: ").strip().lower()
+                            quant_end_supp = get_input("Enter how many end support are present: ", int)
                             if  quant_end_supp == 1:
                                 es_width = get_input("Enter the width of the end support(mm): ")
-                                types_bars = get_input("Enter the no. of bars diameters you want to input: ")
-                                for i in range(types_bars):
-                                    d = get_input(f"Enter diameter of bar{i+1}(mm): ")
-                                    bl1 = bend_length(d, es_width)
-                                    bl2 = 0
-                                    length = flow2(d, clear_span, es_width, beam_depth, bl1)
+                                types_bars = get_input("Enter the no. of bars diameters you want to input: ", int)
+                                diameters = get_diameters(types_bars, "Enter diameter of bar{}(mm): ")
+                                bl1s, bl2s, lengths = beam_bar_lengths(diameters, clear_span, es_width, 0, beam_depth, 0, num_supports=1)
+                                for d, bl1, bl2, length in zip(diameters, bl1s, bl2s, lengths):
                                     theLoop(length, results, choice, clear_span, bl1, bl2, d, beam_num)
                                 break
 
                             elif quant_end_supp == 2:
                                 es_width1 = get_input("Enter the width of end support 1(mm): ")
                                 es_width2 = get_input("Enter the width of end support 2(mm): ")
-                                types_bars = get_input("Enter the number of bar diameters you want to input(mm): ")
-                                for i in range(types_bars):
-                                    d = get_input(f"Enter the diameter of bar {i+1}(mm): ")
-                                    bl1 = bend_length(d, es_width1)
-                                    bl2 = bend_length(d, es_width2)
-                                    length = flow1(d, clear_span, es_width1, es_width2, beam_depth, bl1, bl2)
+                                types_bars = get_input("Enter the number of bar diameters you want to input(mm): ", int)
+                                diameters = get_diameters(types_bars, "Enter the diameter of bar {}(mm): ")
+                                bl1s, bl2s, lengths = beam_bar_lengths(diameters, clear_span, es_width1, es_width2, beam_depth, beam_depth, num_supports=2)
+                                for d, bl1, bl2, length in zip(diameters, bl1s, bl2s, lengths):
                                     theLoop(length, results, choice, clear_span, bl1, bl2, d, beam_num)
                                 break
                             
@@ -120,11 +128,9 @@ def main():
                         
                         else:
                             types_bars = get_input("Enter number of bar diameters you want to input: ", int, allow_back=True)
-                            for i in range(types_bars):
-                                d = get_input(f"Enter the diameter of bar {i+1} (mm) : ")
-                                bl1 = bend_length(d, es_width1)
-                                bl2 = bend_length(d, es_width2)
-                                length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
+                            diameters = get_diameters(types_bars, "Enter the diameter of bar {} (mm) : ")
+                            bl1s, bl2s, lengths = beam_bar_lengths(diameters, clear_span, num_supports=0)
+                            for d, bl1, bl2, length in zip(diameters, bl1s, bl2s, lengths):
                                 theLoop(length, results, choice, clear_span, bl1, bl2, d, beam_num)
                             break
 
@@ -164,31 +170,46 @@ def main():
                         break
             
             elif choice == "4":
-                stirrup_flow()
+                stirrup_flow(results)
 
             elif choice == "5":
-                slab_flow()
+                slab_flow(results)
                 
-            # After each result is added, update the PDF
-            field_order = ["type", "beam no.",  "bend length1", "bend length2", "quantity", "length per bar"]
-            field_names = ["Beam Type", "Beam No.","Bend len 1", "Bend len 2", "quantity", "Cutting-length"]
-            write_pdf(results, pdf_path, field_order, field_names, group_key="d", title_prefix="(Diff spacing) Bar dia")
+            # After each result is added, append the new results to the PDF
+            if len(results) > written:
+                field_order = ["type", "beam_num", "bl1", "bl2", "quantity", "length"]
+                field_names = ["Beam Type", "Beam No.","Bend len 1", "Bend len 2", "quantity", "Cutting-length"]
+                write_pdf(results[written:], pdf_path, field_order, field_names, group_key="d", title_prefix="(Diff spacing) Bar dia", append=True)
+                written = len(results)
+                project.flush()
 
         # Summary
         print("\nSummary of cutting lengths:\n")
-        field_order = ["type", "beam no.", "bend length1", "bend length2", "quantity", "length per bar"]
+        field_order = ["type", "beam_num", "bl1", "bl2", "quantity", "length"]
         field_names = ["Beam Type", "Beam No.", "Bend len 1", "Bend len 2", "quantity", "Cutting-length"]
         group_by_field(results, group_key="d", field_order=field_order, field_names=field_names, title_prefix="(Diff spacing) Bar dia")
+        print_summary(results, by=("type", "d"), title="Totals by type and diameter")
+        print_totals(results.totals)
+        print_cutting_plans(results)
+        write_totals_pdf(results.totals, pdf_path)
 
     except KeyboardInterrupt:
         print("\n\nCtrl+C detected. Saving current progress and exiting...")
         if results and pdf_path:
-            field_order = ["type", "beam no.",  "bend length1", "bend length2", "quantity", "length per bar"]
+            field_order = ["type", "beam_num", "bl1", "bl2", "quantity", "length"]
             field_names = ["Beam Type", "Beam No.","Bend len 1", "Bend len 2", "quantity", "Cutting-length"]
             group_by_field(results, group_key="d", field_order=field_order, field_names=field_names, title_prefix="(Diff spacing) Bar dia")
-            write_pdf(results, pdf_path, field_order, field_names, group_key="d", title_prefix="(Diff spacing) Bar dia")
+            if len(results) > written:
+                write_pdf(results[written:], pdf_path, field_order, field_names, group_key="d", title_prefix="(Diff spacing) Bar dia", append=True)
+            print_totals(results.totals)
+            write_totals_pdf(results.totals, pdf_path)
             print(f"Results saved to {pdf_path}")
         print("Thank you for using the software.")
+    finally:
+        if project is not None:
+            project.close()
 
 if __name__ == "__main__":
+    from profiling import enable_from_argv
+    enable_from_argv(sys.argv[1:])
     main()
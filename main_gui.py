@@ -1,18 +1,75 @@
 import sys
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
-    QListWidget, QStackedWidget, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox, QSpinBox, QFormLayout, QCheckBox
+    QListWidget, QStackedWidget, QTableView, QHeaderView, QFileDialog, QMessageBox, QSpinBox, QFormLayout, QCheckBox,
+    QProgressBar, QDialog, QDialogButtonBox, QComboBox
 )
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QColor
-from collections import defaultdict
+from PySide6.QtCore import Qt, QEvent, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QKeySequence, QUndoCommand, QUndoStack
 import os
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from stirrups import different_spacing, same_spacing
-import math
+import threading
+from dataclasses import fields
+from calc import (BeamSpec, CantileverSpec, StirrupSpec, StirrupZonesSpec, SlabSpec, TwoWaySlabSpec, compute,
+                  parse_zones, zones_text, TWO_WAY_TYPES)
+import profiling
+from bulk_entry import DIAMETER_COLUMNS, KINDS, compute_entries, form_members, parse_table
+from entry_model import EntryModel
+from results_model import BULK_ROWS, ResultsModel
+from records import ResultStore
+
+PROJECT_FILTER = "CivilCal project (*.civilcal);;All files (*)"
+AUTOSAVE = "untitled.civilcal"      # in pdfs/: the project of a window opened without one
+GRID_FILTER = "Floor grid (*.json);;All files (*)"
+
+class EntryTable(QTableView):
+    """
+    A table over an EntryModel: Ctrl+V pastes spreadsheet rows at the current
+    cell, Ctrl+C copies the selection as tab separated text, Delete blanks the
+    selected cells.
+    """
+    EDIT_KEYS = (QKeySequence.StandardKey.Paste, QKeySequence.StandardKey.Copy, QKeySequence.StandardKey.Delete)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        model.setParent(self)
+        self.setModel(model)
+
+    def event(self, event):
+        # these keys belong to the grid, not to the window's shortcuts (Delete removes results there)
+        if event.type() == QEvent.Type.ShortcutOverride and any(event.matches(k) for k in self.EDIT_KEYS):
+            event.accept()
+            return True
+        return super().event(event)
+
+    def keyPressEvent(self, event):
+        if self.state() == QTableView.State.EditingState:
+            super().keyPressEvent(event)
+        elif event.matches(QKeySequence.StandardKey.Paste):
+            index = self.currentIndex()
+            table = parse_table(QApplication.clipboard().text())
+            self.model().paste(max(index.row(), 0), max(index.column(), 0), table)
+        elif event.matches(QKeySequence.StandardKey.Copy):
+            indexes = self.selectedIndexes()
+            if indexes:
+                rows = range(min(i.row() for i in indexes), max(i.row() for i in indexes) + 1)
+                cols = range(min(i.column() for i in indexes), max(i.column() for i in indexes) + 1)
+                model = self.model()
+                QApplication.clipboard().setText("\n".join(
+                    "\t".join(model.data(model.index(r, c)) for c in cols) for r in rows))
+        elif event.matches(QKeySequence.StandardKey.Delete) or event.key() == Qt.Key.Key_Backspace:
+            self.model().clear_cells(self.selectedIndexes())
+        else:
+            super().keyPressEvent(event)
+
+def shown_text(edit):
+    """An edit's text, or blank while the form hides it."""
+    return "" if edit.isHidden() else edit.text()
+
+def diameter_table():
+    """The diameter/quantity table of a single-member form; it grows as rows are typed or pasted."""
+    table = EntryTable(EntryModel(DIAMETER_COLUMNS, ["Diameter (mm)", "Qty"]))
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    return table
 
 class TopSteelInput(QWidget):
     def __init__(self, parent=None):
@@ -34,14 +91,7 @@ class TopSteelInput(QWidget):
         self.es_width2_edit = QLineEdit()
         self.beam_depth1_edit = QLineEdit()
         self.beam_depth2_edit = QLineEdit()
-        self.num_bars_spin = QSpinBox()
-        self.num_bars_spin.setMinimum(1)
-        self.num_bars_spin.setMaximum(20)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        self.bar_diam_layout = QVBoxLayout()
-        self.bar_diam_widget = QWidget()
-        self.bar_diam_widget.setLayout(self.bar_diam_layout)
+        self.bar_table = diameter_table()
 
         form.addRow("Beam Number:", self.beam_num_edit)
         form.addRow(self.extended_checkbox)
@@ -52,45 +102,17 @@ class TopSteelInput(QWidget):
         form.addRow("End Support Width 2 (mm):", self.es_width2_edit)
         form.addRow("Beam Depth of End Support 1 (mm):", self.beam_depth1_edit)
         form.addRow("Beam Depth of End Support 2 (mm):", self.beam_depth2_edit)
-        form.addRow("Number of Bar Diameters:", self.num_bars_spin)
         layout.addLayout(form)
         layout.addWidget(QLabel("Bar Diameters (mm) and Quantities:"))
-        layout.addWidget(self.bar_diam_widget)
-        layout.addStretch()
+        layout.addWidget(self.bar_table)
         self.setLayout(layout)
 
-        self.num_bars_spin.valueChanged.connect(self.update_bar_diam_inputs)
         self.extended_checkbox.stateChanged.connect(self.update_extended_fields)
         self.end_support_checkbox.stateChanged.connect(self.update_end_support_fields)
         self.num_supports_spin.valueChanged.connect(self.update_end_support_fields)
-        self.update_bar_diam_inputs()
         self.update_extended_fields()
         self.update_end_support_fields()
 
-    def update_bar_diam_inputs(self):
-        for i in reversed(range(self.bar_diam_layout.count())):
-            widget = self.bar_diam_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        for i in range(self.num_bars_spin.value()):
-            row = QHBoxLayout()
-            edit = QLineEdit()
-            edit.setPlaceholderText(f"Diameter for bar {i+1}")
-            qty = QSpinBox()
-            qty.setMinimum(1)
-            qty.setMaximum(1000)
-            qty.setValue(1)
-            row.addWidget(edit)
-            row.addWidget(QLabel("Qty:"))
-            row.addWidget(qty)
-            container = QWidget()
-            container.setLayout(row)
-            self.bar_diam_layout.addWidget(container)
-            self.bar_diam_edits.append(edit)
-            self.bar_qty_spins.append(qty)
-
     def update_extended_fields(self):
         if self.extended_checkbox.isChecked():
             self.end_support_checkbox.hide()
@@ -123,23 +145,19 @@ class TopSteelInput(QWidget):
                 self.beam_depth2_edit.hide()
 
     def get_inputs(self):
-        try:
-            beam_num = self.beam_num_edit.text().strip()
-            extended = self.extended_checkbox.isChecked()
-            end_support = self.end_support_checkbox.isChecked()
-            num_supports = self.num_supports_spin.value()
-            clear_span = float(self.clear_span_edit.text())
-            es_width1 = float(self.es_width1_edit.text()) if self.es_width1_edit.isVisible() and self.es_width1_edit.text().strip() else 0
-            es_width2 = float(self.es_width2_edit.text()) if self.es_width2_edit.isVisible() and self.es_width2_edit.text().strip() else 0
-            beam_depth1 = float(self.beam_depth1_edit.text() if self.beam_depth1_edit.isVisible() and self.es_width1_edit.text().strip else 0)
-            beam_depth2 = float(self.beam_depth2_edit.text() if self.beam_depth2_edit.isVisible() and self.es_width2_edit.text().strip else 0)
-            diam_qty = []
-            for edit, qty in zip(self.bar_diam_edits, self.bar_qty_spins):
-                if edit.text().strip():
-                    diam_qty.append((float(edit.text()), qty.value()))
-            return beam_num, extended, end_support, num_supports, clear_span, es_width1, es_width2,beam_depth1, beam_depth2, diam_qty
-        except Exception as e:
-            return None
+        """The form's inputs; raises ValueError saying which fields are wrong."""
+        extended = self.extended_checkbox.isChecked()
+        end_support = self.end_support_checkbox.isChecked()
+        num_supports = self.num_supports_spin.value()
+        values, diam_qty = form_members("top", dict(
+            beam_num=self.beam_num_edit.text(), clear_span=self.clear_span_edit.text(),
+            num_supports=str(2 if extended else num_supports if end_support else 0),
+            es_width1=shown_text(self.es_width1_edit), es_width2=shown_text(self.es_width2_edit),
+            beam_depth1=shown_text(self.beam_depth1_edit), beam_depth2=shown_text(self.beam_depth2_edit)),
+            self.bar_table.model().cells())
+        return (values["beam_num"], extended, end_support, num_supports, values["clear_span"], values["es_width1"],
+                values["es_width2"], values["beam_depth1"], values["beam_depth2"], diam_qty)
+
 
 class BottomSteelInput(QWidget):
     """
@@ -167,14 +185,7 @@ class BottomSteelInput(QWidget):
         self.beam_depth1_edit = QLineEdit()
         self.beam_depth2_edit = QLineEdit()
         self.beam_depth2_edit = QLineEdit()
-        self.num_bars_spin = QSpinBox()
-        self.num_bars_spin.setMinimum(1)
-        self.num_bars_spin.setMaximum(20)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        self.bar_diam_layout = QVBoxLayout()
-        self.bar_diam_widget = QWidget()
-        self.bar_diam_widget.setLayout(self.bar_diam_layout)
+        self.bar_table = diameter_table()
 
         form.addRow("Beam Number:", self.beam_num_edit)
         form.addRow(self.extended_checkbox)
@@ -185,45 +196,17 @@ class BottomSteelInput(QWidget):
         form.addRow("End Support Width 2 (mm):", self.es_width2_edit)
         form.addRow("Beam Depth of End Support 1 (mm):", self.beam_depth1_edit)
         form.addRow("Beam Depth of End Support 2 (mm):", self.beam_depth2_edit)
-        form.addRow("Number of Bar Diameters:", self.num_bars_spin)
         layout.addLayout(form)
         layout.addWidget(QLabel("Bar Diameters (mm) and Quantities:"))
-        layout.addWidget(self.bar_diam_widget)
-        layout.addStretch()
+        layout.addWidget(self.bar_table)
         self.setLayout(layout)
 
-        self.num_bars_spin.valueChanged.connect(self.update_bar_diam_inputs)
         self.extended_checkbox.stateChanged.connect(self.update_extended_fields)
         self.end_support_checkbox.stateChanged.connect(self.update_end_support_fields)
         self.num_supports_spin.valueChanged.connect(self.update_end_support_fields)
-        self.update_bar_diam_inputs()
         self.update_extended_fields()
         self.update_end_support_fields()
 
-    def update_bar_diam_inputs(self):
-        for i in reversed(range(self.bar_diam_layout.count())):
-            widget = self.bar_diam_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        for i in range(self.num_bars_spin.value()):
-            row = QHBoxLayout()
-            edit = QLineEdit()
-            edit.setPlaceholderText(f"Diameter for bar {i+1}")
-            qty = QSpinBox()
-            qty.setMinimum(1)
-            qty.setMaximum(1000)
-            qty.setValue(1)
-            row.addWidget(edit)
-            row.addWidget(QLabel("Qty:"))
-            row.addWidget(qty)
-            container = QWidget()
-            container.setLayout(row)
-            self.bar_diam_layout.addWidget(container)
-            self.bar_diam_edits.append(edit)
-            self.bar_qty_spins.append(qty)
-
     def update_extended_fields(self):
         if self.extended_checkbox.isChecked():
             self.end_support_checkbox.hide()
@@ -256,23 +239,19 @@ class BottomSteelInput(QWidget):
                 self.beam_depth2_edit.hide()
 
     def get_inputs(self):
-        try:
-            beam_num = self.beam_num_edit.text().strip()
-            extended = self.extended_checkbox.isChecked()
-            end_support = self.end_support_checkbox.isChecked()
-            num_supports = self.num_supports_spin.value()
-            clear_span = float(self.clear_span_edit.text())
-            es_width1 = float(self.es_width1_edit.text()) if self.es_width1_edit.isVisible() and self.es_width1_edit.text().strip() else 0
-            es_width2 = float(self.es_width2_edit.text()) if self.es_width2_edit.isVisible() and self.es_width2_edit.text().strip() else 0
-            beam_depth1 = float(self.beam_depth1_edit.text() if self.beam_depth1_edit.isVisible() and self.es_width1_edit.text().strip else 0)
-            beam_depth2 = float(self.beam_depth2_edit.text() if self.beam_depth2_edit.isVisible() and self.es_width2_edit.text().strip else 0)
-            diam_qty = []
-            for edit, qty in zip(self.bar_diam_edits, self.bar_qty_spins):
-                if edit.text().strip():
-                    diam_qty.append((float(edit.text()), qty.value()))
-            return beam_num, extended, end_support, num_supports, clear_span, es_width1, es_width2,beam_depth1, beam_depth2, diam_qty
-        except Exception as e:
-            return None
+        """The form's inputs; raises ValueError saying which fields are wrong."""
+        extended = self.extended_checkbox.isChecked()
+        end_support = self.end_support_checkbox.isChecked()
+        num_supports = self.num_supports_spin.value()
+        values, diam_qty = form_members("bottom", dict(
+            beam_num=self.beam_num_edit.text(), clear_span=self.clear_span_edit.text(),
+            num_supports=str(2 if extended else num_supports if end_support else 0),
+            es_width1=shown_text(self.es_width1_edit), es_width2=shown_text(self.es_width2_edit),
+            beam_depth1=shown_text(self.beam_depth1_edit), beam_depth2=shown_text(self.beam_depth2_edit)),
+            self.bar_table.model().cells())
+        return (values["beam_num"], extended, end_support, num_supports, values["clear_span"], values["es_width1"],
+                values["es_width2"], values["beam_depth1"], values["beam_depth2"], diam_qty)
+
 
 class StirrupsInput(QWidget):
     def __init__(self, parent=None):
@@ -300,97 +279,65 @@ class StirrupsInput(QWidget):
         # Spacing type
         self.spacing_type_spin = QSpinBox()
         self.spacing_type_spin.setMinimum(1)
-        self.spacing_type_spin.setMaximum(2)
+        self.spacing_type_spin.setMaximum(3)
         self.spacing_type_spin.setValue(1)
-        # 1: Uniform, 2: Different (L/4, L/2)
+        # 1: Uniform, 2: Different (L/4, L/2), 3: Zones
         # Spacing fields
         self.spacing_edit = QLineEdit()
         self.l4_spacing_edit = QLineEdit()
         self.l2_spacing_edit = QLineEdit()
-        self.num_bars_spin = QSpinBox()
-        self.num_bars_spin.setMinimum(1)
-        self.num_bars_spin.setMaximum(20)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        self.bar_diam_layout = QVBoxLayout()
-        self.bar_diam_widget = QWidget()
-        self.bar_diam_widget.setLayout(self.bar_diam_layout)
+        self.zones_edit = QLineEdit()
+        self.zones_edit.setPlaceholderText("start:end@spacing, e.g. 0:900@100 0:0@150 -900:0@100")
+        self.bar_table = diameter_table()
 
         form.addRow("Stirrup Type (1: Two, 2: Four, 3: Six legged):", self.type_spin)
         form.addRow("Beam Number:", self.beam_num_edit)
         form.addRow("Clear Span (mm):", self.clear_span_edit)
         form.addRow("Beam Width (mm):", self.beam_width_edit)
         form.addRow("Beam Depth (mm):", self.beam_depth_edit)
-        form.addRow("Spacing Type (1: Uniform, 2: Different):", self.spacing_type_spin)
+        form.addRow("Spacing Type (1: Uniform, 2: Different, 3: Zones):", self.spacing_type_spin)
         form.addRow("Uniform Spacing (mm):", self.spacing_edit)
         form.addRow("L/4 Spacing (mm):", self.l4_spacing_edit)
         form.addRow("L/2 Spacing (mm):", self.l2_spacing_edit)
-        form.addRow("Number of Bar Diameters:", self.num_bars_spin)
+        form.addRow("Zones (mm):", self.zones_edit)
         layout.addLayout(form)
         layout.addWidget(QLabel("Bar Diameters (mm) and Quantities:"))
-        layout.addWidget(self.bar_diam_widget)
-        layout.addStretch()
+        layout.addWidget(self.bar_table)
         self.setLayout(layout)
         self.spacing_type_spin.valueChanged.connect(self.update_spacing_fields)
-        self.num_bars_spin.valueChanged.connect(self.update_bar_diam_inputs)
         self.update_spacing_fields()
-        self.update_bar_diam_inputs()
 
     def update_spacing_fields(self):
-        if self.spacing_type_spin.value() == 1:
-            self.spacing_edit.show()
-            self.l4_spacing_edit.hide()
-            self.l2_spacing_edit.hide()
-        else:
-            self.spacing_edit.hide()
-            self.l4_spacing_edit.show()
-            self.l2_spacing_edit.show()
-
-    def update_bar_diam_inputs(self):
-        for i in reversed(range(self.bar_diam_layout.count())):
-            widget = self.bar_diam_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        for i in range(self.num_bars_spin.value()):
-            row = QHBoxLayout()
-            edit = QLineEdit()
-            edit.setPlaceholderText(f"Diameter for bar {i+1}")
-            qty = QSpinBox()
-            qty.setMinimum(1)
-            qty.setMaximum(1000)
-            qty.setValue(1)
-            row.addWidget(edit)
-            row.addWidget(QLabel("Qty:"))
-            row.addWidget(qty)
-            container = QWidget()
-            container.setLayout(row)
-            self.bar_diam_layout.addWidget(container)
-            self.bar_diam_edits.append(edit)
-            self.bar_qty_spins.append(qty)
+        spacing_type = self.spacing_type_spin.value()
+        self.spacing_edit.setVisible(spacing_type == 1)
+        self.l4_spacing_edit.setVisible(spacing_type == 2)
+        self.l2_spacing_edit.setVisible(spacing_type == 2)
+        self.zones_edit.setVisible(spacing_type == 3)
 
     def get_inputs(self):
-        try:
-            type_stirrup = str(self.type_spin.value())
-            beam_num = self.beam_num_edit.text().strip()
-            clear_span = float(self.clear_span_edit.text())
-            beam_width = float(self.beam_width_edit.text())
-            beam_depth = float(self.beam_depth_edit.text())
-            spacing_type = self.spacing_type_spin.value()
-            diam_qty = []
-            for edit, qty in zip(self.bar_diam_edits, self.bar_qty_spins):
-                if edit.text().strip():
-                    diam_qty.append((float(edit.text()), qty.value()))
-            if spacing_type == 1:
-                spacing = float(self.spacing_edit.text())
-                return dict(type_stirrup=type_stirrup, beam_num=beam_num, clear_span=clear_span, beam_width=beam_width, beam_depth=beam_depth, diam_qty=diam_qty, spacing_type='uniform', spacing=spacing)
-            else:
-                l4_spacing = float(self.l4_spacing_edit.text())
-                l2_spacing = float(self.l2_spacing_edit.text())
-                return dict(type_stirrup=type_stirrup, beam_num=beam_num, clear_span=clear_span, beam_width=beam_width, beam_depth=beam_depth, diam_qty=diam_qty, spacing_type='diff', l4_spacing=l4_spacing, l2_spacing=l2_spacing)
-        except Exception:
-            return None
+        """The form's inputs; raises ValueError saying which fields are wrong."""
+        spacing_type = self.spacing_type_spin.value()
+        if spacing_type == 2 and not (self.l4_spacing_edit.text().strip() or self.l2_spacing_edit.text().strip()):
+            raise ValueError("L/4 spacing and L/2 spacing must be > 0")
+        if spacing_type == 3 and not self.zones_edit.text().strip():
+            raise ValueError("Zones must be given as start:end@spacing ...")
+        values, diam_qty = form_members("stirrup", dict(
+            beam_num=self.beam_num_edit.text(), stirrup_type=str(self.type_spin.value()),
+            clear_span=self.clear_span_edit.text(), beam_width=self.beam_width_edit.text(),
+            beam_depth=self.beam_depth_edit.text(), spacing=self.spacing_edit.text() if spacing_type == 1 else "",
+            l4_spacing=self.l4_spacing_edit.text() if spacing_type == 2 else "",
+            l2_spacing=self.l2_spacing_edit.text() if spacing_type == 2 else "",
+            zones=self.zones_edit.text() if spacing_type == 3 else ""), self.bar_table.model().cells())
+        inputs = dict(type_stirrup=values["stirrup_type"], beam_num=values["beam_num"], clear_span=values["clear_span"],
+                      beam_width=values["beam_width"], beam_depth=values["beam_depth"], diam_qty=diam_qty)
+        if spacing_type == 1:
+            inputs.update(spacing_type='uniform', spacing=values["spacing"])
+        elif spacing_type == 3:
+            inputs.update(spacing_type='zones', zones=values["zones"])
+        else:
+            inputs.update(spacing_type='diff', l4_spacing=values["l4_spacing"], l2_spacing=values["l2_spacing"])
+        return inputs
+
 
 class SlabInput(QWidget):
     def __init__(self, parent=None):
@@ -404,83 +351,73 @@ class SlabInput(QWidget):
         self.slab_type_spin.setMinimum(1)
         self.slab_type_spin.setMaximum(2)
         self.slab_type_spin.setValue(1)
-        self.slab_type_spin.setDisabled(True)
         self.x_edit = QLineEdit()
         self.y_edit = QLineEdit()
         self.a_edit = QLineEdit()
         self.b_edit = QLineEdit()
+        self.a2_edit = QLineEdit()
+        self.b2_edit = QLineEdit()
         self.beam_width1_edit = QLineEdit()
         self.beam_width2_edit = QLineEdit()
+        self.beam_width3_edit = QLineEdit()
+        self.beam_width4_edit = QLineEdit()
         self.spacing_mainBar_edit = QLineEdit()
         self.spacing_distBar_edit = QLineEdit()
-        self.num_bars_spin = QSpinBox()
-        self.num_bars_spin.setMinimum(1)
-        self.num_bars_spin.setMaximum(20)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        self.bar_diam_layout = QVBoxLayout()
-        self.bar_diam_widget = QWidget()
-        self.bar_diam_widget.setLayout(self.bar_diam_layout)
-
-        form.addRow("Slab Type (1: One-way):", self.slab_type_spin)
+        self.spacing_edge_edit = QLineEdit()
+        self.spacing_edge_edit.setPlaceholderText("same as middle strip")
+        self.two_way_edits = [self.a2_edit, self.b2_edit, self.beam_width3_edit, self.beam_width4_edit, self.spacing_edge_edit]
+        self.bar_table = diameter_table()
+
+        form.addRow("Slab Type (1: One-way, 2: Two-way):", self.slab_type_spin)
         form.addRow("Breadth x (mm):", self.x_edit)
         form.addRow("Length y (mm):", self.y_edit)
         form.addRow("Adjacent span a (mm):", self.a_edit)
         form.addRow("Adjacent span b (mm):", self.b_edit)
+        form.addRow("Adjacent span a2, long bars (mm):", self.a2_edit)
+        form.addRow("Adjacent span b2, long bars (mm):", self.b2_edit)
         form.addRow("Beam Width 1 (mm):", self.beam_width1_edit)
         form.addRow("Beam Width 2 (mm):", self.beam_width2_edit)
+        form.addRow("Beam Width 3 (mm):", self.beam_width3_edit)
+        form.addRow("Beam Width 4 (mm):", self.beam_width4_edit)
         form.addRow("Spacing Main Bars (mm):", self.spacing_mainBar_edit)
         form.addRow("Spacing Dist Bars (mm):", self.spacing_distBar_edit)
-        form.addRow("Number of Bar Diameters:", self.num_bars_spin)
+        form.addRow("Spacing Edge Strips (mm):", self.spacing_edge_edit)
+        self.form = form
         layout.addLayout(form)
         layout.addWidget(QLabel("Bar Diameters (mm) and Quantities:"))
-        layout.addWidget(self.bar_diam_widget)
-        layout.addStretch()
+        layout.addWidget(self.bar_table)
         self.setLayout(layout)
-        self.num_bars_spin.valueChanged.connect(self.update_bar_diam_inputs)
-        self.update_bar_diam_inputs()
-
-    def update_bar_diam_inputs(self):
-        for i in reversed(range(self.bar_diam_layout.count())):
-            widget = self.bar_diam_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        for i in range(self.num_bars_spin.value()):
-            row = QHBoxLayout()
-            edit = QLineEdit()
-            edit.setPlaceholderText(f"Diameter for bar {i+1}")
-            qty = QSpinBox()
-            qty.setMinimum(1)
-            qty.setMaximum(1000)
-            qty.setValue(1)
-            row.addWidget(edit)
-            row.addWidget(QLabel("Qty:"))
-            row.addWidget(qty)
-            container = QWidget()
-            container.setLayout(row)
-            self.bar_diam_layout.addWidget(container)
-            self.bar_diam_edits.append(edit)
-            self.bar_qty_spins.append(qty)
+        self.slab_type_spin.valueChanged.connect(self.update_slab_type)
+        self.update_slab_type()
+
+    def update_slab_type(self):
+        """Two-way slabs have bars both ways, so they need the second pair of spans and beams."""
+        two_way = self.slab_type_spin.value() == 2
+        for edit in self.two_way_edits:
+            self.form.setRowVisible(edit, two_way)
+        self.form.labelForField(self.spacing_mainBar_edit).setText(
+            "Spacing Short-span Bars (mm):" if two_way else "Spacing Main Bars (mm):")
+        self.form.labelForField(self.spacing_distBar_edit).setText(
+            "Spacing Long-span Bars (mm):" if two_way else "Spacing Dist Bars (mm):")
 
     def get_inputs(self):
-        try:
-            x = float(self.x_edit.text())
-            y = float(self.y_edit.text())
-            a = float(self.a_edit.text())
-            b = float(self.b_edit.text())
-            beam_width1 = float(self.beam_width1_edit.text())
-            beam_width2 = float(self.beam_width2_edit.text())
-            spacing_mainBar = float(self.spacing_mainBar_edit.text())
-            spacing_distBar = float(self.spacing_distBar_edit.text())
-            diam_qty = []
-            for edit, qty in zip(self.bar_diam_edits, self.bar_qty_spins):
-                if edit.text().strip():
-                    diam_qty.append((float(edit.text()), qty.value()))
-            return dict(x=x, y=y, a=a, b=b, beam_width1=beam_width1, beam_width2=beam_width2, spacing_mainBar=spacing_mainBar, spacing_distBar=spacing_distBar, diam_qty=diam_qty)
-        except Exception:
-            return None
+        """The form's inputs; raises ValueError saying which fields are wrong."""
+        two_way = self.slab_type_spin.value() == 2
+        values = dict(x=self.x_edit.text(), y=self.y_edit.text(), a=self.a_edit.text(), b=self.b_edit.text(),
+                      beam_width1=self.beam_width1_edit.text(), beam_width2=self.beam_width2_edit.text())
+        if two_way:
+            values.update(a2=self.a2_edit.text(), b2=self.b2_edit.text(), beam_width3=self.beam_width3_edit.text(),
+                          beam_width4=self.beam_width4_edit.text(), spacing_short=self.spacing_mainBar_edit.text(),
+                          spacing_long=self.spacing_distBar_edit.text(), spacing_edge=self.spacing_edge_edit.text())
+        else:
+            values.update(spacing_main=self.spacing_mainBar_edit.text(), spacing_dist=self.spacing_distBar_edit.text())
+        values, diam_qty = form_members("twoway" if two_way else "slab", values, self.bar_table.model().cells())
+        inputs = dict(slab_type=self.slab_type_spin.value(), diam_qty=diam_qty,
+                      spacing_mainBar=values.pop("spacing_short" if two_way else "spacing_main"),
+                      spacing_distBar=values.pop("spacing_long" if two_way else "spacing_dist"))
+        inputs.update(values)
+        return inputs
+
 
 class CantileverInput(QWidget):
     def __init__(self, parent=None):
@@ -495,54 +432,19 @@ class CantileverInput(QWidget):
         self.inner_span_edit = QLineEdit()
         self.canti_span_edit = QLineEdit()
         self.beam_num_edit = QLineEdit()
-        self.num_bars_spin = QSpinBox()
-        self.num_bars_spin.setMinimum(1)
-        self.num_bars_spin.setMaximum(20)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        self.bar_diam_layout = QVBoxLayout()
-        self.bar_diam_widget = QWidget()
-        self.bar_diam_widget.setLayout(self.bar_diam_layout)
+        self.bar_table = diameter_table()
         form.addRow(self.extended_checkbox)
         form.addRow("Full Span (mm):", self.full_span_edit)
         form.addRow("Inner Span (mm):", self.inner_span_edit)
         form.addRow("Cantilever Span (mm):", self.canti_span_edit)
         form.addRow("Beam Number:", self.beam_num_edit)
-        form.addRow("Number of Bar Diameters:", self.num_bars_spin)
         layout.addLayout(form)
         layout.addWidget(QLabel("Bar Diameters (mm) and Quantities:"))
-        layout.addWidget(self.bar_diam_widget)
-        layout.addStretch()
+        layout.addWidget(self.bar_table)
         self.setLayout(layout)
-        self.num_bars_spin.valueChanged.connect(self.update_bar_diam_inputs)
         self.extended_checkbox.stateChanged.connect(self.update_extended_fields)
-        self.update_bar_diam_inputs()
         self.update_extended_fields()
 
-    def update_bar_diam_inputs(self):
-        for i in reversed(range(self.bar_diam_layout.count())):
-            widget = self.bar_diam_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        self.bar_diam_edits = []
-        self.bar_qty_spins = []
-        for i in range(self.num_bars_spin.value()):
-            row = QHBoxLayout()
-            edit = QLineEdit()
-            edit.setPlaceholderText(f"Diameter for bar {i+1}")
-            qty = QSpinBox()
-            qty.setMinimum(1)
-            qty.setMaximum(1000)
-            qty.setValue(1)
-            row.addWidget(edit)
-            row.addWidget(QLabel("Qty:"))
-            row.addWidget(qty)
-            container = QWidget()
-            container.setLayout(row)
-            self.bar_diam_layout.addWidget(container)
-            self.bar_diam_edits.append(edit)
-            self.bar_qty_spins.append(qty)
-
     def update_extended_fields(self):
         if self.extended_checkbox.isChecked():
             self.full_span_edit.show()
@@ -554,27 +456,151 @@ class CantileverInput(QWidget):
             self.canti_span_edit.show()
 
     def get_inputs(self):
+        """The form's inputs; raises ValueError saying which fields are wrong."""
+        extended = self.extended_checkbox.isChecked()
+        values, diam_qty = form_members("cantilever", dict(
+            beam_num=self.beam_num_edit.text(), full_span=self.full_span_edit.text() if extended else "",
+            inner_span=self.inner_span_edit.text(), canti_span=self.canti_span_edit.text()),
+            self.bar_table.model().cells())
+        return extended, values["full_span"], values["inner_span"], values["canti_span"], values["beam_num"], diam_qty
+
+
+class BulkEntryInput(QWidget):
+    """
+    Many members of one type at once: a row per member and diameter, with the
+    columns of a batch schedule (see bulk_entry.py), typed or pasted from a
+    spreadsheet.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        form = QFormLayout()
+        self.kind_combo = QComboBox()
+        self.kind_combo.addItems(list(KINDS))
+        form.addRow("Member Type:", self.kind_combo)
+        layout.addLayout(form)
+        hint = QLabel("Paste rows from a spreadsheet with Ctrl+V, or type them in. A header row of these column "
+                      "names puts pasted columns in place. Blank cells count as 0, a blank quantity as 1.")
+        hint.setWordWrap(True)
+        layout.addWidget(hint)
+        self.table = EntryTable(EntryModel(KINDS[self.kind_combo.currentText()]))
+        layout.addWidget(self.table)
+        self.clear_btn = QPushButton("Clear Rows")
+        layout.addWidget(self.clear_btn)
+        self.setLayout(layout)
+        self.kind_combo.currentTextChanged.connect(self.update_columns)
+        self.clear_btn.clicked.connect(lambda: self.table.model().clear())
+
+    def update_columns(self, kind):
+        self.table.model().set_columns(KINDS[kind])
+
+    def kind(self):
+        return self.kind_combo.currentText()
+
+class ExportSignals(QObject):
+    progress = Signal(str, int)
+    finished = Signal(str, bool, str)
+
+class ExportTask(QRunnable):
+    """
+    Writes one export (PDF or CSV) from a snapshot of the results on a pool thread.
+    finished carries the output path on success, the error text otherwise.
+    """
+    def __init__(self, kind, writer, results, path, cancel_event, totals=None):
+        super().__init__()
+        self.kind = kind
+        self.writer = writer
+        self.results = results
+        self.totals = totals
+        self.path = path
+        self.cancel_event = cancel_event
+        self.signals = ExportSignals()
+
+    def run(self):
+        from export import ExportCancelled, export_rows
         try:
-            extended = self.extended_checkbox.isChecked()
-            full_span = float(self.full_span_edit.text()) if self.full_span_edit.text().strip() else 0
-            inner_span = float(self.inner_span_edit.text()) if self.inner_span_edit.text().strip() else 0
-            canti_span = float(self.canti_span_edit.text()) if self.canti_span_edit.text().strip() else 0
-            beam_num = self.beam_num_edit.text().strip()
-            diam_qty = []
-            for edit, qty in zip(self.bar_diam_edits, self.bar_qty_spins):
-                if edit.text().strip():
-                    diam_qty.append((float(edit.text()), qty.value()))
-            return extended, full_span, inner_span, canti_span, beam_num, diam_qty
-        except Exception:
-            return None
+            data = export_rows(self.results, self.totals)
+            self.writer(data, self.path,
+                        progress=lambda pct: self.signals.progress.emit(self.kind, pct),
+                        cancelled=self.cancel_event.is_set)
+            self.signals.finished.emit(self.kind, True, self.path)
+        except ExportCancelled:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.signals.finished.emit(self.kind, False, "cancelled")
+        except Exception as e:
+            self.signals.finished.emit(self.kind, False, str(e))
+
+class ResultsCommand(QUndoCommand):
+    """Results[start:start + len(old)] replaced by new, both lists of (record, spec); undo swaps them back."""
+    def __init__(self, window, text, start, old, new):
+        super().__init__(text)
+        self.window = window
+        self.start = start
+        self.old = old
+        self.new = new
+
+    def redo(self):
+        self.window.splice_results(self.start, len(self.old), self.new)
+
+    def undo(self):
+        self.window.splice_results(self.start, len(self.new), self.old)
+
+
+class SpecDialog(QDialog):
+    """The inputs of one result - the fields of its calc spec - for editing."""
+    def __init__(self, spec, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Edit Result")
+        self._spec = spec
+        self.edits = {}
+        form = QFormLayout(self)
+        for f in fields(spec):
+            value = getattr(spec, f.name)
+            edit = QLineEdit(zones_text(value) if f.name == "zones" else str(value))
+            form.addRow(f.name.replace("_", " ").capitalize() + ":", edit)
+            self.edits[f.name] = edit
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        form.addRow(buttons)
+
+    def spec(self):
+        """The edited spec; raises ValueError for a number that does not parse."""
+        values = {}
+        for f in fields(self._spec):
+            text = self.edits[f.name].text().strip()
+            if f.name == "zones":
+                values[f.name] = parse_zones(text)
+            else:
+                values[f.name] = text if f.type is str else f.type(text)
+        return type(self._spec)(**values)
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, project_path=None):
         super().__init__()
         self.setWindowTitle("Cutting Length Calculator (GUI)")
         self.resize(900, 600)
-        self.results = []  # Store results as list of dicts
+        self.results = ResultStore()  # columnar store of result records
+        self.project = None           # ProjectStore the results are saved to as they are added
+        self.project_path = None
+        self.undo_stack = QUndoStack(self)
+        self.export_tasks = {}
+        self.export_cancel = None
         self.init_ui()
+        if not project_path:
+            # results are saved from the first one on; a session that ended
+            # without Save & Exit is picked up again from here
+            os.makedirs(os.path.join(os.getcwd(), 'pdfs'), exist_ok=True)
+            project_path = self.autosave_path()
+        self.load_project(project_path)
+
+    def autosave_path(self):
+        return os.path.join(os.getcwd(), 'pdfs', AUTOSAVE)
 
     def init_ui(self):
         main_widget = QWidget()
@@ -585,7 +611,7 @@ class MainWindow(QMainWindow):
         # Sidebar/Menu
         self.menu_list = QListWidget()
         self.menu_list.addItems([
-            "Top Steel", "Bottom Steel", "Cantilever Top Steel", "Stirrups", "Slab"
+            "Top Steel", "Bottom Steel", "Cantilever Top Steel", "Stirrups", "Slab", "Bulk Entry"
         ])
         self.menu_list.setFixedWidth(180)
         self.menu_list.setCurrentRow(0)
@@ -609,18 +635,22 @@ class MainWindow(QMainWindow):
         self.input_stack.addWidget(self.stirrups_input)
         self.input_stack.addWidget(self.slab_input)
         self.input_stack.insertWidget(2, self.cantilever_input)
+        self.bulk_input = BulkEntryInput()
+        self.input_stack.addWidget(self.bulk_input)
         center_layout.addWidget(self.input_stack)
 
         # Results Table
-        self.results_table = QTableWidget(0, 7)
-        """
-        self.results_table.setHorizontalHeaderLabels([
-            "Beam Type", "Beam No.", "Bend len 1", "Bend len 2", "Quantity", "Cutting-length (per bar)", "Weight"
-        ])
-        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        """
+        self.results_model = ResultsModel(self.results, self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.verticalHeader().hide()
+        self.results_model.rowsInserted.connect(self.update_row_spans)
+        self.results_model.modelReset.connect(self.reset_row_spans)
         center_layout.addWidget(QLabel("Results so far:"))
         center_layout.addWidget(self.results_table)
+        self.totals_label = QLabel("Totals: none yet")
+        self.totals_label.setWordWrap(True)
+        center_layout.addWidget(self.totals_label)
 
         # PDF filename input and buttons
         bottom_layout = QHBoxLayout()
@@ -628,278 +658,219 @@ class MainWindow(QMainWindow):
         bottom_layout.addWidget(QLabel("PDF Filename:"))
         self.pdf_filename_edit = QLineEdit("cutting_length_results.pdf")
         bottom_layout.addWidget(self.pdf_filename_edit)
+        self.open_project_btn = QPushButton("Open Project")
+        self.floor_grid_btn = QPushButton("Add Floor Grid")
         self.add_result_btn = QPushButton("Add/Save Result")
         self.generate_pdf_btn = QPushButton("Generate PDF")
         self.save_exit_btn = QPushButton("Save & Exit")
+        bottom_layout.addWidget(self.open_project_btn)
+        bottom_layout.addWidget(self.floor_grid_btn)
         bottom_layout.addWidget(self.add_result_btn)
         bottom_layout.addWidget(self.generate_pdf_btn)
         bottom_layout.addWidget(self.save_exit_btn)
 
+        # Export progress, shown while the PDF/CSV are written in the background
+        export_layout = QHBoxLayout()
+        center_layout.addLayout(export_layout)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.cancel_export_btn = QPushButton("Cancel Export")
+        export_layout.addWidget(self.progress_bar)
+        export_layout.addWidget(self.cancel_export_btn)
+        self.progress_bar.hide()
+        self.cancel_export_btn.hide()
+
         # Connect button signals
+        self.open_project_btn.clicked.connect(self.open_project_dialog)
+        self.floor_grid_btn.clicked.connect(self.floor_grid_dialog)
         self.add_result_btn.clicked.connect(self.add_result)
         self.generate_pdf_btn.clicked.connect(self.generate_pdf)
         self.save_exit_btn.clicked.connect(self.save_and_exit)
+        self.cancel_export_btn.clicked.connect(self.cancel_export)
+
+        # Editing: double-click a result to change its inputs, Delete to remove it, undo/redo either
+        edit_menu = self.menuBar().addMenu("Edit")
+        undo_action = self.undo_stack.createUndoAction(self, "Undo")
+        undo_action.setShortcut(QKeySequence.StandardKey.Undo)
+        redo_action = self.undo_stack.createRedoAction(self, "Redo")
+        redo_action.setShortcut(QKeySequence.StandardKey.Redo)
+        edit_menu.addAction(undo_action)
+        edit_menu.addAction(redo_action)
+        edit_menu.addSeparator()
+        edit_menu.addAction("Edit Result...", self.edit_result)
+        delete_action = edit_menu.addAction("Delete Result", self.delete_results)
+        delete_action.setShortcut(QKeySequence.StandardKey.Delete)
+        self.results_table.doubleClicked.connect(lambda _: self.edit_result())
 
     def switch_input_area(self, index):
         self.input_stack.setCurrentIndex(index)
 
 
 
-    def add_result_to_table(self, _):
+    def update_row_spans(self, _, first, last):
+        for row in range(first, last + 1):
+            if self.results_model.is_spanned(row):
+                self.results_table.setSpan(row, 0, 1, self.results_model.columnCount())
+
+    def reset_row_spans(self):
+        self.results_table.clearSpans()
+        if self.results_model.rowCount():
+            self.update_row_spans(None, 0, self.results_model.rowCount() - 1)
+
+    def add_results(self, items, text):
+        """Append (record, spec) pairs to the results as one undoable step."""
+        if items:
+            self.undo_stack.push(ResultsCommand(self, text, len(self.results), [], items))
+
+    def splice_results(self, start, count, items):
         """
-        Refresh the results table, grouped by type first, then by diameter.
+        Put items ((record, spec) pairs) in place of results[start:start + count].
+
+        Only the rows that change are touched, in the store, its totals and the
+        table; more than BULK_ROWS results added or removed at once rebuild the
+        table in one go instead.
         """
-        def get_beam_number(res):
-            """Helper function to get beam number from result dict with various key names"""
-            return str(res.get("beam no.", "") or res.get("beam_num", "") or res.get("beam num", "") or "")
-        
-        self.results_table.setRowCount(0)
-        
-        # Group results by type first
-        type_groups = defaultdict(list)
-        for res in self.results:
-            if res.get("type", "").endswith("legged"):
-                type_groups["Stirrups"].append(res)
-            elif res.get("type") == "Top Steel":
-                type_groups["Top Steel"].append(res)
-            elif res.get("type") == "Bottom Steel":
-                type_groups["Bottom Steel"].append(res)
-            elif res.get("type") == "Cantilever":
-                type_groups["Cantilever"].append(res)
-            elif res.get("type") == "One-way":
-                type_groups["Slab"].append(res)
-        
-        # Set default headers (will be updated per section)
-        default_headers = ["Beam Type", "Beam No.", "Bend len 1", "Bend len 2", "Quantity", "CL(per bar)", "Weight"]
-        self.results_table.setColumnCount(7)
-        self.results_table.setHorizontalHeaderLabels(default_headers)
-        
-        # Process each type group
-        for type_name in sorted(type_groups.keys()):
-            results_of_type = type_groups[type_name]
-            
-            # Add main type header
-            row = self.results_table.rowCount()
-            self.results_table.insertRow(row)
-            type_header = QTableWidgetItem(f"═══════════ {type_name.upper()} ═══════════")
-            type_header.setFlags(type_header.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            #type_header.setBackground(QColor(70, 130, 180))  # Steel blue
-            #type_header.setForeground(QColor(255, 255, 255))  # White text
-            self.results_table.setItem(row, 0, type_header)
-            self.results_table.setSpan(row, 0, 1, self.results_table.columnCount())
-            
-            # Add headers row for this type
-            row = self.results_table.rowCount()
-            self.results_table.insertRow(row)
-            
-            if type_name == "Stirrups":
-                headers = ["Type", "Beam No.", "Spacing Type", "No. of Stirrups", "Cutting Length", "Total Weight", "Diameter"]
-            elif type_name in ["Top Steel", "Bottom Steel"]:
-                headers = ["Type", "Beam No.", "Bend len 1", "Bend len 2", "Quantity", "Length per bar", "Weight"]
-            elif type_name == "Cantilever":
-                headers = ["Type", "Beam No.", "-", "-", "Quantity", "Length per bar", "Weight"]
-            elif type_name == "Slab":
-                headers = ["Type", "Diameter", "-", "-", "Quantity", "Main bars", "Total Weight"]
-            
-            # Set headers for this section
-            for col, header in enumerate(headers):
-                header_item = QTableWidgetItem(header)
-                header_item.setFlags(header_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                #header_item.setBackground(QColor(200, 200, 200))  # Light gray
-                self.results_table.setItem(row, col, header_item)
-            
-            # Group by diameter within this type
-            diameter_groups = defaultdict(list)
-            for res in results_of_type:
-                if 'd' in res:
-                    diameter_groups[res["d"]].append(res)
-                elif 'diameter' in res:
-                    diameter_groups[res["diameter"]].append(res)
-                else:
-                    diameter_groups["N/A"].append(res)
-            
-            # Process each diameter group
-            for diameter in sorted(diameter_groups.keys(), key=lambda x: float(x) if str(x).replace('.','').isdigit() else 0):
-                # Add diameter subheader
-                row = self.results_table.rowCount()
-                self.results_table.insertRow(row)
-                diameter_header = QTableWidgetItem(f"    ○ Bar Diameter: {diameter} mm")
-                diameter_header.setFlags(diameter_header.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                #diameter_header.setBackground(QColor(240, 240, 240))  # Very light gray
-                self.results_table.setItem(row, 0, diameter_header)
-                self.results_table.setSpan(row, 0, 1, self.results_table.columnCount())
-                
-                # Add data rows for this diameter
-                for res in diameter_groups[diameter]:
-                    row = self.results_table.rowCount()
-                    self.results_table.insertRow(row)
-                    
-                    if type_name == "Stirrups":
-                        if res.get("spacing type") == "uniform":
-                            self.results_table.setItem(row, 0, QTableWidgetItem(str(res.get("type", ""))))
-                            self.results_table.setItem(row, 1, QTableWidgetItem(get_beam_number(res)))
-                            self.results_table.setItem(row, 2, QTableWidgetItem("Uniform"))
-                            self.results_table.setItem(row, 3, QTableWidgetItem(str(res.get("num_stirrups", ""))))
-                            self.results_table.setItem(row, 4, QTableWidgetItem(str(res.get("cutting_len", ""))))
-                            self.results_table.setItem(row, 5, QTableWidgetItem(str(res.get("total_weight", ""))))
-                            self.results_table.setItem(row, 6, QTableWidgetItem(str(res.get("d", ""))))
-                        else:  # different spacing
-                            self.results_table.setItem(row, 0, QTableWidgetItem(str(res.get("type", ""))))
-                            self.results_table.setItem(row, 1, QTableWidgetItem(get_beam_number(res)))
-                            self.results_table.setItem(row, 2, QTableWidgetItem("L/4 & L/2"))
-                            self.results_table.setItem(row, 3, QTableWidgetItem(f"L/4: {res.get('num_l/4_stirrups', '')}, L/2: {res.get('num_l/2_stirrups', '')}"))
-                            self.results_table.setItem(row, 4, QTableWidgetItem(str(res.get("cutting_len", ""))))
-                            self.results_table.setItem(row, 5, QTableWidgetItem(str(res.get("total_weight", ""))))
-                            self.results_table.setItem(row, 6, QTableWidgetItem(str(res.get("d", ""))))
-                    
-                    elif type_name in ["Top Steel", "Bottom Steel"]:
-                        self.results_table.setItem(row, 0, QTableWidgetItem(str(res.get("type", ""))))
-                        self.results_table.setItem(row, 1, QTableWidgetItem(get_beam_number(res)))
-                        self.results_table.setItem(row, 2, QTableWidgetItem(str(res.get("bend length1", ""))))
-                        self.results_table.setItem(row, 3, QTableWidgetItem(str(res.get("bend length2", ""))))
-                        self.results_table.setItem(row, 4, QTableWidgetItem(str(res.get("quantity", ""))))
-                        self.results_table.setItem(row, 5, QTableWidgetItem(str(res.get("length per bar", ""))))
-                        self.results_table.setItem(row, 6, QTableWidgetItem(str(res.get("weight", ""))))
-                    
-                    elif type_name == "Cantilever":
-                        self.results_table.setItem(row, 0, QTableWidgetItem(str(res.get("type", ""))))
-                        self.results_table.setItem(row, 1, QTableWidgetItem(get_beam_number(res)))
-                        self.results_table.setItem(row, 2, QTableWidgetItem("-"))
-                        self.results_table.setItem(row, 3, QTableWidgetItem("-"))
-                        self.results_table.setItem(row, 4, QTableWidgetItem(str(res.get("quantity", ""))))
-                        self.results_table.setItem(row, 5, QTableWidgetItem(str(res.get("length per bar", ""))))
-                        self.results_table.setItem(row, 6, QTableWidgetItem(str(res.get("weight", ""))))
-                    
-                    elif type_name == "Slab":
-                        self.results_table.setItem(row, 0, QTableWidgetItem(str(res.get("type", ""))))
-                        self.results_table.setItem(row, 1, QTableWidgetItem(str(res.get("diameter", ""))))
-                        self.results_table.setItem(row, 2, QTableWidgetItem("-"))
-                        self.results_table.setItem(row, 3, QTableWidgetItem("-"))
-                        self.results_table.setItem(row, 4, QTableWidgetItem(str(res.get("quantity", ""))))
-                        self.results_table.setItem(row, 5, QTableWidgetItem(str(res.get("main bars", ""))))
-                        self.results_table.setItem(row, 6, QTableWidgetItem(str(res.get("total weight", ""))))
-            
-            # Add spacing between type sections
-            row = self.results_table.rowCount()
-            self.results_table.insertRow(row)
-            spacer_item = QTableWidgetItem("")
-            spacer_item.setFlags(spacer_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            self.results_table.setItem(row, 0, spacer_item)
-            self.results_table.setSpan(row, 0, 1, self.results_table.columnCount())
+        results, model = self.results, self.results_model
+        common = min(count, len(items))
+        bulk = abs(count - len(items)) > BULK_ROWS
+        profiling.count("gui.results_changed", max(count, len(items)))
+        with profiling.span("gui.splice"):
+            for k in range(common):
+                results.replace(start + k, *items[k])
+                if not bulk:
+                    model.update_result(start + k)
+            for _ in range(count - common):
+                results.remove(start + common)
+                if not bulk:
+                    model.remove_result(start + common)
+            for k in range(common, len(items)):
+                results.insert(start + k, *items[k])
+                if not bulk:
+                    model.insert_result(start + k)
+            if bulk:
+                model.rebuild()
+        self.update_totals()
+        if self.project is not None:
+            with profiling.span("gui.save"):
+                self.project.flush()
+
+    def selected_results(self):
+        """Store indices of the results selected in the table, highest first."""
+        rows = {index.row() for index in self.results_table.selectionModel().selectedIndexes()}
+        indices = (self.results_model.result_index(row) for row in rows)
+        return sorted((i for i in indices if i is not None), reverse=True)
+
+    def edit_result(self):
+        selected = self.selected_results()
+        if not selected:
+            return
+        i = selected[-1]
+        spec = self.results.spec(i)
+        if spec is None:
+            QMessageBox.information(self, "Edit Result", "This result was added without its inputs, so it cannot be "
+                                                         "recomputed. Delete it and add it again instead.")
+            return
+        # a two-way slab's bar sets come from one spec and are edited together.
+        # They are in TWO_WAY_TYPES order, so an equal panel next to this one
+        # starts where that order starts again (specs read back from a project
+        # are equal, not the same object).
+        start = end = i
+        if isinstance(spec, TwoWaySlabSpec):
+            kind = lambda j: TWO_WAY_TYPES.index(self.results[j].type)
+            while start > 0 and self.results.spec(start - 1) == spec and kind(start - 1) < kind(start):
+                start -= 1
+            while end + 1 < len(self.results) and self.results.spec(end + 1) == spec and kind(end + 1) > kind(end):
+                end += 1
+        dialog = SpecDialog(spec, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        try:
+            new_spec = dialog.spec()
+            res = compute(new_spec)
+        except (ValueError, ZeroDivisionError) as e:
+            QMessageBox.warning(self, "Input Error", f"Could not recompute the result: {e}")
+            return
+        res = res if isinstance(res, list) else [res]
+        old = [(self.results[j], self.results.spec(j)) for j in range(start, end + 1)]
+        self.undo_stack.push(ResultsCommand(self, "Edit result", start, old, [(r, new_spec) for r in res]))
+
+    def delete_results(self):
+        selected = self.selected_results()
+        if not selected:
+            return
+        self.undo_stack.beginMacro(f"Delete {len(selected)} result(s)")
+        for i in selected:
+            self.undo_stack.push(ResultsCommand(self, "Delete result", i, [(self.results[i], self.results.spec(i))], []))
+        self.undo_stack.endMacro()
+
+    def update_totals(self):
+        """Show the per-diameter steel totals the store keeps up to date as results are added."""
+        with profiling.span("gui.totals"):
+            self._show_totals(self.results.totals)
+
+    def _show_totals(self, totals):
+        if not len(totals):
+            self.totals_label.setText("Totals: none yet")
+            return
+        parts = [f"{d:g} mm: {p} pcs, {l / 1000:.2f} m, {w:.2f} kg" for d, (_, p, l, w) in totals.items()]
+        _, _, length, weight = totals.grand_total()
+        parts.append(f"Total: {length / 1000:.2f} m, {weight:.2f} kg ({weight / 1000:.3f} t)")
+        self.totals_label.setText("Totals by diameter - " + "  |  ".join(parts))
+
+    def form_inputs(self, form):
+        """form.get_inputs(), or None once the user has been told what is wrong with them."""
+        try:
+            return form.get_inputs()
+        except ValueError as e:
+            QMessageBox.warning(self, "Input Error", f"Please check the inputs: {e}.")
+            return None
 
     def add_result(self):
+        new = []        # (record, spec) pairs
         # Top Steel
         if self.menu_list.currentRow() == 0:
-            inputs = self.top_steel_input.get_inputs()
-            if not inputs:
-                QMessageBox.warning(self, "Input Error", "Please fill all fields with valid numbers.")
+            inputs = self.form_inputs(self.top_steel_input)
+            if inputs is None:
                 return
             beam_num, extended, end_support, num_supports, clear_span, es_width1, es_width2,beam_depth1, beam_depth2, diam_qty = inputs
-            from cuttingLen import flow1, flow2, bend_length
+            # one end support -> flow2, every other case goes through flow1
+            supports = 1 if (not extended and end_support and num_supports == 1) else 2
             for d, qty in diam_qty:
-                if extended:
-                    bl1 = bend_length(d, es_width1, beam_depth1)
-                    bl2 = bend_length(d, es_width2, beam_depth2)
-                    length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
-                else:
-                    if end_support:
-                        if num_supports == 2:
-                            bl1 = bend_length(d, es_width1, beam_depth1)
-                            bl2 = bend_length(d, es_width2, beam_depth2)
-                            length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
-                        else:
-                            bl1 = bend_length(d, es_width1, beam_depth1)
-                            bl2 = 0
-                            length = flow2(d, clear_span, es_width1, 0, bl1)
-                    else:
-                        bl1 = bend_length(d, es_width1, beam_depth1)
-                        bl2 = bend_length(d, es_width2, beam_depth2)
-                        length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
-                weight = ((d*d)/162)* qty * (length)/1000
-                result = {
-                    "type": "Top Steel",
-                    "beam no.": beam_num,
-                    "bend length1": bl1,
-                    "bend length2": bl2,
-                    "quantity": qty,
-                    "length per bar": length,
-                    "d": d,
-                    "weight": weight
-                }
-                self.results.append(result)
-            self.add_result_to_table(None)
+                spec = BeamSpec("Top Steel", beam_num, d, qty, clear_span, supports,
+                                es_width1, es_width2, beam_depth1, beam_depth2)
+                new.append((compute(spec), spec))
+            self.add_results(new, "Add top steel")
             QMessageBox.information(self, "Success", "Result(s) added.")
         # Bottom Steel
         elif self.menu_list.currentRow() == 1:
-            inputs = self.bottom_steel_input.get_inputs()
-            if not inputs:
-                QMessageBox.warning(self, "Input Error", "Please fill all fields with valid numbers.")
+            inputs = self.form_inputs(self.bottom_steel_input)
+            if inputs is None:
                 return
             beam_num, extended, end_support, num_supports, clear_span, es_width1, es_width2,beam_depth1, beam_depth2, diam_qty = inputs
-            from cuttingLen import flow1, flow2, bend_length
+            # one end support -> flow2, every other case goes through flow1
+            supports = 1 if (not extended and end_support and num_supports == 1) else 2
             for d, qty in diam_qty:
-                if extended:
-                    bl1 = bend_length(d, es_width1, beam_depth1)
-                    bl2 = bend_length(d, es_width2, beam_depth2)
-                    length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
-                else:
-                    if end_support:
-                        if num_supports == 2:
-                            bl1 = bend_length(d, es_width1, beam_depth1)
-                            bl2 = bend_length(d, es_width2, beam_depth2)
-                            length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
-                        else:
-                            bl1 = bend_length(d, es_width1, beam_depth1)
-                            bl2 = 0
-                            length = flow2(d, clear_span, es_width1, 0, bl1)
-                    else:
-                        bl1 = bend_length(d, es_width1, beam_depth1)
-                        bl2 = bend_length(d, es_width2, beam_depth2)
-                        length = flow1(d, clear_span, es_width1, es_width2, bl1, bl2)
-                weight = ((d*d)/162)* qty * (length)/1000
-                result = {
-                    "type": "Bottom Steel",
-                    "beam no.": beam_num,
-                    "bend length1": bl1,
-                    "bend length2": bl2,
-                    "quantity": qty,
-                    "length per bar": length,
-                    "d": d,
-                    "weight": weight
-                }
-                self.results.append(result)
-            self.add_result_to_table(None)
+                spec = BeamSpec("Bottom Steel", beam_num, d, qty, clear_span, supports,
+                                es_width1, es_width2, beam_depth1, beam_depth2)
+                new.append((compute(spec), spec))
+            self.add_results(new, "Add bottom steel")
             QMessageBox.information(self, "Success", "Result(s) added.")
         # Cantilever Top Steel
         elif self.menu_list.currentRow() == 2:
-            inputs = self.cantilever_input.get_inputs()
-            if not inputs:
-                QMessageBox.warning(self, "Input Error", "Please fill all fields with valid numbers.")
+            inputs = self.form_inputs(self.cantilever_input)
+            if inputs is None:
                 return
             extended, full_span, inner_span, canti_span, beam_num, diam_qty = inputs
             for d, qty in diam_qty:
-                if extended:
-                    length = full_span + 300
-                else:
-                    from cuttingLen import flow4
-                    length = flow4(inner_span, canti_span)
-                weight = ((d*d)/162) * (length)/1000 * qty 
-                result = {
-                    "type": "Cantilever",
-                    "beam no.": beam_num,
-                    "d": d,
-                    "quantity": qty,
-                    "length per bar": length,
-                    "weight": weight
-                }
-                self.results.append(result)
-            self.add_result_to_table(None)
+                # an extended bar runs the full span plus 300 mm
+                spec = CantileverSpec(beam_num, d, qty, inner_span, canti_span, full_span + 300 if extended else 0)
+                new.append((compute(spec), spec))
+            self.add_results(new, "Add cantilever steel")
             QMessageBox.information(self, "Success", "Cantilever result(s) added.")
         # Stirrups
         elif self.menu_list.currentRow() == 3:
-            inputs = self.stirrups_input.get_inputs()
-            if not inputs:
-                QMessageBox.warning(self, "Input Error", "Please fill all fields with valid numbers.")
+            inputs = self.form_inputs(self.stirrups_input)
+            if inputs is None:
                 return
             
             type_stirrup = inputs['type_stirrup']
@@ -909,96 +880,76 @@ class MainWindow(QMainWindow):
             beam_depth = float(inputs['beam_depth'])
             diam_qty = inputs['diam_qty']
             
-            stirrups_data = []
-            
             for d, qty in diam_qty:
-                if type_stirrup == "1":
-                    a = beam_width 
-                    b = beam_depth 
-                    cutting_len = 2*a + 2*b + 20*d - 6*d - 80
-                    weight_bar = ((d*d)/162)*cutting_len
-                    
-                    if inputs['spacing_type'] == 'uniform':
-                        spacing = float(inputs['spacing'])
-                        same_spacing(clear_span, spacing, weight_bar, stirrups_data, type_stirrup, beam_num, cutting_len, d)
-                    else:
-                        l4_spacing = float(inputs['l4_spacing'])
-                        l2_spacing = float(inputs['l2_spacing'])
-                        different_spacing(l4_spacing, clear_span, l2_spacing, weight_bar, stirrups_data, type_stirrup, d, beam_num, cutting_len)
-                
-                elif type_stirrup == "2":
-                    a = beam_depth 
-                    b = beam_width 
-                    cutting_len = math.floor(4*a + 2*b + 2*(b/3) + 16*d - 80)
-                    weight_bar = math.floor((d*d/162)*cutting_len)
-                    
-                    if inputs['spacing_type'] == 'uniform':
-                        spacing = float(inputs['spacing'])
-                        same_spacing(clear_span, spacing, weight_bar, stirrups_data, type_stirrup, beam_num, cutting_len, d)
-                    else:
-                        l4_spacing = float(inputs['l4_spacing'])
-                        l2_spacing = float(inputs['l2_spacing'])
-                        different_spacing(l4_spacing, clear_span, l2_spacing, weight_bar, stirrups_data, type_stirrup, d, beam_num, cutting_len)
-                
-                elif type_stirrup == "3":
-                    a = beam_depth 
-                    b = beam_width 
-                    cutting_len = math.floor(6*a + 2*b + 4*b/5 + 24*d - 80)
-                    weight_bar = math.floor((d*d/162)*cutting_len)
-                    
-                    if inputs['spacing_type'] == 'uniform':
-                        spacing = float(inputs['spacing'])
-                        same_spacing(clear_span, spacing, weight_bar, stirrups_data, type_stirrup, beam_num, cutting_len, d)
-                    else:
-                        l4_spacing = float(inputs['l4_spacing'])
-                        l2_spacing = float(inputs['l2_spacing'])
-                        different_spacing(l4_spacing, clear_span, l2_spacing, weight_bar, stirrups_data, type_stirrup, d, beam_num, cutting_len)
-            
-            # Add all stirrup results to main results
-            self.results.extend(stirrups_data)
-            self.add_result_to_table(None)
+                if inputs['spacing_type'] == 'zones':
+                    spec = StirrupZonesSpec(beam_num, d, type_stirrup, clear_span, beam_width, beam_depth,
+                                            inputs['zones'])
+                    new.append((compute(spec), spec))
+                    continue
+                spec = StirrupSpec(beam_num, d, type_stirrup, clear_span, beam_width, beam_depth)
+                if inputs['spacing_type'] == 'uniform':
+                    spec.spacing = float(inputs['spacing'])
+                else:
+                    spec.l4_spacing = float(inputs['l4_spacing'])
+                    spec.l2_spacing = float(inputs['l2_spacing'])
+                new.append((compute(spec), spec))
+            self.add_results(new, "Add stirrups")
             QMessageBox.information(self, "Success", "Stirrups result added.")
         # Slab
         elif self.menu_list.currentRow() == 4:
-            inputs = self.slab_input.get_inputs()
-            if not inputs:
-                QMessageBox.warning(self, "Input Error", "Please fill all fields with valid numbers.")
+            inputs = self.form_inputs(self.slab_input)
+            if inputs is None:
                 return
-            from math import floor
-            x = inputs['x']
-            y = inputs['y']
-            a = inputs['a']
-            b = inputs['b']
-            beam_width1 = inputs['beam_width1']
-            beam_width2 = inputs['beam_width2']
-            spacing_mainBar = inputs['spacing_mainBar']
-            spacing_distBar = inputs['spacing_distBar']
-            diam_qty = inputs['diam_qty']
-            for d, qty in diam_qty:
-                num_main_bars = floor((y / spacing_mainBar) + 1) * qty
-                num_dist_bars = floor((x / spacing_distBar) + 1) * qty
-                l1 = ((x + beam_width1 + beam_width2 + a / 4)/1000)
-                l2 = ((x + beam_width1 + beam_width2 + b / 4)/1000)
-                weight1 = floor((num_main_bars / 2) * l1 * (d*d)/162 )
-                weight2 = floor((num_main_bars - num_main_bars / 2) * l2 *(d*d)/162 )
-                total_weight = weight1 + weight2
-                result = {
-                    "type": "One-way",
-                    "diameter": d,
-                    "main bars": num_main_bars,
-                    "dist bars": num_dist_bars,
-                    "cutting len1": l1,
-                    "cutting len2": l2,
-                    "total weight": total_weight,
-                    "quantity": qty
-                }
-                self.results.append(result)
-            self.add_result_to_table(None)
+            for d, qty in inputs['diam_qty']:
+                if inputs.get('slab_type') == 2:
+                    # main/dist spacing fields hold the short- and long-span spacings
+                    spec = TwoWaySlabSpec(d, inputs['x'], inputs['y'], inputs['a'], inputs['b'], inputs['a2'], inputs['b2'],
+                                          inputs['beam_width1'], inputs['beam_width2'], inputs['beam_width3'],
+                                          inputs['beam_width4'], inputs['spacing_mainBar'], inputs['spacing_distBar'],
+                                          inputs['spacing_edge'], qty)
+                    new.extend((res, spec) for res in compute(spec))
+                    continue
+                spec = SlabSpec(d, inputs['x'], inputs['y'], inputs['a'], inputs['b'], inputs['beam_width1'],
+                                inputs['beam_width2'], inputs['spacing_mainBar'], inputs['spacing_distBar'], qty)
+                new.append((compute(spec), spec))
+            self.add_results(new, "Add slab")
             QMessageBox.information(self, "Success", "Slab result added.")
+        # Bulk entry
+        elif self.menu_list.currentRow() == 5:
+            self.add_bulk_entries()
         else:
             QMessageBox.information(self, "Info", "This flow is not implemented yet.")
 
+    def add_bulk_entries(self):
+        """
+        Compute every row of the bulk entry grid as one batch and add the results
+        as one undoable step. Rows that fail stay in the grid with the cells at
+        fault marked; the rest are taken out of it.
+        """
+        kind, model = self.bulk_input.kind(), self.bulk_input.table.model()
+        rows = model.entry_rows()
+        if not rows:
+            QMessageBox.information(self, "Info", "Type or paste some rows first.")
+            return
+        profiling.count("gui.bulk_rows", rows)
+        with profiling.span("gui.bulk_compute"):
+            new, errors = compute_entries(kind, model.cells())
+        self.add_results(new, f"Add {rows - len(errors)} {kind.lower()} row(s)")
+        model.set_errors(errors)
+        model.keep_rows(errors)
+        if errors:
+            row, problems = min(errors.items())
+            column, message = problems[0]
+            QMessageBox.warning(self, "Input Error",
+                                f"Added {rows - len(errors)} of {rows} row(s). The {len(errors)} row(s) left in the "
+                                f"grid could not be computed (hover over a marked cell for why); the first was row "
+                                f"{row + 1}: {column} {message}.")
+        else:
+            QMessageBox.information(self, "Success", f"{len(new)} result(s) added from {rows} row(s).")
+
     def generate_pdf(self):
+        if self.export_tasks:
+            return
         # Get filename and ensure pdfs directory exists
         filename = self.pdf_filename_edit.text().strip()
         if not filename.lower().endswith('.pdf'):
@@ -1011,126 +962,131 @@ class MainWindow(QMainWindow):
         csv_filename = filename.replace('.pdf', '.csv')
         csv_path = os.path.join(pdf_dir, csv_filename)
 
-        # Prepare data for PDF table and CSV
-        headers = ["Beam Type", "Beam No.", "Bend len 1", "Bend len 2", "Quantity", "Cutting-length (per bar)", "Weight(kg/m)"]
-        data = [headers]
-        grouped = defaultdict(list)
-        for res in self.results:
-            if 'd' in res:
-                grouped[res["d"]].append(res)
-            elif 'diameter' in res:
-                grouped[res["diameter"].__str__()].append(res)
-            else:
-                grouped[res["type"]].append(res)
-        for key in sorted(grouped.keys(), key=lambda x: str(x)):
-            # Add a header row for each group
-            data.append([f"Bar Diameter: {key} mm", '', '', '', '', '', ''])
-            for res in grouped[key]:
-                # For Cantilever
-                if res.get("type") == "Cantilever":
-                    row = [
-                        str(res.get("type", "")),
-                        str(res.get("beam no.", "")),
-                        "-", "-",
-                        str(res.get("quantity", "")),
-                        str(res.get("length per bar", "")),
-                        str(res.get("weight", "")),
-                    ]
-                # For stirrups
-                elif res.get("spacing type") == "uniform":
-                    row = [
-                        str(res.get("type", "")),
-                        str(res.get("beam no.", "")),
-                        "-", "-",
-                        str(res.get("quantity", "")),
-                        str(res.get("num_stirrups", "")),
-                        str(res.get("total_weight", "")),
-                    ]
-                # For Top Steel
-                elif res.get("type") == "Top Steel":
-                    row = [
-                        str(res.get("type", "")),
-                        str(res.get("beam no.", "")),
-                        str(res.get("bend length1", "")),
-                        str(res.get("bend length2", "")),
-                        str(res.get("quantity", "")),
-                        str(res.get("length per bar", "")),
-                        str(res.get("weight", "")),
-                    ]
-                # For Bottom Steel
-                elif res.get("type") == "Bottom Steel":
-                    row = [
-                        str(res.get("type", "")),
-                        str(res.get("beam no.", "")),
-                        str(res.get("bend length1", "")),
-                        str(res.get("bend length2", "")),
-                        str(res.get("quantity", "")),
-                        str(res.get("length per bar", "")),
-                        str(res.get("weight", "")),
-                    ]
-                # For Slab
-                elif res.get("type") == "One-way":
-                    row = [
-                        str(res.get("type", "")),
-                        str(res.get("diameter", "")),
-                        "-", "-",
-                        str(res.get("quantity", "")),
-                        str(res.get("main bars", "")),
-                        str(res.get("total weight", "")),
-                    ]
-                else:
-                    row = [str(res.get(h, "")) for h in headers]
-                data.append(row)
-        # Generate PDF
-        try:
-            doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-            elements = []
-            styles = getSampleStyleSheet()
-            elements.append(Paragraph("Cutting Length Results", styles['Title']))
-            elements.append(Spacer(1, 12))
-            table = Table(data, repeatRows=1)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.black),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            elements.append(table)
-            doc.build(elements)
-            pdf_success = True
-            pdf_error = None
-        except Exception as e:
-            pdf_success = False
-            pdf_error = str(e)
-        # Generate CSV
-        try:
-            import csv
-            with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerows(data)
-            csv_success = True
-            csv_error = None
-        except Exception as e:
-            csv_success = False
-            csv_error = str(e)
-        # Show appropriate message based on results
-        if pdf_success and csv_success:
-            QMessageBox.information(self, "Success", f"PDF saved to {pdf_path}\nCSV saved to {csv_path}")
+        from export import write_pdf, write_csv
+        # Records are copied out, so later edits don't reach the export threads
+        snapshot = tuple(self.results)
+        totals = self.results.totals.copy()
+        self.export_cancel = threading.Event()
+        self.export_outcome = {}
+        self.export_progress = {}
+        self.export_tasks = {
+            "PDF": ExportTask("PDF", write_pdf, snapshot, pdf_path, self.export_cancel, totals),
+            "CSV": ExportTask("CSV", write_csv, snapshot, csv_path, self.export_cancel, totals),
+        }
+        for task in self.export_tasks.values():
+            task.signals.progress.connect(self.on_export_progress)
+            task.signals.finished.connect(self.on_export_finished)
+            self.export_progress[task.kind] = 0
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.cancel_export_btn.show()
+        self.generate_pdf_btn.setEnabled(False)
+        for task in self.export_tasks.values():
+            QThreadPool.globalInstance().start(task)
+
+    def cancel_export(self):
+        if self.export_cancel is not None:
+            self.export_cancel.set()
+
+    def on_export_progress(self, kind, percent):
+        self.export_progress[kind] = percent
+        self.progress_bar.setValue(sum(self.export_progress.values()) // len(self.export_progress))
+
+    def on_export_finished(self, kind, ok, message):
+        self.export_outcome[kind] = (ok, message)
+        if len(self.export_outcome) < len(self.export_tasks):
+            return
+        self.export_tasks = {}
+        self.progress_bar.hide()
+        self.cancel_export_btn.hide()
+        self.generate_pdf_btn.setEnabled(True)
+
+        pdf_success, pdf_msg = self.export_outcome["PDF"]
+        csv_success, csv_msg = self.export_outcome["CSV"]
+        # Show appropriate message based on results, without blocking the window
+        if self.export_cancel.is_set():
+            self.statusBar().showMessage("Export cancelled.", 5000)
+        elif pdf_success and csv_success:
+            self.statusBar().showMessage(f"PDF saved to {pdf_msg}  |  CSV saved to {csv_msg}", 10000)
         elif pdf_success and not csv_success:
-            QMessageBox.warning(self, "Partial Success", f"PDF saved to {pdf_path}\nCSV failed: {csv_error}")
+            self.show_export_message(QMessageBox.Icon.Warning, "Partial Success", f"PDF saved to {pdf_msg}\nCSV failed: {csv_msg}")
         elif not pdf_success and csv_success:
-            QMessageBox.warning(self, "Partial Success", f"CSV saved to {csv_path}\nPDF failed: {pdf_error}")
+            self.show_export_message(QMessageBox.Icon.Warning, "Partial Success", f"CSV saved to {csv_msg}\nPDF failed: {pdf_msg}")
         else:
-            QMessageBox.critical(self, "Error", f"Both exports failed:\nPDF: {pdf_error}\nCSV: {csv_error}")
+            self.show_export_message(QMessageBox.Icon.Critical, "Error", f"Both exports failed:\nPDF: {pdf_msg}\nCSV: {csv_msg}")
+
+    def show_export_message(self, icon, title, text):
+        box = QMessageBox(icon, title, text, QMessageBox.StandardButton.Ok, self)
+        box.setModal(False)
+        box.open()
+
+    def open_project_dialog(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Project", os.path.join(os.getcwd(), 'pdfs'), PROJECT_FILTER)
+        if path:
+            self.load_project(path)
+
+    def load_project(self, path):
+        """Show the results saved in `path`; results added from now on are saved there too."""
+        from project_store import open_project
+        if self.project is not None:
+            self.project.close()
+        with profiling.span("gui.load_project"):
+            self.project, self.results = open_project(path)
+        self.project_path = path
+        self.undo_stack.clear()
+        self.results_model.set_results(self.results)
+        self.update_totals()
+        self.setWindowTitle(f"Cutting Length Calculator (GUI) - {os.path.basename(path)}")
+        self.statusBar().showMessage(f"Opened {path} ({len(self.results)} results)", 5000)
+
+    def floor_grid_dialog(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Add Floor Grid", os.getcwd(), GRID_FILTER)
+        if path:
+            self.add_floor_grid(path)
+
+    def add_floor_grid(self, path):
+        """Add every member of the floors in a grid file (see floor_grid.py)."""
+        from floor_grid import compute_floors, load_floors
+        try:
+            floors = load_floors(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            QMessageBox.warning(self, "Input Error", f"{os.path.basename(path)}: {e}")
+            return
+        with profiling.span("gui.floor_grid"):
+            floor = compute_floors(floors)
+        self.add_results([(rec, None) for rec in floor], f"Add floor grid {os.path.basename(path)}")
+        self.statusBar().showMessage(f"Added {len(floor)} results from {path}", 5000)
+
     def save_and_exit(self):
-        QMessageBox.information(self, "Info", "Save & Exit functionality to be implemented.")
+        if self.project_path == self.autosave_path():
+            default = os.path.join(os.getcwd(), 'pdfs', os.path.splitext(self.pdf_filename_edit.text().strip())[0] + '.civilcal')
+            path, _ = QFileDialog.getSaveFileName(self, "Save Project", default, PROJECT_FILTER)
+            if not path:
+                return
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            # the autosave already holds every result: close it and give it the name asked for
+            self.project.close()
+            self.project = None
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+                if os.path.exists(self.project_path + suffix):
+                    os.replace(self.project_path + suffix, path + suffix)
         self.close()
 
+    def closeEvent(self, event):
+        if self.project is not None:
+            self.project.close()
+            self.project = None
+            if self.project_path == self.autosave_path() and not len(self.results):
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(self.project_path + suffix):
+                        os.remove(self.project_path + suffix)
+        super().closeEvent(event)
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    argv = profiling.enable_from_argv(sys.argv)
+    app = QApplication(argv)
+    window = MainWindow(argv[1] if len(argv) > 1 else None)
     window.show()
     sys.exit(app.exec()) 
\ No newline at end of file
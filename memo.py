@@ -0,0 +1,68 @@
+"""
+Bounded LRU caches for the pure cutting-length formulas.
+
+@memoize wraps a function in functools.lru_cache, keyed on the arguments as
+given (typed, so 12 and 12.0 are separate entries and a result keeps the
+types it was computed with). Every wrapped function is registered here,
+which lets cache_stats() report hits and misses for all of them at once.
+
+Setting CIVILCAL_NO_CACHE=1 (or calling set_enabled(False)) makes the
+wrappers call straight through to the formulas.
+"""
+import functools
+import os
+
+DEFAULT_MAXSIZE = 4096
+
+_enabled = os.environ.get("CIVILCAL_NO_CACHE", "") in ("", "0")
+_caches = {}
+
+
+def memoize(maxsize=DEFAULT_MAXSIZE):
+    def wrap(fn):
+        cached = functools.lru_cache(maxsize=maxsize, typed=True)(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            if not _enabled:
+                return fn(*args)
+            return cached(*args)
+
+        wrapper.cache = cached
+        _caches[f"{fn.__module__}.{fn.__name__}"] = cached
+        return wrapper
+    return wrap
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+def cache_stats():
+    """{function name: (hits, misses, entries, maxsize)} for every memoized function."""
+    stats = {}
+    for name, cached in _caches.items():
+        info = cached.cache_info()
+        stats[name] = (info.hits, info.misses, info.currsize, info.maxsize)
+    return stats
+
+
+def format_stats():
+    if not _enabled:
+        return "cache disabled"
+    parts = []
+    for name, (hits, misses, size, _) in sorted(cache_stats().items()):
+        calls = hits + misses
+        rate = 100 * hits / calls if calls else 0.0
+        parts.append(f"{name.rsplit('.', 1)[-1]}: {hits} hits / {misses} misses ({rate:.0f}%), {size} entries")
+    return "; ".join(parts)
+
+
+def clear_caches():
+    for cached in _caches.values():
+        cached.cache_clear()
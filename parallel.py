@@ -0,0 +1,94 @@
+"""
+Batch schedules computed on a process pool.
+
+The schedule file is cut into chunks of about CHUNK_BYTES at line
+boundaries. A worker is only sent (file, byte range); it reads and parses
+its own rows, writes its results to part files and returns just its
+totals (a civilcal.BatchTotals) and the rows it skipped. The parent then
+concatenates the part files and merges the totals in chunk order, so the
+output is the same whatever the number of workers.
+
+Chunks are cut at newlines, so a quoted field that spans lines is not
+supported here (the serial path handles it).
+"""
+import csv
+import io
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_BYTES = 1 << 20
+
+
+def chunk_ranges(path, chunk_bytes=CHUNK_BYTES):
+    """(header fields, [(start, end)] byte ranges of the data rows, cut at line ends)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode("utf-8-sig")]))
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _run_chunk(task):
+    """Worker: compute one chunk of the schedule. Returns (totals, lines in chunk, [(line, error)], skipped)."""
+    from civilcal import BatchTotals, compute_rows, OUTPUTS
+    schedule, (start, end), header, part_prefix, plan, validate = task
+    with open(schedule, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    totals = BatchTotals(plan=plan)
+    errors = []
+    files = [open(f"{part_prefix}.{name}", "w", newline="", encoding="utf-8") for name, _ in OUTPUTS]
+    try:
+        reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=header)
+        skipped = compute_rows(reader, [csv.writer(f) for f in files], totals,
+                               lambda line_no, e: errors.append((line_no, str(e))), validate=validate)
+    finally:
+        for f in files:
+            f.close()
+    lines = text.count("\n") + (0 if text.endswith("\n") or not text else 1)
+    return totals, lines, errors, skipped
+
+
+def run_batch_parallel(schedule, out_dir, plan=None, jobs=0, validate=True):
+    """Parallel civilcal.run_batch body: writes the result CSVs, returns (BatchTotals, rows skipped)."""
+    from civilcal import BatchTotals, OUTPUTS
+    from dataclasses import fields
+    jobs = jobs if jobs and jobs > 0 else os.cpu_count() or 1
+    header, ranges = chunk_ranges(schedule)
+    parts_dir = os.path.join(out_dir, ".parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    tasks = [(schedule, r, header, os.path.join(parts_dir, f"{i:06d}"), bool(plan), validate) for i, r in enumerate(ranges)]
+
+    totals = BatchTotals(plan=bool(plan))
+    skipped = 0
+    line_base = 1       # the header
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            # map() hands results back in chunk order, which keeps the merge deterministic
+            for chunk_totals, lines, errors, chunk_skipped in pool.map(_run_chunk, tasks):
+                totals.merge(chunk_totals)
+                skipped += chunk_skipped
+                for line_no, error in errors:
+                    print(f"{schedule}:{line_base + line_no}: skipped ({error})", file=sys.stderr)
+                line_base += lines
+
+        for name, cls in OUTPUTS:
+            with open(os.path.join(out_dir, name), "w", newline="", encoding="utf-8") as out:
+                csv.writer(out).writerow([f.name for f in fields(cls)])
+                for task in tasks:
+                    with open(f"{task[3]}.{name}", newline="", encoding="utf-8") as part:
+                        shutil.copyfileobj(part, out)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    return totals, skipped
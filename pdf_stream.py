@@ -0,0 +1,257 @@
+"""
+Minimal PDF writer that streams table pages straight to disk.
+
+Only the page being filled is held in memory; every finished page is written
+out immediately. checkpoint() closes the document with an incremental-update
+xref section, so the file is a valid PDF after every call, and a later writer
+opened with append=True adds more pages after it without rewriting what is
+already there. Only files written by this module can be appended to.
+
+Pages written with tail=True (the totals at the end of a report) replace
+the pages of the previous tail writer: those are dropped from the page tree,
+wherever later pages put them, so appending totals again each session leaves
+one set of totals, after everything else.
+"""
+import os
+import re
+import zlib
+
+PAGE_W, PAGE_H = 595, 842      # A4 in points
+MARGIN = 36
+ROW_H = 14
+FONT_SIZE = 8
+TITLE_SIZE = 14
+GROUP_SIZE = 10
+CHAR_W = 0.5                   # average Helvetica glyph width per point of font size
+
+CATALOG, PAGES, FONT, FONT_BOLD = 1, 2, 3, 4
+
+
+def _esc(text):
+    text = str(text).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def _fit(text, width, size):
+    max_chars = int((width - 4) / (CHAR_W * size))
+    text = str(text)
+    return text if len(text) <= max_chars else text[:max(0, max_chars - 1)] + "~"
+
+
+class StreamingPdfWriter:
+    def __init__(self, path, headers, col_widths=None, title="Cutting Length Calculator Results", append=False,
+                 tail=False):
+        self.headers = list(headers)
+        usable = PAGE_W - 2 * MARGIN
+        if col_widths is None:
+            col_widths = [usable / len(self.headers)] * len(self.headers)
+        scale = usable / sum(col_widths)
+        self.col_widths = [w * scale for w in col_widths]
+        self.col_x = [MARGIN + sum(self.col_widths[:i]) for i in range(len(self.col_widths))]
+
+        self._pending = {}     # object number -> file offset, since the last xref section
+        self._kids = []
+        self._tail = []        # the pages of the last tail writer, kept in the page tree as /Tail
+        self._is_tail = tail
+        self._page = None
+        if append and os.path.exists(path):
+            self._open_existing(path)
+            if tail:
+                dropped = set(self._tail)
+                self._kids = [k for k in self._kids if k not in dropped]
+                self._tail = []
+        else:
+            self._f = open(path, "wb")
+            self._pos = 0
+            self._prev_xref = None
+            self._next_obj = FONT_BOLD + 1
+            self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+            self._write_obj(FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+            self._write_obj(FONT_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+            self._write_obj(CATALOG, b"<< /Type /Catalog /Pages 2 0 R >>")
+            if title:
+                self._new_page()
+                self._text(MARGIN, self._y - TITLE_SIZE, title, TITLE_SIZE, bold=True)
+                self._y -= TITLE_SIZE + 12
+
+    # -- public -----------------------------------------------------------
+
+    def add_group(self, title, rows):
+        """Write a group title, the column headers and `rows` (an iterable of cell lists), breaking pages as needed."""
+        if self._page is None or self._y - 2 * ROW_H - GROUP_SIZE < MARGIN:
+            self._new_page()
+        self._group_title(title)
+        self._header_row()
+        for row in rows:
+            if self._y - ROW_H < MARGIN:
+                self._new_page()
+                self._group_title(f"{title} (cont.)")
+                self._header_row()
+            self._row(row)
+        self._y -= 6
+
+    def checkpoint(self):
+        """Flush the open page and end the file with an xref section so it is readable as is."""
+        self._finish_page()
+        kids = " ".join(f"{k} 0 R" for k in self._kids)
+        tail = f" /Tail [{' '.join(f'{k} 0 R' for k in self._tail)}]" if self._tail else ""
+        self._write_obj(PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._kids)}{tail} >>".encode())
+        xref_pos = self._pos
+        entries = sorted(self._pending.items())
+        out = ["xref\n"]
+        if self._prev_xref is None:
+            entries.insert(0, (0, None))
+        i = 0
+        while i < len(entries):
+            j = i
+            while j + 1 < len(entries) and entries[j + 1][0] == entries[j][0] + 1:
+                j += 1
+            out.append(f"{entries[i][0]} {j - i + 1}\n")
+            for num, off in entries[i:j + 1]:
+                out.append("0000000000 65535 f \n" if off is None else f"{off:010d} 00000 n \n")
+            i = j + 1
+        prev = "" if self._prev_xref is None else f" /Prev {self._prev_xref}"
+        out.append(f"trailer\n<< /Size {self._next_obj} /Root {CATALOG} 0 R{prev} >>\nstartxref\n{xref_pos}\n%%EOF\n")
+        self._write("".join(out).encode())
+        self._pending = {}
+        self._prev_xref = xref_pos
+        self._f.flush()
+
+    def close(self):
+        self.checkpoint()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- page content ------------------------------------------------------
+
+    def _new_page(self):
+        self._finish_page()
+        self._page = []
+        self._y = PAGE_H - MARGIN
+        self._table_top = None
+
+    def _finish_page(self):
+        if self._page is None:
+            return
+        self._close_table()
+        content = zlib.compress("".join(self._page).encode("latin-1"))
+        content_obj = self._alloc()
+        self._write_obj(content_obj, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream")
+        page_obj = self._alloc()
+        self._write_obj(page_obj, (
+            f"<< /Type /Page /Parent {PAGES} 0 R /MediaBox [0 0 {PAGE_W} {PAGE_H}] "
+            f"/Resources << /Font << /F1 {FONT} 0 R /F2 {FONT_BOLD} 0 R >> >> /Contents {content_obj} 0 R >>").encode())
+        self._kids.append(page_obj)
+        if self._is_tail:
+            self._tail.append(page_obj)
+        self._page = None
+
+    def _text(self, x, y, text, size, bold=False):
+        self._page.append(f"BT /{'F2' if bold else 'F1'} {size} Tf {x:.1f} {y:.1f} Td ({_esc(text)}) Tj ET\n")
+
+    def _group_title(self, title):
+        self._close_table()
+        self._y -= GROUP_SIZE + 4
+        self._text(MARGIN, self._y + 3, title, GROUP_SIZE, bold=True)
+
+    def _cells(self, row, bold):
+        y = self._y - ROW_H
+        parts = [f"BT /{'F2' if bold else 'F1'} {FONT_SIZE} Tf {self.col_x[0] + 2:.1f} {y + 4:.1f} Td "]
+        prev_x = self.col_x[0]
+        for x, w, cell in zip(self.col_x, self.col_widths, row):
+            if x != prev_x:
+                parts.append(f"{x - prev_x:.1f} 0 Td ")
+                prev_x = x
+            parts.append(f"({_esc(_fit(cell, w, FONT_SIZE))}) Tj ")
+        parts.append("ET\n")
+        if self._table_top is None:
+            self._table_top = self._y
+        self._page.append(f"{MARGIN} {y:.1f} {PAGE_W - 2 * MARGIN:.1f} {ROW_H} re S\n")
+        self._page.append("".join(parts))
+        self._y = y
+
+    def _header_row(self):
+        y = self._y - ROW_H
+        self._page.append(f"0.85 g {MARGIN} {y:.1f} {PAGE_W - 2 * MARGIN:.1f} {ROW_H} re f 0 g\n")
+        self._cells(self.headers, bold=True)
+
+    def _row(self, row):
+        self._cells(row, bold=False)
+
+    def _close_table(self):
+        # vertical grid lines for the rows drawn since the last group title / page break
+        if self._page is None or self._table_top is None:
+            return
+        top, bottom = self._table_top, self._y
+        self._page.append("".join(f"{x:.1f} {top:.1f} m {x:.1f} {bottom:.1f} l S\n" for x in self.col_x[1:]))
+        self._table_top = None
+
+    # -- file level --------------------------------------------------------
+
+    def _alloc(self):
+        num = self._next_obj
+        self._next_obj += 1
+        return num
+
+    def _write(self, data):
+        self._f.write(data)
+        self._pos += len(data)
+
+    def _write_obj(self, num, body):
+        self._pending[num] = self._pos
+        self._write(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+
+    def _open_existing(self, path):
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 1024))
+            m = re.search(rb"startxref\s+(\d+)\s+%%EOF\s*$", f.read())
+            if not m:
+                raise ValueError(f"{path} is not a PDF written by StreamingPdfWriter")
+            self._prev_xref = xref_pos = int(m.group(1))
+
+            # newest xref section first, following /Prev until the page tree turns up
+            pages_off = None
+            trailer_size = None
+            while xref_pos is not None and pages_off is None:
+                table, trailer = _read_until(f, xref_pos, b"startxref").split(b"trailer", 1)
+                if trailer_size is None:
+                    trailer_size = int(re.search(rb"/Size (\d+)", trailer).group(1))
+                lines = table.split(b"\n")[1:]
+                i = 0
+                while i < len(lines) and lines[i].strip():
+                    first, count = (int(v) for v in lines[i].split())
+                    if first <= PAGES < first + count:
+                        pages_off = int(lines[i + 1 + PAGES - first][:10])
+                    i += count + 1
+                prev = re.search(rb"/Prev (\d+)", trailer)
+                xref_pos = int(prev.group(1)) if prev else None
+            if pages_off is None:
+                raise ValueError(f"{path} has no page tree")
+
+            pages = _read_until(f, pages_off, b"endobj")
+            kids = re.search(rb"/Kids \[([^\]]*)\]", pages).group(1)
+            self._kids = [int(k) for k in re.findall(rb"(\d+) 0 R", kids)]
+            tail = re.search(rb"/Tail \[([^\]]*)\]", pages)
+            self._tail = [int(k) for k in re.findall(rb"(\d+) 0 R", tail.group(1))] if tail else []
+
+        self._next_obj = trailer_size
+        self._f = open(path, "ab")
+        self._pos = size
+
+
+def _read_until(f, pos, marker, chunk=1 << 16):
+    f.seek(pos)
+    data = b""
+    while marker not in data:
+        more = f.read(chunk)
+        if not more:
+            break
+        data += more
+    return data.split(marker, 1)[0]
@@ -0,0 +1,201 @@
+"""
+Timing spans and counters, for seeing where a slow run spends its time.
+
+    CIVILCAL_PROFILE=report.json python -m civilcal batch schedule.csv
+    python -m civilcal batch schedule.csv --profile report.json
+    python main_gui.py --profile report.json,cprofile,tracemalloc
+
+The stages of a run are marked in the code:
+
+    with profiling.span("batch.compute"):
+        ...
+    profiling.count("batch.rows", n)
+
+or with @profiling.timed("group.records") on a function. Profiling is off
+unless switched on by the environment variable or --profile, and while off
+span() hands back one shared do-nothing context manager and count() and
+timed functions return straight away, so the marks cost next to nothing.
+
+Switched on, each span keeps its calls, total and longest time, and at exit
+the report is written as JSON to the given path (civilcal-profile.json for
+"1") with a summary table on stderr. ",cprofile" adds a cProfile capture
+next to the report (report.json.prof, for pstats) and ",tracemalloc" the
+peak traced memory and the top allocation sites. Worker processes of a
+parallel batch are not profiled; their time shows in the parent's spans.
+"""
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+ENV = "CIVILCAL_PROFILE"
+DEFAULT_PATH = "civilcal-profile.json"
+TOP_ALLOCATIONS = 15
+
+_NULL = nullcontext()
+_profiler = None        # the Profiler while profiling is on
+
+
+class Profiler:
+    def __init__(self, path, cprofile=False, memory=False):
+        self.path = path
+        self.spans = {}             # name -> [calls, total s, longest s]
+        self.counters = Counter()
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()       # export spans end on pool threads
+        self.cprofile = None
+        if cprofile:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.memory = memory
+        if memory:
+            import tracemalloc
+            tracemalloc.start()
+
+    def add(self, name, seconds):
+        with self._lock:
+            s = self.spans.get(name)
+            if s is None:
+                s = self.spans[name] = [0, 0.0, 0.0]
+            s[0] += 1
+            s[1] += seconds
+            if seconds > s[2]:
+                s[2] = seconds
+
+    def count(self, name, n):
+        with self._lock:
+            self.counters[name] += n
+
+    def report(self):
+        """The report as a dict: wall time, spans (busiest first), counters and any captures."""
+        wall = time.perf_counter() - self.started
+        spans = {name: {"calls": calls, "total_s": round(total, 6), "mean_ms": round(1000 * total / calls, 4),
+                        "max_ms": round(1000 * longest, 4), "share": round(total / wall, 4) if wall else 0.0}
+                 for name, (calls, total, longest) in sorted(self.spans.items(), key=lambda kv: -kv[1][1])}
+        out = {"command": sys.argv, "wall_s": round(wall, 6), "spans": spans, "counters": dict(sorted(self.counters.items()))}
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.path + ".prof")
+            out["cprofile"] = self.path + ".prof"
+        if self.memory:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            out["memory"] = {"peak_kb": peak // 1024, "top": [
+                {"where": str(stat.traceback), "kb": stat.size // 1024, "blocks": stat.count}
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]]}
+        return out
+
+
+def summary_lines(report):
+    """The report as a table for a terminal."""
+    lines = [f"Profile: {report['wall_s'] * 1000:.1f} ms wall",
+             f"  {'span':<28} {'calls':>8} {'total ms':>11} {'mean ms':>10} {'max ms':>10} {'share':>6}"]
+    for name, s in report["spans"].items():
+        lines.append(f"  {name:<28} {s['calls']:>8} {s['total_s'] * 1000:>11.2f} {s['mean_ms']:>10.3f} "
+                     f"{s['max_ms']:>10.2f} {s['share']:>6.1%}")
+    for name, n in report["counters"].items():
+        lines.append(f"  {name:<28} {n:>8}")
+    if "memory" in report:
+        lines.append(f"  peak traced memory {report['memory']['peak_kb']} KiB")
+    return lines
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _profiler.add(self.name, time.perf_counter() - self.start)
+
+
+def span(name):
+    """A context manager timing the code under it as `name` (does nothing while profiling is off)."""
+    return _NULL if _profiler is None else _Span(name)
+
+
+def count(name, n=1):
+    if _profiler is not None:
+        _profiler.count(name, n)
+
+
+def timed(name):
+    """Decorator: each call of the function is a span `name`."""
+    def wrap(func):
+        @functools.wraps(func)
+        def timed_func(*args, **kwargs):
+            if _profiler is None:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return timed_func
+    return wrap
+
+
+def enabled():
+    return _profiler is not None
+
+
+def enable(spec="1"):
+    """
+    Switch profiling on: spec is the report path, optionally followed by
+    ",cprofile" and/or ",tracemalloc". The report is written at exit.
+    """
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+    path, *options = [part.strip() for part in spec.split(",")]
+    unknown = set(options) - {"cprofile", "tracemalloc"}
+    if unknown:
+        raise ValueError(f"unknown profile option(s): {', '.join(sorted(unknown))}")
+    # not inherited by worker processes, which would each overwrite the report
+    os.environ.pop(ENV, None)
+    _profiler = Profiler(DEFAULT_PATH if path in ("", "1") else path, "cprofile" in options, "tracemalloc" in options)
+    atexit.register(write_report)
+    return _profiler
+
+
+def enable_from_argv(argv):
+    """
+    For entry points without an argument parser: switch profiling on for a
+    "--profile SPEC" (or "--profile=SPEC") in argv; returns argv without it.
+    """
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--profile":
+            enable(next(args, "1"))
+        elif arg.startswith("--profile="):
+            enable(arg.split("=", 1)[1])
+        else:
+            rest.append(arg)
+    return rest
+
+
+def write_report():
+    """Write the report (JSON to the profiler's path, the summary to stderr) and switch profiling off."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    import json
+    report = profiler.report()
+    with open(profiler.path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("\n".join(summary_lines(report) + [f"  report written to {profiler.path}"]), file=sys.stderr)
+    return report
+
+
+if os.environ.get(ENV):
+    enable(os.environ[ENV])
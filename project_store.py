@@ -0,0 +1,239 @@
+"""
+Projects saved to a single SQLite file.
+
+Every result gets a row in the table for its record type, keyed by its
+position in the project. A ResultStore whose journal is a ProjectStore
+writes each appended result through to it. Rows are buffered and committed
+together, every BATCH_SIZE results or whenever flush() is called (the GUI
+and CLI flush after each input). The database runs in WAL mode, so a crash
+loses at most the results that were not flushed yet.
+
+Closing a project also writes a snapshot: the loaded ResultStore's column
+arrays as blobs. Opening restores the snapshot in one read and replays only
+the rows saved after it, column by column, straight into the store's arrays.
+Record objects are only built when a result is looked at, and the
+per-diameter totals come from one grouped pass over the columns, so even a
+project with 100k results opens in a fraction of a second.
+
+The spec a result was computed from is kept as JSON in the specs table and
+only read back when that result is edited. Editing, deleting or inserting a
+result rewrites just its rows. New results are numbered SEQ_STEP apart, so
+one inserted between two others can nearly always take a free seq. Any of these drops the snapshot until the next close.
+"""
+import json
+import os
+import sqlite3
+from array import array
+from dataclasses import asdict, fields
+import numpy as np
+import calc
+from records import RECORD_TYPES, ResultStore
+from aggregate import summarize
+
+BATCH_SIZE = 500
+SEQ_STEP = 8        # appended results are numbered this far apart, leaving room to insert between them
+TABLES = ("bars", "stirrups", "slabs")      # one per RECORD_TYPES entry
+SQL_TYPES = {float: "REAL", int: "INTEGER", str: "TEXT"}
+SPEC_TYPES = {cls.__name__: cls for cls in calc.CALCULATIONS}
+
+
+class ProjectStore:
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._names = [[f.name for f in fields(cls)] for cls in RECORD_TYPES]
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        last = -1
+        with self._db:
+            for cls, table in zip(RECORD_TYPES, TABLES):
+                cols = ", ".join(f"{f.name} {SQL_TYPES[f.type]}" for f in fields(cls))
+                self._db.execute(f"CREATE TABLE IF NOT EXISTS {table} (seq INTEGER PRIMARY KEY, {cols})")
+                top = self._db.execute(f"SELECT max(seq) FROM {table}").fetchone()[0]
+                if top is not None:
+                    last = max(last, top)
+            self._db.execute("CREATE TABLE IF NOT EXISTS specs (seq INTEGER PRIMARY KEY, kind TEXT, data TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS snapshot (key TEXT PRIMARY KEY, data BLOB)")
+        self._inserts = [
+            f"INSERT INTO {table} (seq, {', '.join(names)}) VALUES ({', '.join('?' * (len(names) + 1))})"
+            for table, names in zip(TABLES, self._names)
+        ]
+        self._next = last + 1
+        self._seqs = array("q")     # seq of each result of the loaded store, in order
+        self._pending = [[] for _ in RECORD_TYPES]
+        self._pending_specs = []
+        self._pending_count = 0
+        self._store = None          # the ResultStore from load()/save_project, snapshotted on close
+        self._snapshot_at = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, rec, spec=None):
+        self._add(self._next, rec, spec)
+        self._seqs.append(self._next)
+        self._next += SEQ_STEP
+        self._pending_count += 1
+        if self._pending_count >= self.batch_size:
+            self.flush()
+
+    def extend(self, records, specs=None):
+        for rec, spec in zip(records, specs or [None] * len(records)):
+            self.append(rec, spec)
+        self.flush()
+
+    def _add(self, seq, rec, spec):
+        kind = RECORD_TYPES.index(type(rec))
+        self._pending[kind].append((seq, *[getattr(rec, name) for name in self._names[kind]]))
+        if spec is not None:
+            self._pending_specs.append((seq, type(spec).__name__, json.dumps(asdict(spec))))
+
+    def spec(self, i):
+        """The spec saved with result i, or None."""
+        self.flush()
+        row = self._db.execute("SELECT kind, data FROM specs WHERE seq = ?", (self._seqs[i],)).fetchone()
+        return SPEC_TYPES[row[0]](**json.loads(row[1])) if row else None
+
+    def replace(self, i, rec, spec=None):
+        self.flush()
+        with self._db:
+            self._delete(self._seqs[i])
+            self._add(self._seqs[i], rec, spec)
+            self._write_pending()
+
+    def remove(self, i):
+        self.flush()
+        with self._db:
+            self._delete(self._seqs[i])
+        del self._seqs[i]
+
+    def insert(self, i, rec, spec=None):
+        if i == len(self._seqs):
+            self.append(rec, spec)
+            return
+        self.flush()
+        before = self._seqs[i - 1] if i else -1
+        seq = self._seqs[i]
+        with self._db:
+            if seq - before > 1:
+                seq = (before + seq) // 2
+            else:
+                # no free seq between the neighbours: move the results up to the next gap up one,
+                # in two steps through negative keys so no two rows ever share a seq
+                j = i
+                while j + 1 < len(self._seqs) and self._seqs[j + 1] == self._seqs[j] + 1:
+                    j += 1
+                last = self._seqs[j]
+                for table in TABLES + ("specs",):
+                    self._db.execute(f"UPDATE {table} SET seq = -seq - 2 WHERE seq BETWEEN ? AND ?", (seq, last))
+                    self._db.execute(f"UPDATE {table} SET seq = -seq - 1 WHERE seq < 0")
+                for k in range(i, j + 1):
+                    self._seqs[k] += 1
+                self._next = max(self._next, last + 2)
+            self._add(seq, rec, spec)
+            self._write_pending()
+            self._drop_snapshot()
+        self._seqs.insert(i, seq)
+
+    def _delete(self, seq):
+        for table in TABLES + ("specs",):
+            self._db.execute(f"DELETE FROM {table} WHERE seq = ?", (seq,))
+        self._drop_snapshot()
+
+    def _drop_snapshot(self):
+        # the snapshot no longer matches the rows; close() writes a new one
+        self._db.execute("DELETE FROM snapshot")
+        self._snapshot_at = None
+
+    def flush(self):
+        """Commit everything appended since the last flush in one transaction."""
+        if not self._pending_count:
+            return
+        with self._db:
+            self._write_pending()
+        self._pending_count = 0
+
+    def _write_pending(self):
+        for sql, rows in zip(self._inserts, self._pending):
+            if rows:
+                self._db.executemany(sql, rows)
+                rows.clear()
+        if self._pending_specs:
+            self._db.executemany("INSERT INTO specs (seq, kind, data) VALUES (?, ?, ?)", self._pending_specs)
+            self._pending_specs.clear()
+
+    def close(self):
+        self.flush()
+        if self._store is not None and self._snapshot_at != self._next:
+            self.checkpoint(self._store)
+        self._db.close()
+
+    def checkpoint(self, store):
+        """Save a snapshot of `store`, which must hold every result in the project, in order."""
+        self.flush()
+        with self._db:
+            self._db.execute("DELETE FROM snapshot")
+            self._db.executemany("INSERT INTO snapshot (key, data) VALUES (?, ?)", store.dump().items())
+            self._db.execute("INSERT INTO snapshot (key, data) VALUES ('upto', ?)", (self._next,))
+        self._snapshot_at = self._next
+
+    def load(self):
+        """Every saved result, in order, as a ResultStore that journals new results back here."""
+        self.flush()
+        store = ResultStore()
+        blobs = dict(self._db.execute("SELECT key, data FROM snapshot").fetchall())
+        upto = blobs.pop("upto", 0)
+        if upto:
+            store.restore(blobs)
+            self._snapshot_at = upto
+
+        parts = []
+        for kind, (table, names) in enumerate(zip(TABLES, self._names)):
+            rows = self._db.execute(f"SELECT seq, {', '.join(names)} FROM {table} WHERE seq >= ? ORDER BY seq",
+                                    (upto,)).fetchall()
+            if rows:
+                columns = list(zip(*rows))
+                parts.append([kind, np.array(columns[0], dtype=np.int64), columns[1:]])
+        if parts:
+            # positions in the project, which may have gaps, become positions in the store
+            seqs = np.concatenate([p[1] for p in parts])
+            positions = np.empty(len(seqs), dtype=np.int64)
+            positions[np.argsort(seqs, kind="stable")] = np.arange(len(seqs))
+            start = 0
+            for p in parts:
+                n = len(p[1])
+                p[1] = positions[start:start + n].tolist()
+                start += n
+            store.load_columns(parts)
+        if len(store):
+            summary = summarize(store, ("d",))
+            for (d,), rows, pieces, length, weight in zip(summary.keys, summary.rows, summary.pieces,
+                                                          summary.length_units, summary.weight_units):
+                store.totals.add_group(d, int(rows), int(pieces), int(length), int(weight))
+        self._seqs = array("q", [seq for (seq,) in self._db.execute(
+            " UNION ALL ".join(f"SELECT seq FROM {table}" for table in TABLES) + " ORDER BY seq")])
+        store.journal = self
+        self._store = store
+        return store
+
+
+def open_project(path):
+    """Open (or create) the project at `path`; returns (project, results)."""
+    project = ProjectStore(path)
+    return project, project.load()
+
+
+def save_project(results, path):
+    """Write `results` to a new project file at `path` and keep journaling to it."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    project = ProjectStore(path)
+    project.extend(results, results.specs)
+    results.journal = project
+    project._store = results
+    return project
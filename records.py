@@ -0,0 +1,395 @@
+from array import array
+from dataclasses import dataclass, fields
+
+from fixed import kg, length_units, mm, weight_units
+
+
+@dataclass(slots=True)
+class BarResult:
+    """Top/bottom steel or cantilever bars of one diameter in one beam."""
+    type: str
+    beam_num: str
+    d: float
+    quantity: int
+    length: float           # cutting length per bar (mm)
+    clear_span: float = 0.0
+    bl1: float = 0.0
+    bl2: float = 0.0
+    ld: float = 0.0
+    weight: float = 0.0     # kg, all bars
+
+
+@dataclass(slots=True)
+class StirrupResult:
+    """Stirrups of one beam; num_l4/num_l2 are only set for different (L/4, L/2) spacing."""
+    type: str
+    beam_num: str
+    d: float
+    spacing_type: str       # "uniform", "diff" (L/4, L/2) or "zones"
+    cutting_len: float      # mm, one stirrup
+    total_weight: float     # kg
+    num_stirrups: int = 0
+    num_l4: int = 0
+    num_l2: int = 0
+
+
+@dataclass(slots=True)
+class SlabResult:
+    type: str
+    d: float
+    main_bars: int
+    dist_bars: int
+    cutting_len1: float     # m
+    cutting_len2: float     # m
+    total_weight: float     # kg
+    quantity: int = 1
+
+
+RECORD_TYPES = (BarResult, StirrupResult, SlabResult)
+FIELD_NAMES = {cls: tuple(f.name for f in fields(cls)) for cls in RECORD_TYPES}
+
+
+def record_row(rec):
+    """Field values of a result in field order - astuple() without the deep copy, for CSV rows."""
+    return [getattr(rec, name) for name in FIELD_NAMES[type(rec)]]
+
+
+def record_measures(rec):
+    """(pieces, running length in mm, weight in kg) of one result - the per-row form of aggregate.measures."""
+    if isinstance(rec, BarResult):
+        return rec.quantity, rec.quantity * rec.length, rec.weight
+    if isinstance(rec, StirrupResult):
+        return rec.num_stirrups, rec.num_stirrups * rec.cutting_len, rec.total_weight
+    n = rec.main_bars
+    return n, ((n / 2) * rec.cutting_len1 + (n - n / 2) * rec.cutting_len2) * 1000, rec.total_weight
+
+
+def record_units(rec):
+    """record_measures() with length and weight rounded to fixed-point units, the one rounding totals see."""
+    pieces, length, weight = record_measures(rec)
+    return pieces, length_units(length), weight_units(weight)
+
+
+class DiameterTotals:
+    """
+    Bar bending schedule totals: rows, pieces, running length and weight per diameter.
+
+    add() updates one diameter's running sums, so the totals are always current
+    without going back over the results. Length and weight are summed as
+    integers (see fixed.py), so remove() undoes add() exactly.
+    """
+    def __init__(self):
+        self._totals = {}       # d -> [rows, pieces, length units, weight units]
+
+    def __len__(self):
+        return len(self._totals)
+
+    def add_group(self, d, rows, pieces, length, weight):
+        """Add the sums of several results of one diameter at once, length and weight in fixed-point units."""
+        t = self._totals.get(d)
+        if t is None:
+            t = self._totals[d] = [0, 0, 0, 0]
+        t[0] += rows
+        t[1] += pieces
+        t[2] += length
+        t[3] += weight
+
+    def add(self, rec):
+        pieces, length, weight = record_units(rec)
+        t = self._totals.get(rec.d)
+        if t is None:
+            t = self._totals[rec.d] = [0, 0, 0, 0]
+        t[0] += 1
+        t[1] += pieces
+        t[2] += length
+        t[3] += weight
+
+    def remove(self, rec):
+        """Take a result back out of the totals (it was edited or deleted)."""
+        pieces, length, weight = record_units(rec)
+        t = self._totals[rec.d]
+        t[0] -= 1
+        t[1] -= pieces
+        t[2] -= length
+        t[3] -= weight
+        if not t[0]:
+            del self._totals[rec.d]
+
+    def merge(self, other):
+        """Add another DiameterTotals (e.g. one chunk of a parallel run) to these."""
+        for d, t in other._totals.items():
+            self.add_group(d, *t)
+
+    def units(self):
+        """[(d, (rows, pieces, length units, weight units))] in diameter order."""
+        return [(d, tuple(self._totals[d])) for d in sorted(self._totals)]
+
+    def items(self):
+        """[(d, (rows, pieces, length_mm, weight_kg))] in diameter order."""
+        return [(d, (r, p, mm(l), kg(w))) for d, (r, p, l, w) in self.units()]
+
+    def grand_total(self):
+        rows = pieces = length = weight = 0
+        for r, p, l, w in self._totals.values():
+            rows += r
+            pieces += p
+            length += l
+            weight += w
+        return rows, pieces, mm(length), kg(weight)
+
+    def copy(self):
+        other = DiameterTotals()
+        other._totals = {d: list(t) for d, t in self._totals.items()}
+        return other
+
+    def table(self):
+        """Rows for tabulate/PDF/CSV: diameter, pieces, length (m), weight (kg), then the project total in kg and tonnes."""
+        rows = [[f"{d:g} mm", int(p), f"{l / 1000:.2f}", f"{w:.2f}"] for d, (_, p, l, w) in self.items()]
+        _, p, l, w = self.grand_total()
+        rows.append(["Total", int(p), f"{l / 1000:.2f}", f"{w:.2f} ({w / 1000:.3f} t)"])
+        return rows
+
+
+TOTALS_HEADERS = ["Diameter", "Pieces", "Running length (m)", "Weight (kg)"]
+
+_TYPECODES = {float: "d", int: "q"}
+
+
+class ColumnTable:
+    """Records of one type stored column-wise: an array per numeric field, a list per text field."""
+    def __init__(self, cls):
+        self.cls = cls
+        self.names = [f.name for f in fields(cls)]
+        self.columns = {}
+        for f in fields(cls):
+            code = _TYPECODES.get(f.type)
+            self.columns[f.name] = array(code) if code else []
+        self._text = [name for name in self.names if isinstance(self.columns[name], list)]
+        self._strings = {}
+
+    def __len__(self):
+        return len(self.columns[self.names[0]])
+
+    def append(self, rec):
+        for name in self.names:
+            value = getattr(rec, name)
+            if name in self._text:
+                # repeated labels/beam numbers share one string object
+                value = self._strings.setdefault(value, value)
+            self.columns[name].append(value)
+
+    def column(self, name):
+        return self.columns[name]
+
+    def _values(self, rec):
+        strings = self._strings
+        return [(name, strings.setdefault(getattr(rec, name), getattr(rec, name)) if name in self._text
+                 else getattr(rec, name)) for name in self.names]
+
+    def set(self, j, rec):
+        for name, value in self._values(rec):
+            self.columns[name][j] = value
+
+    def insert(self, j, rec):
+        for name, value in self._values(rec):
+            self.columns[name].insert(j, value)
+
+    def delete(self, j):
+        for name in self.names:
+            del self.columns[name][j]
+
+    def record(self, i):
+        return self.cls(*[self.columns[name][i] for name in self.names])
+
+    def extend_columns(self, columns):
+        """Append whole columns at once (one sequence per field, in field order)."""
+        for name, values in zip(self.names, columns):
+            if name in self._text:
+                strings = self._strings
+                values = [strings.setdefault(v, v) for v in values]
+            self.columns[name].extend(values)
+
+    def dump(self):
+        """{field: bytes} - raw arrays for numeric fields, a JSON list for text."""
+        import json
+        out = {}
+        for name in self.names:
+            col = self.columns[name]
+            out[name] = json.dumps(col).encode("utf-8") if name in self._text else col.tobytes()
+        return out
+
+    def restore(self, blobs):
+        """Replace the contents with a dump()."""
+        import json
+        self._strings = {}
+        for name in self.names:
+            data = blobs[name]
+            if name in self._text:
+                strings = self._strings
+                self.columns[name] = [strings.setdefault(v, v) for v in json.loads(data)]
+            else:
+                col = array(self.columns[name].typecode)
+                col.frombytes(data)
+                self.columns[name] = col
+
+
+class ResultStore:
+    """
+    All results of a session, in the order they were added.
+
+    Each record type has its own ColumnTable; two small arrays remember which
+    table and row every result went to, so the store can still be indexed and
+    iterated like the list of results it replaces.
+
+    A table's rows stay in the order of the results, so results can be
+    replaced, removed and inserted in place (for editing and undo); only the
+    row numbers of later results of the same type move.
+
+    specs holds the calc spec each result was computed from, where known, so
+    an edited result can be recomputed. When `journal` is set (a
+    project_store.ProjectStore), every change is also written to it.
+    """
+    def __init__(self, journal=None):
+        self.tables = [ColumnTable(cls) for cls in RECORD_TYPES]
+        self._kind = array("b")
+        self._row = array("q")
+        self.specs = []
+        self.totals = DiameterTotals()
+        self.journal = journal
+
+    def __len__(self):
+        return len(self._kind)
+
+    def append(self, rec, spec=None):
+        kind = RECORD_TYPES.index(type(rec))
+        table = self.tables[kind]
+        self._kind.append(kind)
+        self._row.append(len(table))
+        table.append(rec)
+        self.specs.append(spec)
+        self.totals.add(rec)
+        if self.journal is not None:
+            self.journal.append(rec, spec)
+
+    def extend(self, records):
+        for rec in records:
+            self.append(rec)
+
+    def spec(self, i):
+        """The spec result i was computed from, or None if it is not known."""
+        spec = self.specs[i]
+        if spec is None and self.journal is not None:
+            spec = self.journal.spec(i)
+        return spec
+
+    def replace(self, i, rec, spec=None):
+        """Put rec (computed from spec) in place of result i; returns the record it replaces."""
+        old = self[i]
+        kind = RECORD_TYPES.index(type(rec))
+        if kind == self._kind[i]:
+            self.tables[kind].set(self._row[i], rec)
+        else:
+            self._delete(i)
+            self._insert(i, kind, rec)
+        self.specs[i] = spec
+        self.totals.remove(old)
+        self.totals.add(rec)
+        if self.journal is not None:
+            self.journal.replace(i, rec, spec)
+        return old
+
+    def remove(self, i):
+        """Delete result i; returns its record."""
+        old = self[i]
+        self._delete(i)
+        del self.specs[i]
+        self.totals.remove(old)
+        if self.journal is not None:
+            self.journal.remove(i)
+        return old
+
+    def insert(self, i, rec, spec=None):
+        """Insert rec so it becomes result i."""
+        if i == len(self):
+            self.append(rec, spec)
+            return
+        self._insert(i, RECORD_TYPES.index(type(rec)), rec)
+        self.specs.insert(i, spec)
+        self.totals.add(rec)
+        if self.journal is not None:
+            self.journal.insert(i, rec, spec)
+
+    def _delete(self, i):
+        kind, row = self._kind[i], self._row[i]
+        self.tables[kind].delete(row)
+        del self._kind[i]
+        del self._row[i]
+        self._shift(i, kind, -1)
+
+    def _insert(self, i, kind, rec):
+        import numpy as np
+        row = int(np.count_nonzero(np.frombuffer(self._kind, dtype=np.int8)[:i] == kind))
+        self.tables[kind].insert(row, rec)
+        self._kind.insert(i, kind)
+        self._row.insert(i, row)
+        self._shift(i + 1, kind, 1)
+
+    def _shift(self, start, kind, step):
+        # later results of the same type moved one row down/up their table; the
+        # views are dropped on return, before the arrays are resized again
+        import numpy as np
+        rows = np.frombuffer(self._row, dtype=np.int64)[start:]
+        rows[np.frombuffer(self._kind, dtype=np.int8)[start:] == kind] += step
+
+    def load_columns(self, parts):
+        """
+        Append results that were saved column-wise, without building records.
+
+        parts is [(kind, positions, columns)]: columns hold the new rows of
+        RECORD_TYPES[kind] in field order and positions says where each row goes
+        among all the new results. Totals and the journal are left to the caller.
+        """
+        n = sum(len(positions) for _, positions, _ in parts)
+        kinds = array("b", bytes(n))
+        rows = array("q", bytes(8 * n))
+        for kind, positions, columns in parts:
+            start = len(self.tables[kind])
+            for j, pos in enumerate(positions):
+                kinds[pos] = kind
+                rows[pos] = start + j
+            self.tables[kind].extend_columns(columns)
+        self._kind.extend(kinds)
+        self._row.extend(rows)
+        self.specs.extend([None] * n)
+
+    def dump(self):
+        """{key: bytes} snapshot of every column, for project_store."""
+        out = {"kind": self._kind.tobytes(), "row": self._row.tobytes()}
+        for kind, table in enumerate(self.tables):
+            for name, data in table.dump().items():
+                out[f"{kind}.{name}"] = data
+        return out
+
+    def restore(self, blobs):
+        """Replace the contents with a dump(); totals and the journal are left to the caller."""
+        self._kind = array("b")
+        self._kind.frombytes(blobs["kind"])
+        self._row = array("q")
+        self._row.frombytes(blobs["row"])
+        for kind, table in enumerate(self.tables):
+            table.restore({name: blobs[f"{kind}.{name}"] for name in table.names})
+        self.specs = [None] * len(self._kind)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.tables[self._kind[i]].record(self._row[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.tables[self._kind[i]].record(self._row[i])
+
+    def table(self, cls):
+        return self.tables[RECORD_TYPES.index(cls)]
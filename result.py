@@ -1,6 +1,11 @@
 from inputs import get_input
-from collections import defaultdict
-from tabulate import tabulate
+from records import TOTALS_HEADERS
+from calc import bar_result
+from cutting_plan import STOCK_LENGTH, PLAN_HEADERS, plan_results, plan_rows
+from profiling import span, timed
+
+# tabulate and the aggregate engine (numpy) are imported by the functions
+# that print, so a calculation that never reaches a summary does not load them
 
 def show_custom_results(data_list, headers, row_builder_fn, title=None):
     from tabulate import tabulate
@@ -16,53 +21,77 @@ def theLoop(length, results, choice, clear_span, bl1, bl2, d, beam_num):
         if quantity == "BACK":
             return "BACK"
         total_len = quantity * length
-        ld = 46 * d
-        results.append({
-            "type": "Top beam" if choice == "1" else "Bottom beam" if choice == "2" else "Cantilever",
-            "beam no.": beam_num,
-            "d": d,
-            "clear span": clear_span,
-            "bend length1": bl1,
-            "bend length2": bl2,
-            "quantity": quantity,
-            "ld": ld,
-            "length per bar": length,
-        })
+        member = "Top beam" if choice == "1" else "Bottom beam" if choice == "2" else "Cantilever"
+        results.append(bar_result(member, beam_num, d, quantity, length, clear_span, bl1, bl2))
         print(f"Cutting length per bar: {length:.2f}")
         print(f"Total length for {quantity} bars: {total_len:.2f}")
         return
     
 
+@timed("print.group_by_field")
 def group_by_field(data, group_key, field_order, field_names=None, title_prefix=None):
     """
     Groups data by a specific field and prints separate tables.
 
     Parameters:
-        data (list[dict]): The data to display.
-        group_key (str): The key to group by (e.g., "diameter").
-        field_order (list[str]): Keys in the order you want to display.
+        data (iterable of records): The results to display (see records.py).
+        group_key (str): The field to group by (e.g., "d").
+        field_order (list[str]): Fields in the order you want to display.
         field_names (list[str], optional): Display names for headers.
         title_prefix (str, optional): Prefix for section titles like "Bar diameter: "
 
     """
-    grouped = defaultdict(list)
-    for entry in data:
-        grouped[entry[group_key]].append(entry)
-
-    for key_val, entries in grouped.items():
+    from tabulate import tabulate
+    from aggregate import group_records
+    headers = field_names if field_names else [k.replace("_", " ").title() for k in field_order]
+    for key_val, entries in group_records(data, group_key):
         title = f"\n{title_prefix or group_key.title()}: {key_val}"
         print(title)
-        headers = field_names if field_names else [k.replace("_", " ").title() for k in field_order]
         table = []
         for e in entries:
             row = []
             for key in field_order:
-                val = e.get(key, "")
+                val = getattr(e, key, "")
                 if isinstance(val, float):
                     val = f"{val:.2f}"
                 row.append(val)
             table.append(row)
-        print(tabulate(table, headers=headers, tablefmt="fancy_grid"))
+        with span("print.tabulate"):
+            print(tabulate(table, headers=headers, tablefmt="fancy_grid"))
+
+
+@timed("print.totals")
+def print_totals(totals, title="Steel totals by diameter"):
+    """Print a DiameterTotals: pieces, running length and weight per diameter and for the whole project."""
+    if not len(totals):
+        return
+    from tabulate import tabulate
+    print(f"\n{title}\n{'-' * len(title)}")
+    print(tabulate(totals.table(), headers=TOTALS_HEADERS, tablefmt="fancy_grid"))
+
+
+@timed("print.cutting_plans")
+def print_cutting_plans(data, stock=STOCK_LENGTH, method="ffd", title=None):
+    """Print how many stock bars each diameter needs and the offcut left over (see cutting_plan.py)."""
+    plans = plan_results(data, stock, method)
+    if not plans:
+        return
+    from tabulate import tabulate
+    title = title or f"Cutting plan from {stock / 1000:g} m stock ({method})"
+    print(f"\n{title}\n{'-' * len(title)}")
+    print(tabulate(plan_rows(plans), headers=PLAN_HEADERS, tablefmt="fancy_grid"))
+
+
+@timed("print.summary")
+def print_summary(data, by=("d",), title="Summary"):
+    """Print pieces, total length and weight per group of `by` fields (see aggregate.summarize)."""
+    from tabulate import tabulate
+    from aggregate import summarize, summary_rows, summary_headers
+    summary = summarize(data, by)
+    if not summary.keys:
+        return
+    print(f"\n{title}\n{'-' * len(title)}")
+    print(tabulate(summary_rows(summary), headers=summary_headers(summary), tablefmt="fancy_grid"))
 
 """
 def seg_by_d(results):
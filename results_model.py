@@ -0,0 +1,344 @@
+from bisect import bisect_left
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from calc import zone_count, zone_layout
+from profiling import timed
+
+COLUMNS = 7
+DEFAULT_HEADERS = ["Beam Type", "Beam No.", "Bend len 1", "Bend len 2", "Quantity", "CL(per bar)", "Weight"]
+SECTION_HEADERS = {
+    "Stirrups": ["Type", "Beam No.", "Spacing Type", "No. of Stirrups", "Cutting Length", "Total Weight", "Diameter"],
+    "Top Steel": ["Type", "Beam No.", "Bend len 1", "Bend len 2", "Quantity", "Length per bar", "Weight"],
+    "Bottom Steel": ["Type", "Beam No.", "Bend len 1", "Bend len 2", "Quantity", "Length per bar", "Weight"],
+    "Cantilever": ["Type", "Beam No.", "-", "-", "Quantity", "Length per bar", "Weight"],
+    "Slab": ["Type", "Diameter", "-", "-", "Quantity", "Main bars", "Total Weight"],
+}
+
+# row kinds
+TYPE_ROW, HEADER_ROW, DIAMETER_ROW, DATA_ROW, SPACER_ROW = range(5)
+
+# adding more results than this at once rebuilds the whole table in one reset
+BULK_ROWS = 500
+
+
+def type_group(res):
+    """Section of the results table a result belongs to, or None if it is not shown."""
+    return section_name(res.type)
+
+
+# the GUI's bar types, and those batch schedules, main2 and the service give (civilcal.MEMBER_TYPES)
+BAR_SECTIONS = {"Top Steel": "Top Steel", "Top beam": "Top Steel", "Bottom Steel": "Bottom Steel",
+                "Bottom beam": "Bottom Steel", "Cantilever": "Cantilever"}
+
+
+def section_name(t):
+    if t.endswith("legged"):
+        return "Stirrups"
+    if t in BAR_SECTIONS:
+        return BAR_SECTIONS[t]
+    if t == "One-way" or t.startswith("Two-way"):
+        return "Slab"
+    return None
+
+
+def diameter_key(res):
+    return res.d
+
+
+def diameter_sort_key(x):
+    return float(x) if str(x).replace('.', '').isdigit() else 0
+
+
+def zone_cells(res, spec):
+    """Spacing and count cells of stirrups spaced by zones: each laid out zone's spacing and stirrups."""
+    if spec is None or not hasattr(spec, "zones"):
+        return "Zones", str(res.num_stirrups)
+    zones = zone_layout(spec.zones, spec.clear_span)
+    spacings = ", ".join(f"{spacing:g}" for _, _, spacing in zones)
+    counts = ", ".join(str(zone_count(*zone)) for zone in zones)
+    return f"Zones @ {spacings}", f"{counts} ({res.num_stirrups})"
+
+
+def result_cells(type_name, res, spec=None):
+    """The cells of a result's row; spec (what it was computed from) lays out zone stirrups."""
+    if type_name == "Stirrups":
+        if res.spacing_type == "uniform":
+            spacing, count = "Uniform", str(res.num_stirrups)
+        elif res.spacing_type == "zones":
+            spacing, count = zone_cells(res, spec)
+        else:
+            spacing, count = "L/4 & L/2", f"L/4: {res.num_l4}, L/2: {res.num_l2}"
+        return [res.type, str(res.beam_num), spacing, count,
+                str(res.cutting_len), str(res.total_weight), str(res.d)]
+    if type_name in ("Top Steel", "Bottom Steel"):
+        return [res.type, str(res.beam_num), str(res.bl1), str(res.bl2),
+                str(res.quantity), str(res.length), str(res.weight)]
+    if type_name == "Cantilever":
+        return [res.type, str(res.beam_num), "-", "-",
+                str(res.quantity), str(res.length), str(res.weight)]
+    return [res.type, str(res.d), "-", "-",
+            str(res.quantity), str(res.main_bars), str(res.total_weight)]
+
+
+class _TypeSection:
+    """Rows of one type section: diameters in display order and the results under each."""
+    def __init__(self):
+        self.diameters = []     # sorted by diameter_sort_key
+        self.sort_keys = []
+        self.rows = {}
+
+    def size(self):
+        # type header + column header + spacer, then a header row per diameter
+        return 3 + len(self.diameters) + sum(len(r) for r in self.rows.values())
+
+
+class ResultsModel(QAbstractTableModel):
+    """
+    Results grouped by type, then by diameter, laid out as the flat rows the table shows.
+
+    New results are inserted straight into their group with beginInsertRows, so
+    adding a result costs the same however many are already in the table, and the
+    view only asks for the cells it is drawing. Data rows hold the result's index
+    in `results` (a ResultStore); the record is only built when a cell is drawn.
+    An edited, removed or inserted result likewise only touches its own row (and
+    its group's headers if the group appears or empties).
+    """
+    def __init__(self, results, parent=None):
+        super().__init__(parent)
+        self._results = results
+        self._rows = []          # (kind, type_name, payload) per table row
+        self._types = []         # section names in display order
+        self._sections = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else COLUMNS
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return DEFAULT_HEADERS[section]
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        kind, type_name, payload = self._rows[index.row()]
+        col = index.column()
+        if kind == DATA_ROW:
+            res = self._results[payload]
+            spec = self._results.spec(payload) if getattr(res, "spacing_type", None) == "zones" else None
+            return result_cells(type_name, res, spec)[col]
+        if kind == HEADER_ROW:
+            return SECTION_HEADERS[type_name][col]
+        if col != 0:
+            return None
+        if kind == TYPE_ROW:
+            return f"═══════════ {type_name.upper()} ═══════════"
+        if kind == DIAMETER_ROW:
+            return f"    ○ Bar Diameter: {payload} mm"
+        return ""
+
+    def is_spanned(self, row):
+        """Section/diameter headers and spacers stretch across the whole row."""
+        return self._rows[row][0] in (TYPE_ROW, DIAMETER_ROW, SPACER_ROW)
+
+    def result_at(self, row):
+        kind, _, payload = self._rows[row]
+        return self._results[payload] if kind == DATA_ROW else None
+
+    def result_index(self, row):
+        """Index in the store of the result shown in a row, or None for header rows."""
+        kind, _, payload = self._rows[row]
+        return payload if kind == DATA_ROW else None
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._types = []
+        self._sections = {}
+        self.endResetModel()
+
+    def set_results(self, results):
+        """Show a different store, e.g. a project that has just been opened."""
+        self._results = results
+        self.rebuild()
+
+    def add_results(self, start, end=None):
+        """Show results[start:end], which have just been added to the store."""
+        end = len(self._results) if end is None else end
+        if end - start > BULK_ROWS and end == len(self._results):
+            self.rebuild()
+            return
+        for i in range(start, end):
+            self.add_result(i)
+
+    @timed("gui.table_rebuild")
+    def rebuild(self):
+        """Lay out every result in the store again, reading only the type and diameter columns."""
+        from aggregate import gather
+        cols = gather(self._results, ["type", "d"])
+        order = cols["index"].argsort()
+        sections = {}
+        for i, t, d in zip(cols["index"][order].tolist(), cols["type"][order].tolist(), cols["d"][order].tolist()):
+            type_name = section_name(t)
+            if type_name is None:
+                continue
+            section = sections.get(type_name)
+            if section is None:
+                section = sections[type_name] = _TypeSection()
+            group = section.rows.get(d)
+            if group is None:
+                group = section.rows[d] = []
+            group.append(i)
+
+        rows = []
+        for type_name in sorted(sections):
+            section = sections[type_name]
+            section.diameters = sorted(section.rows, key=diameter_sort_key)
+            section.sort_keys = [diameter_sort_key(d) for d in section.diameters]
+            rows.append((TYPE_ROW, type_name, None))
+            rows.append((HEADER_ROW, type_name, None))
+            for d in section.diameters:
+                rows.append((DIAMETER_ROW, type_name, d))
+                rows.extend((DATA_ROW, type_name, i) for i in section.rows[d])
+            rows.append((SPACER_ROW, type_name, None))
+
+        self.beginResetModel()
+        self._rows = rows
+        self._types = sorted(sections)
+        self._sections = sections
+        self.endResetModel()
+
+    def add_result(self, i):
+        res = self._results[i]
+        type_name = type_group(res)
+        if type_name is None:
+            return
+        diameter = diameter_key(res)
+
+        section = self._sections.get(type_name)
+        if section is None:
+            section = _TypeSection()
+            section.diameters.append(diameter)
+            section.sort_keys.append(diameter_sort_key(diameter))
+            section.rows[diameter] = [i]
+            t = bisect_left(self._types, type_name)
+            self._insert(self._section_start(t), [
+                (TYPE_ROW, type_name, None),
+                (HEADER_ROW, type_name, None),
+                (DIAMETER_ROW, type_name, diameter),
+                (DATA_ROW, type_name, i),
+                (SPACER_ROW, type_name, None),
+            ])
+            self._types.insert(t, type_name)
+            self._sections[type_name] = section
+            return
+
+        start = self._section_start(self._types.index(type_name)) + 2
+        rows = section.rows.get(diameter)
+        if rows is None:
+            sort_key = diameter_sort_key(diameter)
+            j = bisect_left(section.sort_keys, sort_key)
+            while j < len(section.sort_keys) and section.sort_keys[j] == sort_key:
+                j += 1
+            pos = start + sum(1 + len(section.rows[d]) for d in section.diameters[:j])
+            section.diameters.insert(j, diameter)
+            section.sort_keys.insert(j, sort_key)
+            section.rows[diameter] = [i]
+            self._insert(pos, [(DIAMETER_ROW, type_name, diameter), (DATA_ROW, type_name, i)])
+            return
+
+        pos = start
+        for d in section.diameters:
+            if d == diameter:
+                break
+            pos += 1 + len(section.rows[d])
+        k = bisect_left(rows, i)
+        rows.insert(k, i)
+        self._insert(pos + 1 + k, [(DATA_ROW, type_name, i)])
+
+    @timed("gui.table_row")
+    def update_result(self, i):
+        """Result i was replaced: redraw its row, or move it if its type or diameter changed."""
+        pos = self._find(i)
+        res = self._results[i]
+        if pos is not None and self._rows[pos][1] == type_group(res) and self._diameter_at(pos) == diameter_key(res):
+            self.dataChanged.emit(self.index(pos, 0), self.index(pos, COLUMNS - 1))
+            return
+        if pos is not None:
+            self._detach(pos)
+        self.add_result(i)
+
+    @timed("gui.table_row")
+    def remove_result(self, i):
+        """Result i was removed from the store; later results have moved down one."""
+        pos = self._find(i)
+        if pos is not None:
+            self._detach(pos)
+        self._renumber(i, -1)
+
+    @timed("gui.table_row")
+    def insert_result(self, i):
+        """A result was inserted into the store at i, moving later ones up one."""
+        self._renumber(i, 1)
+        self.add_result(i)
+
+    def _find(self, i):
+        for pos, (kind, _, payload) in enumerate(self._rows):
+            if kind == DATA_ROW and payload == i:
+                return pos
+        return None
+
+    def _diameter_at(self, pos):
+        while self._rows[pos][0] != DIAMETER_ROW:
+            pos -= 1
+        return self._rows[pos][2]
+
+    def _detach(self, pos):
+        # take one data row out, with its diameter header or whole section if it was the last
+        _, type_name, i = self._rows[pos]
+        diameter = self._diameter_at(pos)
+        section = self._sections[type_name]
+        rows = section.rows[diameter]
+        rows.remove(i)
+        if rows:
+            self._remove(pos, pos)
+            return
+        j = section.diameters.index(diameter)
+        del section.diameters[j]
+        del section.sort_keys[j]
+        del section.rows[diameter]
+        if section.diameters:
+            self._remove(pos - 1, pos)
+            return
+        t = self._types.index(type_name)
+        start = self._section_start(t)
+        self._remove(start, start + 4)      # type, header, diameter, data and spacer rows
+        del self._types[t]
+        del self._sections[type_name]
+
+    def _renumber(self, i, step):
+        # data rows hold store indices; those at or past i follow the results that moved
+        self._rows = [(kind, t, p + step) if kind == DATA_ROW and p >= i else (kind, t, p)
+                      for kind, t, p in self._rows]
+        for section in self._sections.values():
+            for d, rows in section.rows.items():
+                if rows and rows[-1] >= i:
+                    section.rows[d] = [p + step if p >= i else p for p in rows]
+
+    def _section_start(self, i):
+        return sum(self._sections[t].size() for t in self._types[:i])
+
+    def _insert(self, pos, rows):
+        self.beginInsertRows(QModelIndex(), pos, pos + len(rows) - 1)
+        self._rows[pos:pos] = rows
+        self.endInsertRows()
+
+    def _remove(self, first, last):
+        self.beginRemoveRows(QModelIndex(), first, last)
+        del self._rows[first:last + 1]
+        self.endRemoveRows()
@@ -0,0 +1,352 @@
+"""
+Calculations over HTTP/JSON, for callers on the network.
+
+    python -m civilcal serve [--host 127.0.0.1] [--port 8765] [--window-ms 1]
+
+Every endpoint takes a POST with {"members": [...]}, one object per member
+with the same keys as a batch schedule row (see civilcal.py):
+
+    POST /beams         top/bottom steel ("member": "top" or "bottom")
+    POST /cantilevers
+    POST /stirrups
+    POST /slabs
+
+and answers with {"fields": [...], "results": [[...], ...], "totals": [...]}:
+one result row per member in the record's field order, and the steel per
+diameter of this request (d, rows, pieces, length_mm, weight_kg). A request
+that does not parse or fails the checks a batch schedule gets (see
+validation.py) is answered 400 with {"error": ...} naming the first member
+at fault.
+
+For large requests the members can be sent as {"columns": {key: [...]}},
+one list per key; the reply then has "columns" (one list per field) in
+place of "results". That is far less JSON to decode and encode per member.
+
+GET /stats reports, per endpoint, the requests and members served and the
+50th/90th/99th percentile and maximum latency (from the request being read to
+its response being written) of the last KEEP requests, and how well requests
+were batched. GET /health answers {"status": "ok"}.
+
+Requests are micro-batched: members arriving for the same endpoint within
+the batch window (1 ms by default) or until max_batch members are waiting
+are computed together by one call of the column functions in batch.py, then
+split back per request. The computation runs on the event loop, so a batch
+holds up other requests for as long as it takes.
+"""
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import MISSING, fields
+
+import numpy as np
+
+import batch
+from aggregate import column_units
+import fixed
+import profiling
+from calc import BeamSpec, CantileverSpec, StirrupSpec, SlabSpec
+from civilcal import MEMBER_TYPES
+from records import BarResult, StirrupResult, SlabResult, FIELD_NAMES
+from validation import SCHEMAS as MEMBER_SCHEMAS, validate
+
+WINDOW = 0.001              # seconds a batch stays open for more requests
+MAX_BATCH = 100_000         # members; a fuller batch is computed straight away
+MAX_BODY = 64 << 20
+KEEP = 10_000               # latency samples kept per endpoint
+
+ENDPOINTS = {
+    "/beams": (BeamSpec, BarResult, batch.beam_bar_columns),
+    "/cantilevers": (CantileverSpec, BarResult, batch.cantilever_columns),
+    "/stirrups": (StirrupSpec, StirrupResult, batch.stirrup_columns),
+    "/slabs": (SlabSpec, SlabResult, batch.slab_columns),
+}
+SCHEMAS = {BeamSpec: MEMBER_SCHEMAS["top"], CantileverSpec: MEMBER_SCHEMAS["cantilever"],
+           StirrupSpec: MEMBER_SCHEMAS["stirrup"], SlabSpec: MEMBER_SCHEMAS["slab"]}
+TEXT_DEFAULTS = {"beam_num": "", "stirrup_type": "1"}      # as in a batch schedule
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class RequestError(ValueError):
+    pass
+
+
+def parse_request(spec_cls, request):
+    """
+    ({spec field: array}, member count) for {"members": [...]} or {"columns": {...}}.
+
+    Text fields come back as lists of str. Raises RequestError.
+    """
+    if not isinstance(request, dict):
+        raise RequestError("expected a JSON object")
+    if "columns" in request:
+        raw = request["columns"]
+        if not isinstance(raw, dict) or not all(isinstance(v, list) for v in raw.values()) \
+                or len({len(v) for v in raw.values()}) != 1:
+            raise RequestError("'columns' must map field names to lists of the same length")
+        n = len(next(iter(raw.values())))
+        values_of = lambda name, default: raw[name] if name in raw else [default] * n
+    else:
+        members = request.get("members")
+        if not isinstance(members, list):
+            raise RequestError("'members' must be a list")
+        if not all(isinstance(m, dict) for m in members):
+            raise RequestError("every member must be an object")
+        n = len(members)
+        values_of = lambda name, default: [m.get(name, default) for m in members]
+    if not n:
+        raise RequestError("no members")
+
+    cols = {}
+    for f in fields(spec_cls):
+        if spec_cls is BeamSpec and f.name == "type":
+            labels = [MEMBER_TYPES.get(str(v).strip().lower()) for v in values_of("member", "top")]
+            _require([label is not None and label != MEMBER_TYPES["cantilever"] for label in labels],
+                     "member must be 'top' or 'bottom'")
+            cols["type"] = labels
+            continue
+        default = f.default if f.default is not MISSING else TEXT_DEFAULTS.get(f.name)
+        values = values_of(f.name, default)
+        if f.type is str:
+            _require([v is not None for v in values], f"{f.name} is required")
+            cols[f.name] = [str(v) for v in values]
+        else:
+            cols[f.name] = _numbers(values)
+
+    # the same checks as a batch schedule; whole numbers become int64 only once they pass
+    report = validate(SCHEMAS[spec_cls], cols)
+    if not report.ok.all():
+        row, name, message = report.errors()[0]
+        raise RequestError(f"member {row}: {name} {message}")
+    for f in fields(spec_cls):
+        if f.type is int:
+            cols[f.name] = report.columns[f.name]
+    return cols, n
+
+
+def _numbers(values):
+    """float64 array of JSON values; null, "" and anything not a number become nan."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([_number(v) for v in values], dtype=np.float64)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _require(ok, message):
+    ok = np.asarray(ok, dtype=bool)
+    if not ok.all():
+        raise RequestError(f"member {int(np.argmin(ok))}: {message}")
+
+
+def split_results(rec_cls, out, sizes):
+    """Cut one batch's result columns back into [(columns as lists, totals per diameter)], one per request."""
+    names = FIELD_NAMES[rec_cls]
+    lists = {n: out[n].tolist() if isinstance(out[n], np.ndarray) else out[n] for n in names}
+    pieces, length, weight = column_units(rec_cls, lambda n: np.asarray(out[n], dtype=np.float64))
+
+    diameters, codes = np.unique(out["d"], return_inverse=True)
+    request = np.repeat(np.arange(len(sizes)), sizes)
+    groups, inverse = np.unique(request * len(diameters) + codes, return_inverse=True)
+    totals = [[] for _ in sizes]
+    for g, n, p, l, w in zip(groups.tolist(), np.bincount(inverse).tolist(),
+                             *(fixed.group_sums(inverse, c, len(groups)).tolist() for c in (pieces, length, weight))):
+        r, j = divmod(g, len(diameters))
+        totals[r].append({"d": diameters[j].item(), "rows": n, "pieces": p,
+                          "length_mm": fixed.mm(l), "weight_kg": fixed.kg(w)})
+
+    if len(sizes) == 1:
+        return [(lists, totals[0])]
+    parts = []
+    start = 0
+    for i, n in enumerate(sizes):
+        parts.append(({name: col[start:start + n] for name, col in lists.items()}, totals[i]))
+        start += n
+    return parts
+
+
+class LatencyStats:
+    def __init__(self, keep=KEEP):
+        self.samples = defaultdict(lambda: deque(maxlen=keep))
+        self.requests = Counter()
+        self.members = Counter()
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_members = 0
+
+    def record(self, path, seconds, members=0):
+        self.samples[path].append(seconds)
+        self.requests[path] += 1
+        self.members[path] += members
+
+    def record_batch(self, requests, members):
+        self.batches += 1
+        self.batched_requests += requests
+        self.batched_members += members
+
+    def report(self):
+        endpoints = {}
+        for path, samples in sorted(self.samples.items()):
+            ms = np.array(samples) * 1000
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99]).tolist()
+            endpoints[path] = {"requests": self.requests[path], "members": self.members[path],
+                               "p50_ms": round(p50, 3), "p90_ms": round(p90, 3), "p99_ms": round(p99, 3),
+                               "max_ms": round(float(ms.max()), 3)}
+        batches = max(self.batches, 1)
+        return {"endpoints": endpoints,
+                "batches": {"count": self.batches, "requests_per_batch": round(self.batched_requests / batches, 2),
+                            "members_per_batch": round(self.batched_members / batches, 1)}}
+
+
+class Batcher:
+    """Collects parsed requests per endpoint and computes each endpoint's waiting requests in one call."""
+    def __init__(self, stats, window=WINDOW, max_batch=MAX_BATCH):
+        self.stats = stats
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = defaultdict(list)       # path -> [(columns, members, future)]
+        self._sizes = Counter()
+        self._timers = {}
+
+    def submit(self, path, cols, members):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[path].append((cols, members, future))
+        self._sizes[path] += members
+        if self._sizes[path] >= self.max_batch:
+            self.flush(path)
+        elif path not in self._timers:
+            self._timers[path] = loop.call_later(self.window, self.flush, path)
+        return future
+
+    def flush(self, path):
+        timer = self._timers.pop(path, None)
+        if timer is not None:
+            timer.cancel()
+        waiting = self._pending.pop(path, [])
+        self._sizes[path] = 0
+        if not waiting:
+            return
+        _, rec_cls, columns_fn = ENDPOINTS[path]
+        sizes = [n for _, n, _ in waiting]
+        try:
+            cols = {}
+            for name, first in waiting[0][0].items():
+                if isinstance(first, list):
+                    cols[name] = [v for c, _, _ in waiting for v in c[name]]
+                else:
+                    cols[name] = np.concatenate([c[name] for c, _, _ in waiting])
+            with np.errstate(divide="ignore", invalid="ignore"), profiling.span(f"service{path}"):
+                replies = split_results(rec_cls, columns_fn(cols), sizes)
+        except Exception as e:
+            for _, _, future in waiting:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), reply in zip(waiting, replies):
+            if not future.done():
+                future.set_result(reply)
+        self.stats.record_batch(len(waiting), sum(sizes))
+        profiling.count(f"service{path}.members", sum(sizes))
+
+
+class CalcService:
+    def __init__(self, window=WINDOW, max_batch=MAX_BATCH):
+        self.stats = LatencyStats()
+        self.batcher = Batcher(self.stats, window, max_batch)
+
+    async def calculate(self, path, request):
+        """(reply, members) for a decoded request body on one endpoint - what POST `path` answers."""
+        spec_cls, rec_cls, _ = ENDPOINTS[path]
+        cols, n = parse_request(spec_cls, request)
+        columns, totals = await self.batcher.submit(path, cols, n)
+        reply = {"fields": list(FIELD_NAMES[rec_cls])}
+        if "columns" in request:
+            reply["columns"] = columns
+        else:
+            reply["results"] = list(zip(*columns.values()))
+        reply["totals"] = totals
+        return reply, n
+
+    async def dispatch(self, method, path, body):
+        """(status, payload, members computed) for one request."""
+        if path == "/health":
+            return 200, {"status": "ok"}, 0
+        if path == "/stats":
+            return 200, self.stats.report(), 0
+        if path not in ENDPOINTS:
+            return 404, {"error": f"no endpoint {path}"}, 0
+        if method != "POST":
+            return 405, {"error": "use POST"}, 0
+        try:
+            reply, members = await self.calculate(path, json.loads(body))
+            return 200, reply, members
+        except (ValueError, UnicodeDecodeError) as e:      # RequestError and JSONDecodeError are ValueErrors
+            return 400, {"error": str(e)}, 0
+
+    async def handle(self, reader, writer):
+        """One connection; keeps it open between requests unless the client asks to close."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                if headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                body = await reader.readexactly(length) if length else b""
+
+                start = time.perf_counter()
+                path = target.split("?", 1)[0]
+                status, payload, members = await self.dispatch(method.upper(), path, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if path in ENDPOINTS:
+                    self.stats.record(path, time.perf_counter() - start, members)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass        # client went away or sent something that is not HTTP
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode("utf-8")
+        head = f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+        if not keep_alive:
+            head += "Connection: close\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + data)
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8765, window=WINDOW, max_batch=MAX_BATCH):
+    service = CalcService(window, max_batch)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"CivilCal service on http://{host}:{server.sockets[0].getsockname()[1]} "
+          f"(batch window {window * 1000:g} ms)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def run(host="127.0.0.1", port=8765, window=WINDOW, max_batch=MAX_BATCH):
+    try:
+        asyncio.run(serve(host, port, window, max_batch))
+    except KeyboardInterrupt:
+        pass
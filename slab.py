@@ -1,14 +1,22 @@
 from inputs import get_input
-import math
-from result import group_by_field
+from result import group_by_field, print_totals
+from records import ResultStore
+from calc import SlabSpec, TwoWaySlabSpec, one_way_slab, two_way_slab
+
+def adjacent_span(where):
+    """The span of the neighbouring panel `where`, or 0 at a discontinuous edge."""
+    if input(f"Is the slab continuous {where}? (y/n): ").strip().lower() != "y":
+        return 0
+    return get_input(f"Enter adjacent span {where}: ")
 
 def menu():
     print("1. One way slab")
     print("2. Two way slab")
     print("3. Exit")
 
-def slab_flow():
-    slab_data = []
+def slab_flow(results=None):
+    """Interactive slab entry; what was entered is also added to `results` when given."""
+    slab_data = ResultStore()
 
     while True:
         menu()
@@ -17,7 +25,7 @@ def slab_flow():
         if slab_type == "1":
             x = get_input("Enter breadth of slab (shorter span): ")
             y = get_input("Enter length of slab (longer span): ")
-            if y < x:
+            while y < x:
                 print("Invalid values: Length must be greater than or equal to breadth.")
                 y = get_input("Enter length of slab (longer span): ")
 
@@ -29,30 +37,32 @@ def slab_flow():
             spacing_mainBar = get_input("Enter spacing between main bars: ")
             spacing_distBar = get_input("Enter spacing between distribution bars: ")
 
-            num_main_bars = math.floor((y / spacing_mainBar) + 1)
-            num_dist_bars = math.floor((x / spacing_distBar) + 1)
-
-            #cutting lens :-
-            l1 = ((x + beam_width1 + beam_width2 + a / 4)/1000)
-            l2 = ((x + beam_width1 + beam_width2 + b / 4)/1000)
+            slab_data.append(one_way_slab(SlabSpec(d, x, y, a, b, beam_width1, beam_width2, spacing_mainBar, spacing_distBar)))
 
-            weight1 = math.floor((num_main_bars / 2) * l1)
-            weight2 = math.floor((num_main_bars - num_main_bars / 2) * l2)
-            total_weight = weight1 + weight2
+        elif slab_type == "2":
+            x = get_input("Enter breadth of slab (shorter span): ")
+            y = get_input("Enter length of slab (longer span): ")
+            while y < x:
+                print("Invalid values: Length must be greater than or equal to breadth.")
+                y = get_input("Enter length of slab (longer span): ")
 
-            slab_data.append({
-                "type": "One-way",
-                "diameter": d,
-                "main bars": num_main_bars,
-                "dist bars": num_dist_bars,
-                "cutting len1": l1,
-                "cutting len2": l2,
-                "total weight": total_weight
-            })
+            a = adjacent_span("past beam 1 (end of short-span bars)")
+            b = adjacent_span("past beam 2 (other end of short-span bars)")
+            a2 = adjacent_span("past beam 3 (end of long-span bars)")
+            b2 = adjacent_span("past beam 4 (other end of long-span bars)")
+            beam_width1 = get_input("Enter beam width 1: ")
+            beam_width2 = get_input("Enter beam width 2: ")
+            beam_width3 = get_input("Enter beam width 3: ")
+            beam_width4 = get_input("Enter beam width 4: ")
+            d = get_input("Enter the diameter of bar (e.g., 8 or 10): ")
+            spacing_short = get_input("Enter spacing of short-span bars: ")
+            spacing_long = get_input("Enter spacing of long-span bars: ")
+            spacing_edge = 0
+            if input("Different spacing in the edge strips? (y/n): ").strip().lower() == "y":
+                spacing_edge = get_input("Enter spacing in the edge strips: ")
 
-        elif slab_type == "2":
-            print("Two-way slab calculation not yet implemented.")
-            continue
+            slab_data.extend(two_way_slab(TwoWaySlabSpec(d, x, y, a, b, a2, b2, beam_width1, beam_width2, beam_width3,
+                                                         beam_width4, spacing_short, spacing_long, spacing_edge)))
 
         elif slab_type == "3":
             break
@@ -60,10 +70,14 @@ def slab_flow():
             print("Invalid choice. Please enter 1, 2, or 3.")
 
     # Summary:
-    field_order = ["type", "diameter", "main bars", "dist bars", "cutting len1", "cutting len2", "total weight"]
+    field_order = ["type", "d", "main_bars", "dist_bars", "cutting_len1", "cutting_len2", "total_weight"]
     field_names = ["Type", "Diameter", "Main Bars", "Dist Bars", "Cutting Len (L1) m", "Cutting Len (L2) m", "Total Weight (kg)"]
 
-    group_by_field(slab_data, group_key="diameter", field_order=field_order, field_names=field_names)
+    group_by_field(slab_data, group_key="d", field_order=field_order, field_names=field_names)
+    print_totals(slab_data.totals, title="Slab steel by diameter")
+    if results is not None:
+        results.extend(slab_data)
+    return slab_data
 
 if __name__ == "__main__":
     slab_flow()
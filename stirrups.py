@@ -1,44 +1,7 @@
 from inputs import get_input
-from result import group_by_field, show_custom_results
-import math
-
-def different_spacing(l4_spacing, clear_span, l2_spacing, weight_bar, stirrups_data,type_stirrup,d,beam_num,cutting_len):
-    # this for l/4 spacing
-    y = l4_spacing
-    x = clear_span/4
-    num_stirrups1 = math.floor((x/y) + 1)
-    tweigth1 = weight_bar*num_stirrups1*2
-    #this for l/2 spacing 
-    w = l2_spacing
-    z = clear_span/2
-    num_stirrups2 = math.floor((z/w) + 1)
-    tweigth2 = weight_bar*num_stirrups2
-    total_weight = tweigth2 + tweigth1
-    stirrups_data.append({
-        "type": "Two legged" if type_stirrup == "1" else "4 legged" if type_stirrup == "2"  else "6 legged",
-        "beam_num": beam_num,
-        "d": d,
-        "num_l/4_stirrups" : num_stirrups1,
-        "num_l/2_stirrups" : num_stirrups2,
-        "cutting_len": cutting_len,
-        "total_weight": math.floor(total_weight/1000),
-        "spacing type": "diff"
-    })
-    
-
-def same_spacing(clear_span,spacing,weight_bar,stirrups_data,type_stirrup, beam_num, cutting_len,d):
-    num_stirrups = math.floor(clear_span/spacing)
-    total_weight = num_stirrups*weight_bar
-    stirrups_data.append({
-        "type": "Two legged" if type_stirrup == "1" else "4 legged" if type_stirrup == "2"  else "6 legged",
-        "beam_num": beam_num,
-        "d": d,
-        "num_stirrups": num_stirrups,
-        "cutting_len": cutting_len,
-        "total_weight": math.floor(total_weight/1000),
-        "spacing type": "uniform"
-    })
-
+from result import group_by_field, show_custom_results, print_totals
+from records import ResultStore
+from calc import StirrupSpec, stirrups
 
 def menu():
     print("1. Two legged")
@@ -46,8 +9,9 @@ def menu():
     print("3. six legged")
     print("4. Exit")
 
-def stirrup_flow():
-    stirrups_data = []
+def stirrup_flow(results=None):
+    """Interactive stirrup entry; what was entered is also added to `results` when given."""
+    stirrups_data = ResultStore()
 
     while True:
         menu()
@@ -61,58 +25,24 @@ def stirrup_flow():
         beam_num = get_input(prompt="Enter beam no. ")
         d = get_input(prompt="Enter the diameter of bar : ")
 
-        if type_stirrup == "1":
-            choice = input("Is spacing diff? (y/n) : ")
-            a = beam_width 
-            b = beam_depth 
-            cutting_len = 2*a + 2*b + 20*d - 6*d - 80
-            weight_bar = ((d*d)/162)*cutting_len
+        if type_stirrup not in ("1", "2", "3"):
+            continue
+        choice = input("Is spacing diff? (y/n) : ")
+        spec = StirrupSpec(beam_num, d, type_stirrup, clear_span, beam_width, beam_depth)
 
-            if choice == "y":#spacing is diff
-                l4_spacing = get_input(prompt="Enter spacing for L/4 : ")
-                l2_spacing = get_input(prompt="Enter spacing for remaining : ")
-                different_spacing(l4_spacing, clear_span, l2_spacing, weight_bar, stirrups_data,type_stirrup,d,beam_num,cutting_len)
-
-            else:
-                spacing = get_input(prompt="Enter the spacing : ")
-                same_spacing(clear_span,spacing,weight_bar,stirrups_data,type_stirrup, beam_num, cutting_len,d)
-        
-        elif type_stirrup == "2":
-            choice = input("Is spacing diff? (y/n) : ")
-            a = beam_depth 
-            b =  beam_width 
-            cutting_len = math.floor(4*a + 2*b +2*(b/3) +16*d - 80)
-            weight_bar = math.floor((d*d/162)*cutting_len)
-
-            #Repeating code block [try to make it into reusable func later]
-            if choice == "y":#spacing is diff
-                l4_spacing = get_input(prompt="Enter spacing for L/4 : ")
-                l2_spacing = get_input(prompt="Enter spacing for remaining : ")
-                different_spacing(l4_spacing, clear_span, l2_spacing, weight_bar, stirrups_data,type_stirrup,d,beam_num,cutting_len)
-            else:
-                spacing = get_input(prompt="Enter the spacing : ")
-                same_spacing(clear_span,spacing,weight_bar,stirrups_data,type_stirrup, beam_num, cutting_len,d)
-        
-        elif type_stirrup == "3":
-            choice = input("Is spacing different (y/n) : ")
-            a = beam_depth 
-            b = beam_width
-            cutting_len = math.floor(6*a + 2*b + 4*b/5 + 24*d - 80)
-            weight_bar = math.floor((d*d/162)*cutting_len)
-            if choice == "y":#spacing is diff
-                l4_spacing = get_input(prompt="Enter spacing for L/4 : ")
-                l2_spacing = get_input(prompt="Enter spacing for remaining : ")
-                different_spacing(l4_spacing, clear_span, l2_spacing, weight_bar, stirrups_data,type_stirrup,d,beam_num,cutting_len)
-            else:
-                spacing = get_input(prompt="Enter the spacing : ")
-                same_spacing(clear_span,spacing,weight_bar,stirrups_data,type_stirrup, beam_num, cutting_len,d)
+        if choice == "y":#spacing is diff
+            spec.l4_spacing = get_input(prompt="Enter spacing for L/4 : ")
+            spec.l2_spacing = get_input(prompt="Enter spacing for remaining : ")
+        else:
+            spec.spacing = get_input(prompt="Enter the spacing : ")
+        stirrups_data.append(stirrups(spec))
 
     #Summary
-    diff_spacing = [x for x in stirrups_data if x["spacing type"] == "diff"]
-    uniform_spacing = [x for x in stirrups_data if x["spacing type"] == "uniform"]
+    diff_spacing = [x for x in stirrups_data if x.spacing_type == "diff"]
+    uniform_spacing = [x for x in stirrups_data if x.spacing_type == "uniform"]
 
     if diff_spacing:
-        field_order = ["type","beam_num", "num_l/4_stirrups", "num_l/2_stirrups", "cutting_len", "total_weight"]
+        field_order = ["type","beam_num", "num_l4", "num_l2", "cutting_len", "total_weight"]
         field_names = ["Beam Type","Beam no.", "No. of L/4 stirrups", "No. of L/2 stirrups", "Cutting Len (mm)", "Total Weight (kg)"]
         group_by_field(diff_spacing, group_key="d", field_order=field_order, field_names=field_names, title_prefix="(Diff spacing) Bar dia")
 
@@ -121,6 +51,11 @@ def stirrup_flow():
         field_names = ["Beam Type","Beam no.", "No. of stirrups", "Cutting Len", "Total Weight (kg)"]
         group_by_field(uniform_spacing, group_key="d", field_order=field_order, field_names=field_names, title_prefix="(Uniform spacing) Bar dia")
 
+    print_totals(stirrups_data.totals, title="Stirrup steel by diameter")
+    if results is not None:
+        results.extend(stirrups_data)
+    return stirrups_data
+
 
 if __name__ == "__main__":
     stirrup_flow()
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""The column engines of batch.py against the scalar formulas, member by member."""
+import random
+from dataclasses import fields
+
+import numpy as np
+import pytest
+
+import batch
+import calc
+import cuttingLen
+from calc import BeamSpec, CantileverSpec, SlabSpec, StirrupSpec, TwoWaySlabSpec
+from records import BarResult, SlabResult, StirrupResult, FIELD_NAMES
+
+ROWS = 2000
+
+
+def spec_columns(specs):
+    """{spec field: float64/int64 array, or list for text} over specs of one type."""
+    cls = type(specs[0])
+    out = {}
+    for f in fields(cls):
+        values = [getattr(s, f.name) for s in specs]
+        if f.type is str or f.name == "zones":
+            out[f.name] = values
+        else:
+            out[f.name] = np.array(values, dtype=np.int64 if f.type is int else np.float64)
+    return out
+
+
+def records(cls, out):
+    columns = [out[name] if isinstance(out[name], list) else out[name].tolist() for name in FIELD_NAMES[cls]]
+    return [cls(*values) for values in zip(*columns)]
+
+
+def beam_specs(rng):
+    return [BeamSpec(rng.choice(["Top Steel", "Bottom Steel"]), f"B{i}", float(rng.choice([10, 12, 16, 20, 25])),
+                     rng.randint(1, 6), float(rng.randrange(2000, 9000, 25)), rng.choice([0, 1, 2]),
+                     float(rng.choice([0, 230, 300, 450])), float(rng.choice([0, 230, 300])),
+                     float(rng.choice([0, 300, 450, 600])), float(rng.choice([0, 450, 750])))
+            for i in range(ROWS)]
+
+
+def stirrup_specs(rng):
+    specs = []
+    for i in range(ROWS):
+        spec = StirrupSpec(f"B{i}", float(rng.choice([6, 8, 10])), rng.choice("123"), float(rng.randrange(2000, 9000, 7)),
+                           float(rng.randrange(200, 450, 5)), float(rng.randrange(300, 900, 5)))
+        if rng.random() < 0.5:
+            spec.spacing = float(rng.choice([100, 125, 150, 175, 200]))
+        else:
+            spec.l4_spacing, spec.l2_spacing = float(rng.choice([75, 100, 125])), float(rng.choice([150, 200]))
+        specs.append(spec)
+    return specs
+
+
+def test_bend_length_and_flows():
+    rng = random.Random(1)
+    d, width, depth = ([float(rng.randrange(lo, hi)) for _ in range(ROWS)] for lo, hi in ((6, 40), (0, 600), (0, 900)))
+    assert batch.bend_length(d, width, depth).tolist() == [cuttingLen.bend_length(*a) for a in zip(d, width, depth)]
+    span = [float(rng.randrange(1000, 9000)) for _ in range(ROWS)]
+    assert batch.flow3(d, span).tolist() == [cuttingLen.flow3(*a) for a in zip(d, span)]
+    assert batch.flow4(span, width).tolist() == [cuttingLen.flow4(*a) for a in zip(span, width)]
+
+
+@pytest.mark.parametrize("num_supports", [0, 1, 2])
+def test_beam_bar_lengths_above_threshold(num_supports):
+    diameters = [8, 10, 12, 16, 20, 25, 32, 40, 10.5]
+    assert len(diameters) > batch.BATCH_THRESHOLD
+    vector = batch.beam_bar_lengths(diameters, 4500, 300, 230, 450, 600, num_supports)
+    scalar = [batch.beam_bar_lengths([d], 4500, 300, 230, 450, 600, num_supports) for d in diameters]
+    assert vector == tuple([s[k][0] for s in scalar] for k in range(3))
+
+
+def test_beam_columns():
+    specs = beam_specs(random.Random(2))
+    assert records(BarResult, batch.beam_bar_columns(spec_columns(specs))) == [calc.compute(s) for s in specs]
+
+
+def test_cantilever_columns():
+    rng = random.Random(3)
+    specs = [CantileverSpec(f"C{i}", float(rng.choice([10, 12, 16])), rng.randint(1, 5),
+                            float(rng.randrange(1000, 6000)), float(rng.randrange(500, 3000)),
+                            float(rng.choice([0, 0, rng.randrange(2000, 8000)])))
+             for i in range(ROWS)]
+    assert records(BarResult, batch.cantilever_columns(spec_columns(specs))) == [calc.compute(s) for s in specs]
+
+
+def test_stirrup_columns():
+    specs = stirrup_specs(random.Random(4))
+    assert records(StirrupResult, batch.stirrup_columns(spec_columns(specs))) == [calc.compute(s) for s in specs]
+
+
+def test_one_way_slab_columns():
+    rng = random.Random(6)
+    specs = [SlabSpec(float(rng.choice([8, 10, 12])), float(x), float(x + rng.randrange(0, 3000)),
+                      float(rng.choice([0, 3000, 3500])), float(rng.choice([0, 3000])), float(rng.choice([0, 230])),
+                      float(rng.choice([0, 230, 300])), float(rng.choice([100, 150, 200])), float(rng.choice([150, 200, 250])),
+                      rng.randint(1, 4))
+             for x in (rng.randrange(2000, 5000) for _ in range(ROWS))]
+    assert records(SlabResult, batch.slab_columns(spec_columns(specs))) == [calc.compute(s) for s in specs]
+
+
+def test_two_way_slab_columns():
+    rng = random.Random(7)
+    specs = [TwoWaySlabSpec(float(rng.choice([8, 10])), float(x), float(x + rng.randrange(0, 2000)),
+                            *(float(rng.choice([0, 3000, 4000])) for _ in range(4)),
+                            *(float(rng.choice([0, 230])) for _ in range(4)),
+                            float(rng.choice([125, 150])), float(rng.choice([150, 200])), float(rng.choice([0, 250])),
+                            rng.randint(1, 3))
+             for x in (rng.randrange(2500, 5000) for _ in range(ROWS))]
+    out = batch.two_way_slab_columns(spec_columns(specs))
+    expected = [(i, rec) for i, s in enumerate(specs) for rec in calc.compute(s)]
+    assert out["panel"].tolist() == [i for i, _ in expected]
+    assert records(SlabResult, out) == [rec for _, rec in expected]
+    assert calc.two_way_slabs(specs) == [rec for _, rec in expected]
@@ -0,0 +1,46 @@
+"""Batch schedules: a row that passes validate computes as the spec it describes."""
+import csv
+
+import pytest
+
+from calc import BeamSpec, SlabSpec, TwoWaySlabSpec, compute
+from civilcal import run_batch, validate_schedule
+
+HEADER = ["member", "beam_num", "d", "quantity", "clear_span", "num_supports", "es_width1", "es_width2",
+          "x", "y", "a", "b", "a2", "b2", "beam_width1", "beam_width2", "beam_width3", "beam_width4",
+          "spacing_main", "spacing_dist", "spacing_short", "spacing_long"]
+ROWS = [
+    {"member": "top", "beam_num": "B1", "d": "16", "quantity": "2.0", "clear_span": "4000", "num_supports": "2.0",
+     "es_width1": "230", "es_width2": "230"},
+    {"member": "slab", "d": "10", "quantity": "3.0", "x": "3000", "y": "4000", "a": "3000", "b": "3000",
+     "beam_width1": "230", "beam_width2": "230", "spacing_main": "150", "spacing_dist": "200"},
+    {"member": "twoway", "d": "10", "quantity": "2", "x": "4000", "y": "5000", "beam_width1": "230",
+     "beam_width2": "230", "beam_width3": "230", "beam_width4": "230", "spacing_short": "150", "spacing_long": "200"},
+]
+
+
+def read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_valid_rows_compute(tmp_path, validate):
+    schedule = tmp_path / "schedule.csv"
+    with open(schedule, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, HEADER)
+        w.writeheader()
+        w.writerows(ROWS)
+    assert validate_schedule(schedule)[:2] == (3, 0)
+    assert run_batch(schedule, tmp_path / "out", validate=validate)[2] == 0
+
+    bar, = read(tmp_path / "out" / "bars.csv")
+    expected = compute(BeamSpec("Top beam", "B1", 16.0, 2, 4000.0, 2, 230.0, 230.0))
+    assert (int(bar["quantity"]), float(bar["length"])) == (expected.quantity, expected.length)
+    slabs = read(tmp_path / "out" / "slabs.csv")
+    one_way = compute(SlabSpec(10.0, 3000.0, 4000.0, 3000.0, 3000.0, 230.0, 230.0, 150.0, 200.0, 3))
+    two_way = compute(TwoWaySlabSpec(10.0, 4000.0, 5000.0, 0.0, 0.0, 0.0, 0.0, 230.0, 230.0, 230.0, 230.0,
+                                     150.0, 200.0, quantity=2))
+    assert [int(row["quantity"]) for row in slabs] == [one_way.quantity] + [rec.quantity for rec in two_way]
+    assert [float(row["total_weight"]) for row in slabs] == pytest.approx(
+        [one_way.total_weight] + [rec.total_weight for rec in two_way])
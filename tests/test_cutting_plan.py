@@ -0,0 +1,77 @@
+"""Cutting plans: every piece cut once from bars that hold it, and exact plans as small as brute force finds."""
+import random
+from collections import Counter
+
+import pytest
+
+from cutting_plan import METHODS, plan_diameter
+
+STOCK = 12000
+
+
+def fewest_bars(pieces, stock):
+    """The fewest stock bars for pieces (each <= stock), by trying every assignment."""
+    pieces = sorted(pieces, reverse=True)
+    best = len(pieces)
+
+    def place(k, rooms):
+        nonlocal best
+        if len(rooms) >= best:
+            return
+        if k == len(pieces):
+            best = len(rooms)
+            return
+        for b in range(len(rooms)):
+            if rooms[b] >= pieces[k]:
+                rooms[b] -= pieces[k]
+                place(k + 1, rooms)
+                rooms[b] += pieces[k]
+        place(k + 1, rooms + [stock - pieces[k]])
+
+    place(0, [])
+    return best
+
+
+def random_counts(rng, kinds, most):
+    return Counter({rng.randrange(500, 9000, 10): rng.randint(1, most) for _ in range(kinds)})
+
+
+def check_plan(plan, counts, stock):
+    cut = Counter(p for bar in plan.bars for p in bar)
+    expected = Counter()
+    for length, count in counts.items():
+        if length % stock:
+            expected[length % stock] += count
+    assert cut == expected
+    assert plan.full_bars == sum(length // stock * count for length, count in counts.items())
+    assert all(sum(bar) <= stock for bar in plan.bars)
+    assert plan.pieces == sum(counts.values())
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_plans_cut_every_piece(method):
+    rng = random.Random(31)
+    for _ in range(50):
+        counts = random_counts(rng, rng.randint(1, 8), 30)
+        counts[rng.randrange(12001, 30000)] += rng.randint(0, 3)       # longer than the stock
+        check_plan(plan_diameter(16, +counts, STOCK, method), +counts, STOCK)
+
+
+def test_exact_matches_brute_force():
+    rng = random.Random(32)
+    for _ in range(200):
+        stock = rng.choice([6000, 12000])
+        counts = Counter(rng.randrange(1000, stock + 1, 100) for _ in range(rng.randint(1, 9)))
+        plan = plan_diameter(12, counts, stock, "exact")
+        check_plan(plan, counts, stock)
+        pieces = [length % stock for length, count in counts.items() for _ in range(count) if length % stock]
+        assert len(plan.bars) == fewest_bars(pieces, stock)
+
+
+def test_heuristics_never_beat_exact():
+    rng = random.Random(33)
+    for _ in range(100):
+        counts = Counter(rng.randrange(1000, STOCK, 50) for _ in range(rng.randint(1, 9)))
+        exact = plan_diameter(10, counts, STOCK, "exact").stock_bars
+        assert plan_diameter(10, counts, STOCK, "ffd").stock_bars >= exact
+        assert plan_diameter(10, counts, STOCK, "bfd").stock_bars >= exact
@@ -0,0 +1,152 @@
+"""ResultStore: records read back as they went in, edits, and the totals kept alongside them."""
+import random
+
+import pytest
+
+from aggregate import summarize
+from calc import BeamSpec, SlabSpec, StirrupSpec, compute
+from records import RECORD_TYPES, BarResult, DiameterTotals, ResultStore, SlabResult, StirrupResult
+
+
+def random_record(rng):
+    kind = rng.randrange(3)
+    if kind == 0:
+        return BarResult(rng.choice(["Top beam", "Bottom beam", "Cantilever"]), f"B{rng.randrange(50)}",
+                         float(rng.choice([10, 12, 16, 20])), rng.randint(1, 5), float(rng.randrange(2000, 9000)),
+                         float(rng.randrange(2000, 8000, 25)), 120.0, 0.0, 0.0, rng.randrange(1000, 50000) / 100)
+    if kind == 1:
+        return StirrupResult(rng.choice(["Two legged", "Four legged"]), f"B{rng.randrange(50)}",
+                             float(rng.choice([8, 10])), rng.choice(["uniform", "diff"]), float(rng.randrange(900, 2000)),
+                             float(rng.randrange(5, 80)), rng.randint(10, 60))
+    return SlabResult("One-way", float(rng.choice([8, 10, 12])), rng.randint(10, 40), rng.randint(10, 40),
+                      rng.randrange(300, 600) / 100, rng.randrange(300, 600) / 100, float(rng.randrange(20, 200)))
+
+
+def test_store_reads_back_what_went_in():
+    rng = random.Random(10)
+    records = [random_record(rng) for _ in range(1000)]
+    store = ResultStore()
+    store.extend(records[:500])
+    for rec in records[500:]:
+        store.append(rec)
+    assert len(store) == len(records)
+    assert list(store) == records
+    assert [store[i] for i in range(-len(records), 0)] == records
+    assert store[100:110] == records[100:110]
+    assert sum(len(store.table(cls)) for cls in RECORD_TYPES) == len(records)
+
+
+def test_text_cells_share_strings():
+    store = ResultStore()
+    for _ in range(3):
+        store.append(BarResult("".join(["Top", " beam"]), "B1", 16.0, 2, 5000.0))
+    labels = store.table(BarResult).column("type")
+    assert labels[0] is labels[1] is labels[2]
+
+
+def random_result(rng):
+    kind = rng.randrange(3)
+    if kind == 0:
+        spec = BeamSpec("Top Steel", f"B{rng.randrange(50)}", float(rng.choice([10, 12, 16, 20])), rng.randint(1, 5),
+                        float(rng.randrange(2000, 8000, 25)), 2, 230.0, 300.0, 450.0, 450.0)
+    elif kind == 1:
+        spec = StirrupSpec(f"B{rng.randrange(50)}", float(rng.choice([8, 10])), rng.choice("123"),
+                           float(rng.randrange(2000, 8000, 25)), 230.0, 450.0, spacing=float(rng.choice([100, 150])))
+    else:
+        spec = SlabSpec(float(rng.choice([8, 10, 12])), 3000.0, float(rng.randrange(3000, 6000, 50)), 3000.0, 0.0,
+                        230.0, 230.0, 150.0, 200.0)
+    return compute(spec), spec
+
+
+def fresh_totals(records):
+    totals = DiameterTotals()
+    for rec in records:
+        totals.add(rec)
+    return totals
+
+
+def filled_store(rng, n=300):
+    store, expected = ResultStore(), []
+    for _ in range(n):
+        rec, spec = random_result(rng)
+        store.append(rec, spec)
+        expected.append((rec, spec))
+    return store, expected
+
+
+def check(store, expected):
+    assert list(store) == [rec for rec, _ in expected]
+    assert [store.spec(i) for i in range(len(store))] == [spec for _, spec in expected]
+    assert store.totals.units() == fresh_totals(rec for rec, _ in expected).units()
+
+
+def test_random_edits_match_a_list():
+    rng = random.Random(11)
+    store, expected = filled_store(rng)
+    for _ in range(500):
+        op = rng.randrange(3)
+        if op == 0 and expected:
+            i = rng.randrange(len(expected))
+            rec, spec = random_result(rng)      # often of another record type
+            assert store.replace(i, rec, spec) == expected[i][0]
+            expected[i] = (rec, spec)
+        elif op == 1 and expected:
+            i = rng.randrange(len(expected))
+            assert store.remove(i) == expected.pop(i)[0]
+        else:
+            i = rng.randrange(len(expected) + 1)
+            rec, spec = random_result(rng)
+            store.insert(i, rec, spec)
+            expected.insert(i, (rec, spec))
+    check(store, expected)
+
+
+@pytest.mark.parametrize("edit", ["replace", "remove", "insert"])
+def test_edit_and_undo_round_trip(edit):
+    rng = random.Random(12)
+    store, _ = filled_store(rng)
+    before, totals = store.dump(), store.totals.units()
+    for _ in range(100):
+        i = rng.randrange(len(store))
+        if edit == "replace":
+            rec, spec = random_result(rng)
+            old_spec = store.spec(i)
+            old = store.replace(i, rec, spec)
+            store.replace(i, old, old_spec)
+        elif edit == "remove":
+            spec = store.spec(i)
+            store.insert(i, store.remove(i), spec)
+        else:
+            rec, spec = random_result(rng)
+            store.insert(i, rec, spec)
+            store.remove(i)
+    assert store.dump() == before
+    assert store.totals.units() == totals
+
+
+def test_dump_restore_round_trip():
+    store, expected = filled_store(random.Random(13))
+    copy = ResultStore()
+    copy.restore(store.dump())
+    assert list(copy) == [rec for rec, _ in expected]
+
+
+def test_grouped_totals_match_incremental():
+    rng = random.Random(14)
+    store, expected = filled_store(rng, 3000)
+    records = [rec for rec, _ in expected]
+    summary = summarize(store, ("d",))
+    units = store.totals.units()
+    assert [k[0] for k in summary.keys] == [d for d, _ in units]
+    assert summary.rows.tolist() == [t[0] for _, t in units]
+    assert summary.pieces.tolist() == [t[1] for _, t in units]
+    assert summary.length_units.tolist() == [t[2] for _, t in units]
+    assert summary.weight_units.tolist() == [t[3] for _, t in units]
+
+    # in any order, and split into chunks merged afterwards as a -j run does
+    rng.shuffle(records)
+    assert fresh_totals(records).units() == units
+    merged = DiameterTotals()
+    for start in range(0, len(records), 700):
+        merged.merge(fresh_totals(records[start:start + 700]))
+    assert merged.units() == units
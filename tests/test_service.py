@@ -0,0 +1,37 @@
+"""Requests to the HTTP service: checked as a batch schedule is, and computed as calc.compute does."""
+import pytest
+
+import batch
+from calc import BeamSpec, StirrupSpec, compute
+from records import BarResult, FIELD_NAMES
+from service import RequestError, parse_request
+
+BEAM = {"member": "top", "d": 16, "quantity": 2, "clear_span": 4000}
+STIRRUP = {"beam_num": "B1", "d": 8, "clear_span": 3000, "beam_width": 230, "beam_depth": 450, "spacing": 150}
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"quantity": 2.7}, "member 1: quantity must be a whole number"),
+    ({"quantity": -3}, "member 1: quantity must be > 0"),
+    ({"d": -16}, "member 1: d must be > 0"),
+    ({"clear_span": -4000}, "member 1: clear_span must be > 0"),
+    ({"clear_span": None}, "member 1: clear_span must be a number"),
+    ({"num_supports": 3}, "member 1: num_supports must be one of 0, 1, 2"),
+    ({"num_supports": 2, "es_width1": 230}, "member 1: es_width2 must be > 0 on two supports"),
+])
+def test_bad_beams_are_refused(change, message):
+    with pytest.raises(RequestError, match=message):
+        parse_request(BeamSpec, {"members": [BEAM, {**BEAM, **change}]})
+
+
+def test_stirrup_spacing_below_diameter():
+    with pytest.raises(RequestError, match="member 0: spacing must not be less than the diameter"):
+        parse_request(StirrupSpec, {"columns": {k: [v] for k, v in {**STIRRUP, "spacing": 0.4}.items()}})
+
+
+def test_whole_floats_are_ints():
+    cols, n = parse_request(BeamSpec, {"members": [{**BEAM, "quantity": 2.0, "num_supports": 1, "es_width1": 230}]})
+    assert n == 1 and cols["quantity"].dtype.kind == "i"
+    out = batch.beam_bar_columns(cols)
+    row = [out[name][0] if isinstance(out[name], list) else out[name][0].item() for name in FIELD_NAMES[BarResult]]
+    assert BarResult(*row) == compute(BeamSpec("Top beam", "", 16.0, 2, 4000.0, 1, 230.0))
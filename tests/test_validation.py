@@ -0,0 +1,45 @@
+import pytest
+
+from validation import validate
+
+ZONE_MESSAGE = "must each start before they end, inside the clear span"
+
+
+def stirrup_errors(zones, clear_span="4000"):
+    cells = {"d": ["8"], "clear_span": [clear_span], "beam_width": ["230"], "beam_depth": ["450"], "zones": [zones]}
+    return [(field, message) for _, field, message in validate("stirrup", cells).errors()]
+
+
+@pytest.mark.parametrize("zones", ["0:900@100 0:0@150 -900:0@100", "0:600@100", "-300:0@100 1000:9000@100"])
+def test_zones_in_span(zones):
+    assert stirrup_errors(zones) == []
+
+
+@pytest.mark.parametrize("zones", [
+    "5000:6000@100",        # starts past the clear span
+    "4000:4500@100",
+    "600:300@100",          # ends before it starts
+    "600:600@100",
+    "-5000:-4500@100",      # from the far face, but longer than the span
+    "0:600@100 600:300@150",
+])
+def test_zones_outside_span(zones):
+    assert stirrup_errors(zones) == [("zones", ZONE_MESSAGE)]
+
+
+def test_zone_rules_are_per_row():
+    zones = ["0:600@100", "5000:6000@100", "", "0:0@0"]
+    cells = {"d": ["8"] * 4, "clear_span": ["4000"] * 4, "beam_width": ["230"] * 4, "beam_depth": ["450"] * 4,
+             "spacing": ["", "", "150", ""], "zones": zones}
+    report = validate("stirrup", cells)
+    assert report.ok.tolist() == [True, False, True, False]
+    assert [(row, field) for row, field, _ in report.errors()] == [(1, "zones"), (3, "zones")]
+
+
+def test_spacing_not_below_diameter():
+    cells = {"d": ["8"] * 4, "clear_span": ["4000"] * 4, "beam_width": ["230"] * 4, "beam_depth": ["450"] * 4,
+             "spacing": ["0.4", "8", "", ""], "l4_spacing": ["", "", "5", ""], "l2_spacing": ["", "", "150", ""],
+             "zones": ["", "", "", "0:600@100 600:0@4"]}
+    report = validate("stirrup", cells)
+    assert report.ok.tolist() == [False, True, False, False]
+    assert [(row, field) for row, field, _ in report.errors()] == [(0, "spacing"), (2, "l4_spacing"), (3, "zones")]
@@ -0,0 +1,80 @@
+"""batch.zone_layout and the zone stirrup columns against calc, beam by beam."""
+import random
+
+import numpy as np
+import pytest
+
+import batch
+import calc
+from records import FIELD_NAMES, StirrupResult
+
+
+def vector_layout(zones_per_beam, spans):
+    table = [(i, *zone) for i, zones in enumerate(zones_per_beam) for zone in zones]
+    beam, start, end, spacing = (list(col) for col in zip(*table)) if table else ([], [], [], [])
+    out = batch.zone_layout(beam, start, end, spacing, spans)
+    layouts = [[] for _ in spans]
+    for b, s, e, sp, count in zip(*(out[k].tolist() for k in ("beam", "start", "end", "spacing", "count"))):
+        layouts[b].append((s, e, sp))
+        assert count == calc.zone_count(s, e, sp)
+    return layouts
+
+
+def random_zones(rng, span):
+    span = int(span)
+    zones = []
+    for _ in range(rng.randint(0, 5)):
+        start = rng.choice([0, -rng.randrange(100, 3000, 50), rng.randrange(0, span + 2000, 50)])
+        end = rng.choice([0, -rng.randrange(0, 3000, 50), rng.randrange(50, span + 2000, 50)])
+        zones.append((float(start), float(end), float(rng.choice([100, 125, 150, 200]))))
+    return zones
+
+
+def test_matches_scalar_layout():
+    rng = random.Random(21)
+    spans = [float(rng.randrange(1000, 8000, 50)) for _ in range(300)]
+    zones = [random_zones(rng, span) for span in spans]
+    assert vector_layout(zones, spans) == [calc.zone_layout(z, span) for z, span in zip(zones, spans)]
+
+
+def test_zone_stirrup_columns_match_compute():
+    rng = random.Random(22)
+    specs = [calc.StirrupZonesSpec(f"B{i}", float(rng.choice([6, 8, 10])), rng.choice("123"),
+                                   float(rng.randrange(2000, 9000, 7)), float(rng.randrange(200, 450, 5)),
+                                   float(rng.randrange(300, 900, 5)),
+                                   rng.choice([((0, 900, 100), (0, 0, 150), (-900, 0, 100)), ((0, 0, 125),),
+                                               ((0, 600, 75), (600, -600, 200)), ((5000, 6000, 100),)]))
+             for i in range(2000)]
+    c = {"beam_num": [s.beam_num for s in specs], "stirrup_type": [s.stirrup_type for s in specs]}
+    for name in ("d", "clear_span", "beam_width", "beam_depth"):
+        c[name] = np.array([getattr(s, name) for s in specs])
+    zones = [(i, *zone) for i, s in enumerate(specs) for zone in s.zones]
+    table = dict(zip(("beam", "start", "end", "spacing"), (np.array(col) for col in zip(*zones))))
+    out = batch.stirrup_zone_columns(c, table)
+    columns = [out[name] if isinstance(out[name], list) else out[name].tolist() for name in FIELD_NAMES[StirrupResult]]
+    assert [StirrupResult(*values) for values in zip(*columns)] == [calc.compute(s) for s in specs]
+
+
+@pytest.mark.parametrize("zones, span", [
+    ([(5000.0, 6000.0, 100.0)], 4000.0),           # starts past the clear span
+    ([(-5000.0, -4500.0, 100.0)], 4000.0),         # from the far face, ends before the near one
+    ([(600.0, 600.0, 100.0)], 4000.0),             # empty
+    ([], 4000.0),
+])
+def test_no_zone_in_span(zones, span):
+    assert calc.zone_layout(zones, span) == []
+    assert vector_layout([zones], [span]) == [[]]
+
+
+def test_empty_zones_among_others():
+    zones = [[(5000.0, 6000.0, 100.0)], [(0.0, 600.0, 100.0), (0.0, 0.0, 150.0)]]
+    assert vector_layout(zones, [4000.0, 4000.0]) == [[], calc.zone_layout(zones[1], 4000.0)]
+
+
+def test_zone_columns_without_stirrups():
+    c = {"beam_num": ["B1"], "d": np.array([8.0]), "stirrup_type": ["1"], "clear_span": np.array([4000.0]),
+         "beam_width": np.array([230.0]), "beam_depth": np.array([450.0])}
+    zones = {"beam": [0], "start": [5000.0], "end": [6000.0], "spacing": [100.0]}
+    out = batch.stirrup_zone_columns(c, zones)
+    assert out["num_stirrups"].tolist() == [0]
+    assert out["total_weight"].tolist() == [0]
@@ -0,0 +1,261 @@
+"""
+Checks on member inputs, a whole column at a time.
+
+Each member type of a batch schedule (see civilcal.py) has a schema: its
+fields, what each must be (a number, a whole number, > 0, one of a few
+values), and rules across fields - a slab's y at least its x, both support
+widths when a beam sits on two supports, a spacing for every stirrup. The
+cells come in as text, one list per field, many members at once:
+
+    report = validate("top", {"d": ["16", "x"], "clear_span": ["4000", "0"], ...})
+    report.ok                   # bool per row
+    report.columns["d"]         # the values parsed: float64 or int64 arrays, lists of str (zones as tuples)
+    for row, field, message in report.errors():
+        print(f"row {row + 1}: {field} {message}")
+
+Every check runs over whole numpy columns, so the cost per member is small
+enough to check a million-row schedule in a second or two. A cell gets one
+message, the first its checks raise; a row with any message is not ok.
+Blank cells count as 0, but a blank quantity is 1 and a blank stirrup type
+"1" (two legged), as in a schedule. `civilcal validate schedule.csv` runs
+the checks alone over a whole schedule.
+"""
+from dataclasses import dataclass
+
+from calc import parse_zones
+
+
+@dataclass(slots=True)
+class Field:
+    name: str
+    label: str              # what the forms call it
+    type: str = "number"    # "number", "int" or "text"
+    positive: bool = False  # must be > 0 (numbers are otherwise >= 0)
+    choices: tuple = ()
+    blank: str = "0"        # what a blank cell counts as
+
+
+@dataclass(slots=True)
+class Schema:
+    fields: tuple
+    rules: tuple = ()       # functions of the parsed columns giving [(field, message, bad rows mask)]
+
+    def names(self):
+        return [f.name for f in self.fields]
+
+    def field(self, name):
+        return next(f for f in self.fields if f.name == name)
+
+
+def _supports(c):
+    n = c["num_supports"]
+    return [("es_width1", "must be > 0 on one or two supports", (n >= 1) & ~(c["es_width1"] > 0)),
+            ("es_width2", "must be > 0 on two supports", (n == 2) & ~(c["es_width2"] > 0))]
+
+
+def _cantilever(c):
+    return [("canti_span", "(or full_span) must be > 0", ~((c["canti_span"] > 0) | (c["full_span"] > 0)))]
+
+
+def _longer_span(c):
+    return [("y", "must not be less than x", c["y"] < c["x"])]
+
+
+def _stirrup_spacing(c):
+    import numpy as np
+    zones = c["zones"]
+    parsed = []
+    bad = np.zeros(len(zones), dtype=bool)
+    for i, text in enumerate(zones):
+        if not text:
+            parsed.append(())
+            continue
+        try:
+            parsed.append(parse_zones(text))
+        except ValueError:
+            parsed.append(())
+            bad[i] = True
+            continue
+        bad[i] = not all(spacing > 0 for _, _, spacing in parsed[-1])
+    c["zones"] = parsed
+    zoned = np.array([bool(z) for z in zones], dtype=bool)
+    diff = (c["l4_spacing"] > 0) | (c["l2_spacing"] > 0)
+    free = ~zoned & ~bad
+
+    # every zone, measured from the near face as calc.zone_layout does, must
+    # start inside the clear span and before it ends
+    row = np.repeat(np.arange(len(parsed)), [len(z) for z in parsed])
+    start, end, spacing = np.array([zone for z in parsed for zone in z], dtype=np.float64).reshape(-1, 3).T
+    span = c["clear_span"][row]
+    start = np.where(start < 0, start + span, start)
+    end = np.where(end <= 0, end + span, end)
+    outside = np.bincount(row, weights=~((start >= 0) & (start < end) & (start < span)), minlength=len(parsed)) > 0
+
+    # stirrups closer than their own diameter cannot be bent and placed
+    d = c["d"]
+    packed = np.bincount(row, weights=spacing < d[row], minlength=len(parsed)) > 0
+    return [("zones", "must be start:end@spacing ... with spacings > 0", bad),
+            ("zones", "must each start before they end, inside the clear span", outside),
+            ("l4_spacing", "must be > 0 with l2_spacing", free & diff & ~(c["l4_spacing"] > 0)),
+            ("l2_spacing", "must be > 0 with l4_spacing", free & diff & ~(c["l2_spacing"] > 0)),
+            ("spacing", "must be > 0 (or give l4_spacing and l2_spacing, or zones)", free & ~diff & ~(c["spacing"] > 0)),
+            ("zones", "spacings must not be less than the diameter", packed),
+            ("l4_spacing", "must not be less than the diameter", free & diff & (c["l4_spacing"] < d)),
+            ("l2_spacing", "must not be less than the diameter", free & diff & (c["l2_spacing"] < d)),
+            ("spacing", "must not be less than the diameter", free & ~diff & (c["spacing"] < d))]
+
+
+BEAM_NUM = Field("beam_num", "Beam number", "text", blank="")
+DIAMETER = Field("d", "Diameter", positive=True)
+QUANTITY = Field("quantity", "Quantity", "int", positive=True, blank="1")
+BEAM = Schema((BEAM_NUM, DIAMETER, QUANTITY, Field("clear_span", "Clear span", positive=True),
+               Field("num_supports", "Number of end supports", "int", choices=(0, 1, 2)),
+               Field("es_width1", "End support width 1"), Field("es_width2", "End support width 2"),
+               Field("beam_depth1", "Beam depth of end support 1"), Field("beam_depth2", "Beam depth of end support 2")),
+              (_supports,))
+SCHEMAS = {
+    "top": BEAM,
+    "bottom": BEAM,
+    "cantilever": Schema((BEAM_NUM, DIAMETER, QUANTITY, Field("inner_span", "Inner span"),
+                          Field("canti_span", "Cantilever span"), Field("full_span", "Full span")),
+                         (_cantilever,)),
+    "stirrup": Schema((BEAM_NUM, DIAMETER, Field("stirrup_type", "Stirrup type", "text", choices=("1", "2", "3"), blank="1"),
+                       Field("clear_span", "Clear span", positive=True), Field("beam_width", "Beam width", positive=True),
+                       Field("beam_depth", "Beam depth", positive=True), Field("spacing", "Uniform spacing"),
+                       Field("l4_spacing", "L/4 spacing"), Field("l2_spacing", "L/2 spacing"),
+                       Field("zones", "Zones", "text", blank="")),
+                      (_stirrup_spacing,)),
+    "slab": Schema((DIAMETER, QUANTITY, Field("x", "Breadth x", positive=True), Field("y", "Length y", positive=True),
+                    Field("a", "Adjacent span a"), Field("b", "Adjacent span b"),
+                    Field("beam_width1", "Beam width 1"), Field("beam_width2", "Beam width 2"),
+                    Field("spacing_main", "Main bar spacing", positive=True),
+                    Field("spacing_dist", "Distribution bar spacing", positive=True)),
+                   (_longer_span,)),
+    "twoway": Schema((DIAMETER, QUANTITY, Field("x", "Breadth x", positive=True), Field("y", "Length y", positive=True),
+                      Field("a", "Adjacent span a"), Field("b", "Adjacent span b"),
+                      Field("a2", "Adjacent span a2"), Field("b2", "Adjacent span b2"),
+                      Field("beam_width1", "Beam width 1"), Field("beam_width2", "Beam width 2"),
+                      Field("beam_width3", "Beam width 3"), Field("beam_width4", "Beam width 4"),
+                      Field("spacing_short", "Short span spacing", positive=True),
+                      Field("spacing_long", "Long span spacing", positive=True),
+                      Field("spacing_edge", "Edge strip spacing")),
+                     (_longer_span,)),
+}
+
+
+class Report:
+    """
+    What validate() found: the parsed columns, ok per row, and the errors as
+    (field, message, rows) groups - row index arrays, so even a million
+    failures stay a handful of arrays.
+    """
+    def __init__(self, schema, columns, problems, rows):
+        import numpy as np
+        self.schema = schema
+        self.columns = columns
+        self.problems = problems
+        self.ok = np.ones(rows, dtype=bool)
+        for _, _, bad in problems:
+            self.ok[bad] = False
+
+    def __len__(self):
+        return len(self.ok)
+
+    def failed(self):
+        return int(len(self.ok) - self.ok.sum())
+
+    def errors(self):
+        """(row, field, message) for every cell at fault, by row, then in the order of the checks."""
+        import numpy as np
+        if not self.problems:
+            return []
+        rows = np.concatenate([bad for _, _, bad in self.problems])
+        which = np.repeat(np.arange(len(self.problems)), [len(bad) for _, _, bad in self.problems])
+        order = np.lexsort((which, rows))
+        return [(row, *self.problems[k][:2]) for row, k in zip(rows[order].tolist(), which[order].tolist())]
+
+    def by_row(self):
+        """{row: [(field, message)]}."""
+        out = {}
+        for row, field, message in self.errors():
+            out.setdefault(row, []).append((field, message))
+        return out
+
+    def counts(self):
+        """{(field, message): rows} - a summary of what is wrong and how often."""
+        return {(field, message): len(bad) for field, message, bad in self.problems}
+
+
+def validate(member, cells):
+    """
+    Check the cells ({field: [text]}, one list per field, missing fields
+    blank) of members of one type (a key of SCHEMAS, or a Schema). Numbers
+    may come as float64 arrays instead, nan where a value is missing or not a
+    number. Returns a Report.
+    """
+    import numpy as np
+    schema = member if isinstance(member, Schema) else SCHEMAS[member]
+    n = max(map(len, cells.values()), default=0)
+    columns = {}
+    checks = []         # (field, message, bad mask), in the order they are reported
+    for f in schema.fields:
+        values = cells.get(f.name)
+        if values is None:
+            values = [f.blank] * n
+        elif not isinstance(values, np.ndarray):
+            values = [v.strip() or f.blank for v in values]
+        if f.type == "text":
+            columns[f.name] = values
+            if f.choices:
+                checks.append((f.name, f"must be one of {', '.join(f.choices)}", ~np.isin(values, f.choices)))
+            continue
+        arr, bad = parse_numbers(values)
+        checks.append((f.name, "must be a number", bad))
+        if f.type == "int":
+            checks.append((f.name, "must be a whole number", arr != np.floor(arr)))
+        if f.positive:
+            checks.append((f.name, "must be > 0", ~(arr > 0)))
+        else:
+            checks.append((f.name, "must not be negative", arr < 0))
+        if f.choices:
+            checks.append((f.name, f"must be one of {', '.join(map(str, f.choices))}", ~np.isin(arr, f.choices)))
+        columns[f.name] = arr
+    for rule in schema.rules:
+        checks.extend(rule(columns))
+
+    # one message per cell: the first check that fails it
+    faulty = {}
+    problems = []
+    for field, message, bad in checks:
+        seen = faulty.get(field)
+        if seen is not None:
+            bad = bad & ~seen
+            faulty[field] = seen | bad
+        else:
+            faulty[field] = bad
+        rows = np.flatnonzero(bad)
+        if len(rows):
+            problems.append((field, message, rows))
+    for f in schema.fields:
+        if f.type == "int":
+            arr = columns[f.name]
+            columns[f.name] = np.where(np.isfinite(arr), arr, 0).astype(np.int64)
+    return Report(schema, columns, problems, n)
+
+
+def parse_numbers(values):
+    """(float64 array, bad mask) for number strings; cells that are not a finite number are nan and bad."""
+    import numpy as np
+    try:
+        arr = np.array(values, dtype=np.float64)
+    except ValueError:
+        arr = np.array([_number(v) for v in values], dtype=np.float64)
+    return arr, ~np.isfinite(arr)
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return float("nan")
+